@@ -1,145 +1,351 @@
 import os
 import json
+import argparse
 import colorama as color
 
-from src import BIDS_formater as formater
-from src import json_sidecar_generator as jsg
 
+def add_bidsify_options(parser, suppress=False):
+    """
+    This function adds the options of the BIDS format's auditory data
+    exporter to a parser.
+    INPUTS:
+    -parser: argument parser (main parser or bidsify subparser)
+    -suppress: boolean specifying if the options' defaults are suppressed
+               (Default = False). The bidsify subparser suppresses them:
+               otherwise its defaults would overwrite the values given
+               before the subcommand (e.g. "--jobs 4 bidsify ...").
+    OUTPUTS:
+    -NO specific return to the script
+    """
+
+    ls_action = [
+        parser.add_argument("--jobs", type=int, default=1,
+                            help="number of worker processes used by the "
+                                 "BIDS format's auditory data exporter "
+                                 "(default: 1)"),
+        parser.add_argument("--incremental", action="store_true",
+                            help="only regenerate the BIDS files of the "
+                                 "subjects whose inputs changed since the "
+                                 "last run"),
+        parser.add_argument("--db-ttl", type=int, default=0,
+                            help="reuse the local snapshot of a database "
+                                 "downloaded from a URL if it is more "
+                                 "recent than this number of seconds "
+                                 "(default: 0)"),
+        parser.add_argument("--offline", action="store_true",
+                            help="use the last local snapshot of a database "
+                                 "downloaded from a URL"),
+        parser.add_argument("--link-json", action="store_true",
+                            help="link the json sidecars (reflink or "
+                                 "hardlink) instead of copying them (the "
+                                 "linked files must not be edited in "
+                                 "place)"),
+        parser.add_argument("--dry-run", action="store_true",
+                            help="only report the files that would be "
+                                 "written and read, and the missing OAE "
+                                 "test data files, without writing "
+                                 "anything"),
+        parser.add_argument("--export", choices=["parquet", "feather"],
+                            help="also save one long-format table per test "
+                                 "for the whole dataset in the "
+                                 "BIDS_data/derivatives folder (requires "
+                                 "pyarrow)"),
+        parser.add_argument("--sqlite", action="store_true",
+                            help="also store the measurements in a SQLite "
+                                 "database in the BIDS_data/derivatives "
+                                 "folder"),
+        parser.add_argument("--split-flags", action="store_true",
+                            help="write the \" *\" flags of the DPOAE "
+                                 "values in boolean [column]_flag columns")
+    ]
+
+    if suppress:
+        for action in ls_action:
+            action.default = argparse.SUPPRESS
+
+
+def get_parser():
+    """
+    This function generates the command line options of the toolbox.
+    Without a subcommand, the interactive menu is shown. The subcommands run
+    a pipeline functionality without prompting the user:
+        -> sidecars: BIDS format's json sidecars creation
+        -> bidsify: BIDS format's auditory data exporter
+    The options of the BIDS format's auditory data exporter can be given
+    before or after the bidsify subcommand.
+    OUTPUTS:
+    -returns the argument parser
+    """
+
+    # Options of the BIDS format's auditory data exporter (also used by the
+    # interactive menu)
+    parser = argparse.ArgumentParser(description="Adam_auditory_toolbox")
+    add_bidsify_options(parser)
+
+    subparsers = parser.add_subparsers(dest="command")
+
+    parser_sidecars = subparsers.add_parser(
+        "sidecars", help="BIDS format's json sidecars creation"
+    )
+    parser_sidecars.add_argument("--split-flags", action="store_true",
+                                 default=argparse.SUPPRESS,
+                                 help="describe the boolean [column]_flag "
+                                      "columns in the DPOAE sidecar")
+
+    parser_bidsify = subparsers.add_parser(
+        "bidsify", help="BIDS format's auditory data exporter"
+    )
+    add_bidsify_options(parser_bidsify, suppress=True)
+    parser_bidsify.add_argument("--source", required=True,
+                                choices=["url", "urltsv", "xlsx", "csv"],
+                                help="type of source of the database")
+    parser_bidsify.add_argument("location", nargs="?",
+                                help="Google Spreadsheet URL (url) or path "
+                                     "of the database file (default for "
+                                     "urltsv and xlsx: the URL.tsv or "
+                                     "test_database.xlsx file in the data "
+                                     "folder)")
+
+    return parser
+
+
+def load_variables():
+    """
+    This function loads the frequent-variables dictionary.
+    OUTPUTS:
+    -returns the content of the variables.json file
+    """
+
+    with open("variables.json", "r") as origin:
+        var_json = json.load(origin)
+    origin.close()
+
+    return var_json
+
+
+def run_sidecars(args):
+    """
+    This function runs the BIDS format's json sidecars creation.
+    INPUTS:
+    -args: parsed command line options (see get_parser)
+    OUTPUTS:
+    -NO specific return to the script
+    """
+
+    # Only imported when the pipeline is selected (heavy dependencies)
+    from src import json_sidecar_generator as jsg
+
+    var_json = load_variables()
+
+    result_path = os.path.join(".", "results")
+
+    jsg.create_sidecars(result_path, var_json,
+                        split_flags=args.split_flags)
+
+
+def run_bidsify(args, method, source=None, location=None):
+    """
+    This function runs the BIDS format's auditory data exporter.
+    INPUTS:
+    -args: parsed command line options (see get_parser)
+    -method: method used to activate the exporter ("master_script" from the
+             interactive menu, "standalone" from the bidsify subcommand)
+    -source: type of source of the database (Default = None: the user is
+             prompted)
+    -location: URL or path of the database (Default = None)
+    OUTPUTS:
+    -NO specific return to the script
+    """
+
+    # Only imported when the pipeline is selected (heavy dependencies)
+    from src import BIDS_formater as formater
+
+    var_json = load_variables()
+
+    formater.master_run(
+        "data", "results", var_json, method,
+        jobs=args.jobs,
+        incremental=args.incremental,
+        db_ttl=args.db_ttl,
+        offline=args.offline,
+        source=source,
+        location=location,
+        link_json=args.link_json,
+        dry_run=args.dry_run,
+        export=args.export,
+        sqlite=args.sqlite,
+        split_flags=args.split_flags
+    )
+
+
+def menu(args):
+    """
+    This function shows the interactive menu of the toolbox.
+    INPUTS:
+    -args: parsed command line options (see get_parser)
+    OUTPUTS:
+    -NO specific return to the script
+    """
+
+    # Available functions list
+    ls_fct = [
+        "BIDS format's json sidecars creation",
+        "BIDS format's auditory data exporter",
+        # "Dummy line",
+    ]
+
+    # Prompt text generation
+    prompt_instruction = (
+        color.Style.BRIGHT
+        + ("Please enter the number of the pipeline functionality you want "
+           "to run:")
+        + color.Style.RESET_ALL
+    )
+
+    prompt_options = ""
+
+    for i, element_i in enumerate(ls_fct):
+        prompt_options += f"\n {str(i+1)}-{element_i}"
+
+    prompt_options += f"\n {str(len(ls_fct)+1)}-Exit\n"
+
+    prompt_txt = prompt_instruction + prompt_options
+
+    # While loop condition initialization
+    loop_value = True
+
+    # Show welcome message
+    print(
+        color.Style.BRIGHT
+        + color.Fore.YELLOW
+        + "\nWelcome to the Adam_auditory_toolbox.\n"
+    )
+
+    # function selection prompt
+    while loop_value:
+
+        # Show options and save the user selection
+        value = input(prompt_txt)
+        print("\n")
+
+        try:
+            # Value validity verification
+            # Is it a valid number?
+            if value.isdigit():
+                value = int(value)
+
+                # Is it within the range of the options?
+                if value > 0 and value <= len(ls_fct) + 1:
+
+                    # Loop breaks if the "Exit" option is selected
+                    if value == len(ls_fct) + 1:
+                        break
+
+                    # The encased section contains the subscript calls.
+                    # If functionality are to be added, here is where to add
+                    # them. (Don't forget to also add them to the list of
+                    # available functions: ls_fct)
+                    ###########################################################
+
+                    else:
+
+                        # BIDS format functionalities
+                        if ls_fct[value - 1].count("BIDS") == 1:
+
+                            # json sidecar files generation
+                            if ls_fct[value - 1] == (
+                                "BIDS format's json sidecars creation"
+                            ):
+                                run_sidecars(args)
+                                print("\n")
+
+                            # BIDS compatible dataset formating
+                            elif ls_fct[value - 1] == (
+                                "BIDS format's auditory data exporter"
+                            ):
+                                run_bidsify(args, "master_script")
+                                print("\n")
+
+                        # Test Dummy
+                        elif ls_fct[value - 1].count("Dummy") == 1:
+                            print("This is just a test line:",
+                                  ls_fct[value - 1],
+                                  "\n")
+
+        #######################################################################
 
-# Initialize colorama
-color.init(autoreset=True)
-
-# Available functions list
-ls_fct = [
-    "BIDS format's json sidecars creation",
-    "BIDS format's auditory data exporter",
-    # "Dummy line",
-]
-
-# Prompt text generation
-prompt_instruction = (
-    color.Style.BRIGHT
-    + "Please enter the number of the pipeline functionality you want to run:"
-    + color.Style.RESET_ALL
-)
-
-prompt_options = ""
-
-for i, element_i in enumerate(ls_fct):
-    prompt_options += f"\n {str(i+1)}-{element_i}"
-
-prompt_options += f"\n {str(len(ls_fct)+1)}-Exit\n"
-
-prompt_txt = prompt_instruction + prompt_options
-
-# While loop condition initialization
-loop_value = True
-
-# Show welcome message
-print(
-    color.Style.BRIGHT
-    + color.Fore.YELLOW
-    + "\nWelcome to the Adam_auditory_toolbox.\n"
-)
-
-# function selection prompt
-while loop_value:
+                else:
 
-    # Show options and save the user selection
-    value = input(prompt_txt)
-    print("\n")
+                    # If it is not within range, restart the loop
+                    print(
+                        color.Fore.RED
+                        + "The provided value is not valid (out of bound).\n"
+                    )
+                    continue
 
-    try:
-        # Value validity verification
-        # Is it a valid number?
-        if value.isdigit():
-            value = int(value)
+            else:
 
-            # Is it within the range of the options?
-            if value > 0 and value <= len(ls_fct) + 1:
+                # If it is not a number, restart the loop
+                print(
+                    color.Fore.RED
+                    + "The provided value is not valid (not a digit).\n"
+                )
+                continue
 
-                # Loop breaks if the "Exit" option is selected
-                if value == len(ls_fct) + 1:
-                    break
+        # RuntimeError processing
+        except RuntimeError as error:
 
-                # The encased section contains the subscript calls.
-                # If functionality are to be added, here is where to add them.
-                # (Don't forget to also add them to the list of available
-                # functions: ls_fct)
-                ###############################################################
+            # If the submenu "Return to the main menu" option is selected
+            if error.args[0] == "Return to the main menu":
+                continue
+            # If there is a BIDSified ID conflict
+            elif error.args[0] == "BIDSified ID conflict":
+                exit()
+            else:
+                raise
 
-                else:
+    # Exit message
+    print(
+        color.Style.BRIGHT
+        + color.Fore.YELLOW
+        + "Thanks for using the Adam_auditory_toolbox.\n"
+    )
 
-                    # BIDS format functionalities
-                    if ls_fct[value - 1].count("BIDS") == 1:
 
-                        # json sidecar files generation
-                        if ls_fct[value - 1] == (
-                            "BIDS format's json sidecars creation"
-                        ):
-                            with open("variables.json", "r") as origin:
-                                var_json = json.load(origin)
-                            origin.close()
+def main():
+    """
+    This function is the entry point of the toolbox.
+    OUTPUTS:
+    -NO specific return to the script
+    """
 
-                            result_path = os.path.join(".", "results")
+    parser = get_parser()
+    args = parser.parse_args()
 
-                            jsg.create_sidecars(result_path, var_json)
-                            print("\n")
+    # Initialize colorama
+    color.init(autoreset=True)
 
-                        # BIDS compatible dataset formating
-                        elif ls_fct[value - 1] == (
-                            "BIDS format's auditory data exporter"
-                        ):
-                            with open("variables.json", "r") as origin:
-                                var_json = json.load(origin)
-                            origin.close()
+    if args.command is None:
+        menu(args)
 
-                            formater.master_run(
-                                "data", "results", var_json, "master_script"
-                            )
-                            print("\n")
+    elif args.command == "sidecars":
+        run_sidecars(args)
 
-                    # Test Dummy
-                    elif ls_fct[value - 1].count("Dummy") == 1:
-                        print("This is just a test line:",
-                              ls_fct[value - 1],
-                              "\n")
+    elif args.command == "bidsify":
+        if args.location is None and args.source in ["url", "csv"]:
+            parser.error(f"the {args.source} source requires a location")
 
-    ###########################################################################
+        try:
+            run_bidsify(args, "standalone",
+                        source=args.source, location=args.location)
 
+        except RuntimeError as error:
+            # If there is a BIDSified ID conflict
+            if error.args[0] == "BIDSified ID conflict":
+                exit(1)
             else:
+                raise
 
-                # If it is not within range, restart the loop
-                print(
-                    color.Fore.RED
-                    + "The provided value is not valid (out of bound).\n"
-                )
-                continue
 
-        else:
-
-            # If it is not a number, restart the loop
-            print(
-                color.Fore.RED
-                + "The provided value is not valid (not a digit).\n"
-            )
-            continue
-
-    # RuntimeError processing
-    except RuntimeError as error:
-
-        # If the submenu "Return to the main menu" option is selected
-        if error.args[0] == "Return to the main menu":
-            continue
-        # If there is a BIDSified ID conflict
-        elif error.args[0] == "BIDSified ID conflict":
-            exit()
-        else:
-            raise
-
-# Exit message
-print(
-    color.Style.BRIGHT
-    + color.Fore.YELLOW
-    + "Thanks for using the Adam_auditory_toolbox.\n"
-)
+if __name__ == "__main__":
+    main()
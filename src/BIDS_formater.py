@@ -1,14 +1,23 @@
 import os
+import io
+import sys
+import re
 import json
+import hashlib
+import sqlite3
+import argparse
+import numpy as np
 import pandas as pd
 import colorama as color
 # import glob
 
-from datetime import datetime as date
-from shutil import copyfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from functools import partial
 
 from src import BIDS_utils as utils
 from src import common_functions as common
+from src import json_sidecar_generator as jsg
 
 """
 SCRIPT DESCRIPTION:
@@ -29,20 +38,122 @@ script, Adam_auditory_toolbox.py.
 
 utf = "UTF-8-SIG"
 
+# Database columns stored as categoricals (see typed_db)
+db_categories = ["Participant_ID", "Protocol condition",
+                 "Protocol name", "Scan type"]
 
-def fetch_db(data_path, method):
+# Columns of the output plan (see plan_subject)
+plan_columns = ["og_ID", "BIDS_ID", "session", "condition", "test", "run",
+                "label", "file_R", "file_L", "missing", "index", "path"]
+
+# subject_bidsifier arguments shared by all the subjects, set once in each
+# worker process (see init_worker)
+worker_kwargs = None
+
+
+def db_column_needed(column, ls_conditions):
+    """
+    This function verifies if a database column is used to generate the
+    BIDS dataset (same column titles as in initialize_column_titles).
+    INPUTS:
+    -column: title of the database column
+    -ls_conditions: list of the database's session description columns
+                    (var_json["bids"]["columns_conditions"])
+    OUTPUTS:
+    -returns True if the column is needed, False otherwise
+    """
+
+    return (column in ls_conditions
+            or column.endswith(("_RE", "_LE"))
+            or column.startswith(("REFLEX_RE_", "REFLEX_LE_",
+                                  "RE_", "LE_", "MTX1", "MTX2")))
+
+
+def parse_dates(sr_date):
+    """
+    This function converts the database's test dates to datetime values.
+    INPUTS:
+    -sr_date: Date column of the database ("YYYY-MM-DD", optionally followed
+              by a time)
+    OUTPUTS:
+    -returns the parsed dates (NaT for the missing or invalid dates)
+    -prints a warning listing the invalid dates
+    """
+
+    sr_text = sr_date.astype("string").str.split(" ").str[0]
+    sr_parsed = pd.to_datetime(sr_text, format="%Y-%m-%d", errors="coerce")
+
+    mask_invalid = sr_parsed.isna() & sr_date.notna()
+
+    if mask_invalid.any():
+        ls_invalid = sr_date[mask_invalid].astype(str).unique().tolist()
+        print(color.Fore.YELLOW
+              + ("WARNING: The following dates of the database are not in the "
+                 f"YYYY-MM-DD format: {ls_invalid}\n")
+              + ("\t   --> Therefore, the delays of these sessions will be "
+                 "\"n/a\".\n"))
+
+    return sr_parsed
+
+
+def typed_db(df):
+    """
+    This function sets the types of the database's columns: the empty boxes
+    (and the "n/a" texts) are kept as missing values, so that the numeric
+    test columns stay numeric, and the session descriptors are stored as
+    categoricals. The "n/a" values are only written in the tsv files (see
+    BIDS_utils.save_df).
+    INPUTS:
+    -df: database in a pandas dataframe format
+    OUTPUTS:
+    -returns the typed database
+    """
+
+    # Spreadsheet cells containing the "n/a" text (ex.: xlsx databases)
+    for column in df.columns[df.dtypes == object]:
+        mask = df[column] == "n/a"
+
+        if mask.any():
+            df[column] = df[column].mask(mask)
+
+    for column in db_categories:
+        df[column] = df[column].astype("category")
+
+    return df
+
+
+def fetch_db(data_path, method, var_json, db_ttl=0, offline=False,
+             source=None, location=None):
     """
     This function retrieves a database to work on.
     INPUTS:
     -data_path: path to the [repo_root]/data/ folder
+    -method: method used to activate this function (see master_run)
+    -var_json: frequent-variables dictionary
+    -db_ttl: time-to-live, in seconds, of the local snapshot of a database
+             downloaded from a URL (Default = 0)
+    -offline: boolean forcing the use of the last local snapshot of a
+              database downloaded from a URL (Default = False)
+    -source: type of source of the database ("url", "urltsv", "xlsx" or
+             "csv") (Default = None: the user is prompted)
+    -location: URL or path of the database (Default = None)
     OUTPUTS:
     -returns a dataframe containing the database to use
     """
 
-    df = common.retrieve_db(data_path, method)
+    # Only the needed columns are read from a xlsx database
+    usecols = partial(db_column_needed,
+                      ls_conditions=var_json["bids"]["columns_conditions"])
+
+    df = common.retrieve_db(data_path, method, ttl=db_ttl, offline=offline,
+                            usecols=usecols, source=source,
+                            location=location)
+
+    # Parse the test dates once
+    df["Date"] = parse_dates(df["Date"])
 
-    # Manage the empty boxes
-    df.fillna(value='n/a', inplace=True)
+    # The empty boxes are kept as missing values (NaN, NaT for the dates)
+    df = typed_db(df)
 
     return df
 
@@ -54,7 +165,8 @@ def fetch_oae_data(data_path):
     -data_path: path to the [repo_root]/data/auditory_tests/ folder
     OUTPUTS
     -returns: - the path to the OAE test data folder
-              - the list of all the OAE test data filenames
+              - an index of all the OAE test data filenames keyed by
+                (participant, date, test, prepost, frequency, ear)
               - a dataframe containing a by-test breakdown information:
                   - the participant ID
                   - the session experimental condition and date
@@ -73,6 +185,8 @@ def fetch_oae_data(data_path):
 
     ls_file.sort()
 
+    oae_index = utils.oae_file_index(ls_file)
+
     ls_of_ls = []
 
     for i in ls_file:
@@ -89,56 +203,54 @@ def fetch_oae_data(data_path):
                                "Run",
                                "Ear"])
 
-    return path, ls_file, df
+    return path, oae_index, df
 
 
-def copy_json(parent_path, json_origin):
+def copy_json(parent_path, json_origin, ls_test, link=False):
     """
     This function makes copies of the original json files in the created
-    database.
+    database. The files that already have the same content are left as is.
     INPUTS:
     -parent_path: path to the destination folder
                   ([repo_root]/results/BIDS_data/)
     -json_origin: path to the original json files location
                   ([repo_root]/results/BIDS_sidecars_originals/)
+    -ls_test: list of the tests (var_json["bids"]["ls_test"])
+    -link: boolean specifying if the files should be linked (reflink or
+           hardlink, when supported by the file system) instead of copied
+           (Default = False)
     OUTPUTS:
     -NO specific return to the script
     """
 
-    copyfile(os.path.join(json_origin, "sessions.json"),
-             os.path.join(parent_path, "sessions.json"))
-    copyfile(os.path.join(json_origin, "task-Tymp_beh.json"),
-             os.path.join(parent_path, "task-Tymp_beh.json"))
-    copyfile(os.path.join(json_origin, "task-Reflex_beh.json"),
-             os.path.join(parent_path, "task-Reflex_beh.json"))
-    copyfile(os.path.join(json_origin, "task-PTA_beh.json"),
-             os.path.join(parent_path, "task-PTA_beh.json"))
-    copyfile(os.path.join(json_origin, "task-MTX_beh.json"),
-             os.path.join(parent_path, "task-MTX_beh.json"))
-    copyfile(os.path.join(json_origin, "task-TEOAE_beh.json"),
-             os.path.join(parent_path, "task-TEOAE_beh.json"))
-    copyfile(os.path.join(json_origin, "task-DPOAE_beh.json"),
-             os.path.join(parent_path, "task-DPOAE_beh.json"))
-    copyfile(os.path.join(json_origin, "task-DPGrowth_beh.json"),
-             os.path.join(parent_path, "task-DPGrowth_beh.json"))
+    for test in ["sessions"] + ls_test:
+        filename = jsg.sidecar_filename(test)
+
+        utils.propagate_file(os.path.join(json_origin, filename),
+                             os.path.join(parent_path, filename),
+                             link=link)
 
 
-def subject_extractor(df, subject_ID):
+def subject_partition(df):
     """
-    This function extracts from the database all the lines that are linked to a
-    single participant and returns them into a new dataframe.
+    This function splits the database into one dataframe per participant in
+    a single pass over the database.
     INPUTS:
-    -df: database in a pandas dataframe format
-    -subject_ID: the subject ID to look for in the Participant_ID column of the
-                 dataframe
+    -df: database in a pandas dataframe format (must contain a
+         Participant_ID column)
     OUTPUTS:
-    -returns a dataframe containing only the selected participant's lines
+    -returns a dictionary where the keys are the subject IDs found in the
+     Participant_ID column of the dataframe and the values are dataframes
+     containing only the matching participant's lines
     """
 
-    mask = df['Participant_ID'] == subject_ID
-    sub_df = df[mask].reset_index(drop=True)
+    dict_sub_df = {}
 
-    return sub_df
+    for subject_ID, sub_df in df.groupby("Participant_ID", sort=False,
+                                         observed=True):
+        dict_sub_df[subject_ID] = sub_df.reset_index(drop=True)
+
+    return dict_sub_df
 
 
 # Check if the session-level folders exist for each participant
@@ -147,24 +259,16 @@ def create_folder_session(subject, session_count, parent_path):
     """
     This function creates by-session folders in the BIDS_data/sub-0*/ folder
     INPUTS:
-    -subject: subject ID used in the database's dataframe (format: Sub0X or
-              sub-0x)
+    -subject: BIDSified subject ID (see common.bidsify_IDs)
     -session_count: number of line(s) in the by-subject dataframe
+    -parent_path: path inside the BIDS_data folder
     OUTPUTS:
     -folders for each session in the provided subject's folder
-    -returns the list of the session folder names
+    -returns the list of the session folder names and the path of the
+     subject's folder
     """
 
-    if subject.startswith("Sub"):
-        sub_ID = subject.lstrip("Sub")
-        children_path = os.path.join(parent_path, f"sub-{sub_ID}")
-
-    elif subject.startswith("sub"):
-        sub_ID = subject.lstrip("sub")
-        children_path = os.path.join(parent_path, f"sub-{sub_ID}")
-
-    else:
-        children_path = os.path.join(parent_path, f"sub-{subject}")
+    children_path = os.path.join(parent_path, f"sub-{subject}")
 
     dir_content = os.listdir(children_path)
 
@@ -182,50 +286,43 @@ def create_folder_session(subject, session_count, parent_path):
 
 def add_postscan_oae(data_sub, var_json):
     """
-    This function
+    This function adds the post-scan OAE sessions (e.g. Condition 3B) that
+    are not listed in the database. Each one is inserted right after its
+    pre-scan session (e.g. Condition 3A), without any test data, and the
+    sessions are then numbered in order.
     INPUTS:
-    -data_sub:
+    -data_sub: database lines of the subject (see subject_partition)
     -var_json: frequent-variables dictionary
     OUTPUTS:
-    -
+    -returns the subject's database lines including the post-scan OAE
+     sessions and a Session_ID column
     """
 
-    k = 0
-    while k < len(data_sub):
-
-        data_sub.loc[k, "Session_ID"] = f"{k+1:02d}"
-
-        if (data_sub["Protocol condition"][k]
-                in var_json["bids"]["cond"]["OAE_only"]["already_in_db"]):
-            key_oae_only = data_sub["Protocol condition"][k]
-            txt_oae_only = var_json["bids"]["cond"]["OAE_only"]["cond_pair"][key_oae_only]
-
-            sub_df_A = data_sub.iloc[:k+1]
-            sub_df_B = data_sub.iloc[k+1:]
+    dict_oae_only = var_json["bids"]["cond"]["OAE_only"]
 
-            sub_df_C = data_sub.copy()
-            sub_df_C.drop(sub_df_C.index[k+1:], inplace=True)
-            sub_df_C.drop(sub_df_C.index[0:k], inplace=True)
-
-            sub_df_C.loc[k, "Protocol condition"] = txt_oae_only
-            sub_df_C.loc[k, "Session_ID"] = f"{k+2:02d}"
-
-            ls_columns = sub_df_C.columns.tolist()
-            index_tests = ls_columns.index("Tymp_RE")
-            del ls_columns[0:index_tests]
+    mask_oae_only = data_sub["Protocol condition"].isin(
+        dict_oae_only["already_in_db"]
+    )
 
-            for m in ls_columns:
-                sub_df_C.loc[k, m] = "n/a"
+    if mask_oae_only.any():
+        sub_df_post = data_sub[mask_oae_only].copy()
+        sub_df_post["Protocol condition"] = (
+            sub_df_post["Protocol condition"].map(dict_oae_only["cond_pair"])
+        )
 
-            data_sub = pd.concat([sub_df_A, sub_df_C, sub_df_B])
-            data_sub.reset_index(inplace=True, drop=True)
+        ls_columns = sub_df_post.columns.tolist()
+        index_tests = ls_columns.index("Tymp_RE")
+        sub_df_post[ls_columns[index_tests:]] = np.nan
 
-            k += 1
+        # Each added session goes right after its pre-scan session
+        order = np.concatenate([np.arange(len(data_sub)) * 2,
+                                np.flatnonzero(mask_oae_only) * 2 + 1])
 
-        else:
-            pass
+        data_sub = pd.concat([data_sub, sub_df_post])
+        data_sub = data_sub.iloc[np.argsort(order, kind="stable")]
+        data_sub.reset_index(inplace=True, drop=True)
 
-        k += 1
+    data_sub["Session_ID"] = [f"{k:02d}" for k in range(1, len(data_sub)+1)]
 
     return data_sub
 
@@ -285,93 +382,238 @@ def initialize_column_titles(df):
     return column_titles
 
 
-def bids_id_verifier(bids_id, ls_id_og, ls_id_bids):
+def bids_id_verifier(ls_id_og, ls_id_bids):
     """
-    This function...
+    This function verifies that the bidsified subjects' IDs are valid (not
+    empty) and that no two original IDs become the same bidsified ID.
     INPUTS:
-    -bids_id: bidsified version of the currently processed subject's ID
     -ls_id_og: list of the original subjects' IDs
-    -ls_id_bids: list of the bidsified subjects' IDs
+    -ls_id_bids: list of the bidsified subjects' IDs (same order)
     OUTPUTS:
-    -If there are no ID conflicts, returns the updated list ls_bids_id.
-     Otherwise, it raises RuntimeError BIDSified ID conflict.
+    -If there are no ID conflicts, NO specific return to the script.
+     Otherwise, it prints every conflict and raises RuntimeError BIDSified
+     ID conflict.
     """
 
-    if bids_id in ls_id_bids:
-        index_bids_1 = ls_id_bids.index(bids_id)
-        index_bids_2 = len(ls_id_bids)
-        og_problem_1 = ls_id_og[index_bids_1]
-        og_problem_2 = ls_id_og[index_bids_2]
+    dict_id = {}
+
+    for id_og, bids_id in zip(ls_id_og, ls_id_bids):
+        dict_id.setdefault(bids_id, []).append(id_og)
+
+    ls_conflict = [f"  - sub-{bids_id}: {', '.join(map(str, ls_og))}"
+                   for bids_id, ls_og in dict_id.items()
+                   if len(ls_og) > 1 or bids_id == ""]
 
+    if len(ls_conflict) != 0:
         print(
             color.Style.BRIGHT
             + color.Fore.RED
-            + f"CRITICAL ERROR: Two participants IDs ({og_problem_1} and "
-              f"{og_problem_2} are generating a conflict once they are "
-              f"adapted to BIDS standard: they both become sub-{bids_id}. "
-              "\nPlease modify one of the previously mentioned IDs (both "
-              "in the dataset and the variables.json file) and run this "
-              "pipeline again.\n"
+            + "CRITICAL ERROR: The following participants IDs are generating "
+              "a conflict once they are adapted to BIDS standard (same or "
+              "empty BIDS ID):\n"
+            + "\n".join(ls_conflict)
+            + "\nPlease modify the previously mentioned IDs (both in the "
+              "dataset and the variables.json file) and run this pipeline "
+              "again.\n"
         )
 
         raise RuntimeError("BIDSified ID conflict")
 
+
+def normalize_db(df, var_json):
+    """
+    This function converts the test values of the spreadsheet-based tests
+    (tymp, reflex, PTA and MTX) to numbers, one column at a time. The
+    columns listed in var_json["bids"]["text_columns"] (using the
+    tsv_columns names, ex.: the tympanogram type) are kept as text. In the
+    other columns:
+        - the values listed in var_json["bids"]["missing_values"] (ex.: "-")
+          become missing values
+        - the decimal commas are replaced with decimal points
+        - the integers are kept as integers (ex.: "25" stays 25)
+        - the flagged values keep their " *" flag (ex.: "12,5*" becomes
+          "12.5 *", like the flagged OAE test values)
+    The values that can not be read as numbers are kept as written and are
+    listed in the QC report.
+    INPUTS:
+    -df: database (see typed_db)
+    -var_json: frequent-variables dictionary
+    OUTPUTS:
+    -returns the normalized database and the QC report (dataframe with one
+     line per unreadable value)
+    -prints a warning if some values could not be read
+    """
+
+    column_titles = initialize_column_titles(df)
+
+    dict_tsv = var_json["bids"]["tsv_columns"]
+    dict_text = var_json["bids"]["text_columns"]
+    ls_missing = var_json["bids"]["missing_values"]
+
+    # (tsv_columns key, database columns of each ear (or sequence), number
+    # of tsv columns that are not in the database: order and side)
+    ls_spreadsheet = [
+        ("tymp", ["columns_tymp_R", "columns_tymp_L"], 2),
+        ("reflex", ["columns_reflex_R", "columns_reflex_L"], 2),
+        ("PTA", ["columns_PTA_R", "columns_PTA_L"], 2),
+        ("MTX", ["columns_MTX_L1", "columns_MTX_L2"], 1)
+    ]
+
+    ls_report = []
+
+    for test, ls_titles, lead in ls_spreadsheet:
+        ls_text = dict_text.get(test, [])
+
+        for title in ls_titles:
+            for column, name in zip(column_titles[title],
+                                    dict_tsv[test][lead:]):
+                if (name in ls_text
+                        or pd.api.types.is_numeric_dtype(df[column])):
+                    continue
+
+                original = df[column]
+
+                text = original.astype("string").str.strip()
+                text = text.mask(text.isin(ls_missing))
+
+                flagged = text.str.endswith("*").fillna(False).astype(bool)
+                number = (text.str.replace(r"\s*\*$", "", regex=True)
+                          .str.replace(",", ".", regex=False))
+
+                values = pd.to_numeric(number,
+                                       errors="coerce").astype(float)
+
+                unreadable = values.isna() & text.notna()
+                integer = (number.str.fullmatch(r"[+-]?\d+").fillna(False)
+                           .astype(bool) & values.notna() & ~flagged)
+                flagged &= values.notna()
+
+                if unreadable.any():
+                    ls_report.append(pd.DataFrame({
+                        "Participant_ID": df.loc[unreadable,
+                                                 "Participant_ID"],
+                        "Protocol name": df.loc[unreadable, "Protocol name"],
+                        "test": test,
+                        "column": column,
+                        "value": df.loc[unreadable, column]
+                    }))
+
+                normalized = values.astype(object)
+                normalized[integer] = (values[integer].astype("int64")
+                                       .astype(object).to_numpy())
+                normalized[flagged] = number[flagged] + " *"
+                normalized[unreadable] = original[unreadable]
+
+                df[column] = normalized
+
+    report_columns = ["Participant_ID", "Protocol name", "test", "column",
+                      "value"]
+
+    if len(ls_report) == 0:
+        qc_report = pd.DataFrame(columns=report_columns)
     else:
-        ls_id_bids.append(bids_id)
-        return ls_id_bids
+        qc_report = pd.concat(ls_report).astype(object)
+
+        print(color.Fore.YELLOW
+              + (f"WARNING: {len(qc_report)} value(s) of the "
+                 "spreadsheet-based tests could not be read as numbers.\n")
+              + ("\t   --> They are kept as written in the tsv files (see "
+                 "the BIDS_normalization_QC.tsv file of the results "
+                 "folder).\n"))
+
+    return df, qc_report
+
+
+def save_qc_report(result_path, qc_report):
+    """
+    This function saves the QC report of the database's normalization.
+    INPUTS:
+    -result_path: path inside the result folder ([repo_root]/results/)
+    -qc_report: QC report (see normalize_db)
+    OUTPUTS:
+    -saved [repo_root]/results/BIDS_normalization_QC.tsv file
+    -NO specific return to the script
+    """
+
+    path = os.path.join(result_path, "BIDS_normalization_QC.tsv")
 
+    qc_report.to_csv(path, sep="\t", index=False)
 
-def replace_130(pta, column_titles):
+
+def replace_no_response(df, column_titles, var_json):
     """
-    This function replace the threshold values that equal 130 (arbitrary
-    numerical value used as a No Response indicator) with the
-    string No response.
+    This function replaces the PTA threshold values used as a No Response
+    indicator (arbitrary numerical value, e.g. 130) with a label (e.g. the
+    string No response).
     INPUTS:
-    -pta:
-    -column_titles:
+    -df: database
+    -column_titles: dictionary containing the database's column titles
+                    relevant for each of the auditory test types
+    -var_json: frequent-variables dictionary (the indicator and the label
+               are found in var_json["bids"]["no_response"])
     OUTPUTS:
-    -returns an updated version of the pta dataframe where the 130 threshold
-     values have been replace with the string No response.
+    -returns an updated version of the database where the No Response
+     threshold values have been replaced with the label
     """
 
-    for i in column_titles["columns_PTA"]:
-        for a in range(0, len(pta)):
-            if pta.loc[a, i] == 130:
-                pta.loc[a, i] = "No response"
-            else:
-                pass
+    ls_columns = column_titles["columns_PTA"]
+    dict_no_response = var_json["bids"]["no_response"]
+
+    mask = df[ls_columns] == dict_no_response["value"]
+
+    if mask.any(axis=None):
+        df[ls_columns] = df[ls_columns].mask(mask, dict_no_response["label"])
 
-    return pta
+    return df
 
 
-def delay_baseline(i, data_sub):
+def baseline_dates(df):
     """
-    This function calculates the delay (in days) between the currently
-    processed test session and the session marked as the first baseline.
+    This function retrieves the date of the session marked as the first
+    baseline ("Baseline 1") of every subject.
     INPUTS:
-    -i: counter value to indicate the index to access in the data_sub
-        dataframe
-    -data_sub:
+    -df: database (with the dates parsed by fetch_db)
     OUTPUTS:
-    -returns a number of days (string format) between two sessions
+    -returns a series of the baseline dates indexed by subject ID
+    -prints a warning for each subject without a "Baseline 1" session
     """
 
-    index_date_bsl = data_sub.index[(data_sub["Protocol name"]
-                                     == "Baseline 1")].tolist()
-    str_date_bsl = str(data_sub.at[index_date_bsl[0],
-                       "Date"]).split(" ")
-    date_bsl = date.strptime(str_date_bsl[0], "%Y-%m-%d")
+    mask_bsl = df["Protocol name"] == "Baseline 1"
 
-    str_date_ses = str(data_sub.at[i, "Date"]).split(" ")
-    date_ses = date.strptime(str_date_ses[0], "%Y-%m-%d")
+    sr_date_bsl = (df.loc[mask_bsl, "Date"]
+                   .groupby(df.loc[mask_bsl, "Participant_ID"], sort=False,
+                            observed=True)
+                   .first())
 
-    value_delay = date_ses - date_bsl
+    for i in df["Participant_ID"].drop_duplicates():
+        if pd.isna(sr_date_bsl.get(i)):
+            print(color.Fore.YELLOW
+                  + ("WARNING: No dated \"Baseline 1\" session was found for "
+                     f"the subject {i}.\n")
+                  + ("\t   --> Therefore, the delays of this subject's "
+                     "sessions will be \"n/a\".\n"))
 
-    return value_delay
+    return sr_date_bsl
+
+
+def delay_baseline(data_sub, date_bsl):
+    """
+    This function calculates the delays (in days) between the subject's
+    test sessions and the session marked as the first baseline.
+    INPUTS:
+    -data_sub: database lines of the subject (see subject_partition)
+    -date_bsl: date of the subject's first baseline (NaT if unknown)
+    OUTPUTS:
+    -returns a list of numbers of days ("n/a" when a date is unknown)
+    """
+
+    sr_delay = (data_sub["Date"] - date_bsl).dt.days
+
+    return [int(value) if pd.notna(value) else "n/a" for value in sr_delay]
 
 
 def ref_df_generator(index_reference, column_reference,
-                     dict_of_ls, subject_folder_path):
+                     dict_of_ls, subject_folder_path, manifest=None):
     """
     This function...
     INPUTS:
@@ -381,6 +623,11 @@ def ref_df_generator(index_reference, column_reference,
                  of parameter
     -subject_folder_path: path inside the subject's result folder
                           ([repo_root]/results/BIDS_data/sub-XXXX/)
+    -manifest: dictionary of the tests saved for each session by the
+               extractors (see BIDS_utils.save_df)
+               (Default = None: the tests are retrieved by scanning the
+               session folders, ex.: to rebuild the sessions.tsv file of an
+               existing BIDS_data folder)
     OUTPUTS:
     -returns a dataframe ready to be saved as the sessions.tsv file for the
      currently processed subject
@@ -395,8 +642,11 @@ def ref_df_generator(index_reference, column_reference,
         ref.at[a, "delay"] = dict_of_ls["ls_delay"][a]
         ref.at[a, "scan_type"] = dict_of_ls["ls_scan"][a]
 
-        ls_data = utils.retrieve_tests(subject_folder_path,
-                                       dict_of_ls["ls_ses"][a])
+        if manifest is None:
+            ls_data = utils.retrieve_tests(subject_folder_path,
+                                           dict_of_ls["ls_ses"][a])
+        else:
+            ls_data = manifest.get(dict_of_ls["ls_ses"][a], [])
 
         if "Tymp" in ls_data:
             ref.at[a, "Tymp"] = "1"
@@ -448,30 +698,510 @@ def ref_df_generator(index_reference, column_reference,
     return ref
 
 
-def subject_bidsifier(i, df, oae_tests_df, oae_file_list, column_titles,
-                      var_json, ls_id_og, ls_id_bids, parent_path,
-                      auditory_test_path, skip_oae):
+def prepare_sessions(data_sub, var_json):
     """
-    This function BIDSifies the data for a specified subject
+    This function lists every session of a subject, including the post-scan
+    OAE sessions that are not listed in the database.
+    INPUTS:
+    -data_sub: database lines of the subject (see subject_partition)
+    -var_json: frequent-variables dictionary
+    OUTPUTS:
+    -returns the subject's session lines with their Session_ID
+     (see add_postscan_oae)
+    """
+
+    data_sub.insert(loc=3, column="Session_ID", value=None)
+
+    # Add a session line for the post-scan OAE condition
+    data_sub = add_postscan_oae(data_sub, var_json)
+
+    return data_sub
+
+
+def plan_subject(i, bids_id, data_sub, oae_index, column_titles,
+                 parent_path, skip_oae):
+    """
+    This function builds the plan of every tsv file to be generated for a
+    subject, without touching the disk. The same plan is used to extract the
+    data (see subject_bidsifier) and to preview a run (see report_plan).
     INPUTS:
     -i: currently processed subject's ID as defined in the variables.json
         file or in the database
-    -df: database in a pandas dataframe format
-    -oae_tests_df: dataframe with the OAE test files' names
-    -oae_file_list:
+    -bids_id: bidsified version of the subject's ID
+    -data_sub: session lines of the subject (see prepare_sessions)
+    -oae_index: index of the available OAE test files
     -column_titles: dictionary containing the database's column titles relevant
                     for each of the auditory test types
+    -parent_path: path inside the BIDS_data folder
+                  ([repo_root]/results/BIDS_data/)
+    -skip_oae: boolean specifiying if the OAE data should be processed
+    OUTPUTS:
+    -returns a dataframe with one line per (session, test, run) output: the
+     subject's IDs, the session and its condition, the test, run and label,
+     the right and left ears' OAE test data files (None for the
+     spreadsheet-based tests), a "missing" flag (at least one of the OAE
+     test data files is missing: the output will not be generated) and the
+     path of the tsv file
+    """
+
+    ls_plan = []
+
+    ls_plan += utils.plan_test(data_sub, column_titles["columns_tymp_R"],
+                               column_titles["columns_tymp_L"], "Tymp")
+    ls_plan += utils.plan_test(data_sub, column_titles["columns_reflex_R"],
+                               column_titles["columns_reflex_L"], "Reflex")
+    ls_plan += utils.plan_test(data_sub, column_titles["columns_PTA_R"],
+                               column_titles["columns_PTA_L"], "PTA")
+    ls_plan += utils.plan_test(data_sub, column_titles["columns_MTX_L1"],
+                               column_titles["columns_MTX_L2"], "MTX",
+                               sides=False)
+
+    if skip_oae is False:
+        ls_plan += utils.plan_oae(data_sub, oae_index)
+
+    subject_folder_path = os.path.join(parent_path, f"sub-{bids_id}")
+
+    ls_session = data_sub["Session_ID"].tolist()
+    ls_condition = data_sub["Protocol condition"].tolist()
+
+    for line in ls_plan:
+        j = line["index"]
+        line["og_ID"] = i
+        line["BIDS_ID"] = bids_id
+        line["session"] = "ses-" + ls_session[j]
+        line["condition"] = ls_condition[j]
+        line["path"] = utils.tsv_path(subject_folder_path, bids_id,
+                                      ls_session[j], line["test"],
+                                      line["run"])
+
+    return pd.DataFrame(ls_plan, columns=plan_columns)
+
+
+def report_plan(plan, session_count, var_json, auditory_test_path):
+    """
+    This function prints the totals and the problems of a dry run.
+    INPUTS:
+    -plan: plan of all the BIDSified subjects (see plan_subject)
+    -session_count: number of sessions of the BIDSified subjects
     -var_json: frequent-variables dictionary
-    -ls_id_og: list of the subjects IDs as defined in the variables.json file
-               or in the database
+    -auditory_test_path: path inside the auditory_tests data folder
+                         ([repo_root]/data/auditory_tests/)
+    OUTPUTS:
+    -NO specific return to the script
+    -prints the number of files that would be written and read and the
+     outputs that could not be generated
+    """
+
+    subject_count = plan["og_ID"].nunique()
+    planned = plan[~plan["missing"].astype(bool)]
+
+    print(color.Style.BRIGHT
+          + "Dry run: nothing was written on the disk.\n")
+
+    print(f"{subject_count} subject(s) with {session_count} session(s) "
+          "would be BIDSified.")
+    print(f"{len(planned)} tsv data file(s) would be written:")
+
+    for test, count in planned.groupby("test", sort=False).size().items():
+        print(f"\t-{test}: {count}")
+
+    print(f"The {len(var_json['bids']['ls_test']) + 1} json sidecars, one "
+          "sessions.tsv file per subject and the subject_ID_concordance.tsv "
+          "file would also be written.\n")
+
+    # OAE test data files to read
+    ls_oae_file = pd.unique(planned[["file_R", "file_L"]].stack())
+    oae_bytes = sum(os.path.getsize(os.path.join(auditory_test_path, "OAE",
+                                                 filename))
+                    for filename in ls_oae_file)
+
+    print(f"{len(ls_oae_file)} OAE csv file(s) ({oae_bytes} bytes) would be "
+          "read.\n")
+
+    # Outputs that can not be generated (one line per test session)
+    problems = plan[plan["missing"].astype(bool)].drop_duplicates(
+        ["og_ID", "session", "test"]
+    )
+
+    if len(problems) == 0:
+        print("No problem was found.\n")
+    else:
+        print(color.Fore.RED
+              + (f"ERROR: {len(problems)} OAE test session(s) would not be "
+                 "BIDSified because at least one of their csv files is "
+                 "missing:"))
+
+        for line in problems.itertuples():
+            print(color.Fore.RED
+                  + (f"\t   --> {line.og_ID} {line.session} "
+                     f"({line.condition}): {line.test}"))
+
+        print("")
+
+
+def subject_tables(dict_tables, bids_id, dict_of_ls):
+    """
+    This function assembles the long-format tables of a subject.
+    INPUTS:
+    -dict_tables: dictionary of the subject's saved dataframes
+                  (see BIDS_utils.collect_tables)
+    -bids_id: bidsified version of the subject's ID
+    -dict_of_ls: dictionary containing lists of values classified per type
+                 of parameter (see subject_bidsifier)
+    OUTPUTS:
+    -returns a dictionary {test: long-format df} with the participant_id,
+     session_id, run, condition and delay columns followed by the tsv
+     file's columns
+    """
+
+    dict_condition = dict(zip(dict_of_ls["ls_ses"],
+                              dict_of_ls["ls_condition"]))
+    dict_delay = dict(zip(dict_of_ls["ls_ses"], dict_of_ls["ls_delay"]))
+
+    dict_subject_tables = {}
+
+    for test, ls_df in dict_tables.items():
+        df = pd.concat(ls_df, ignore_index=True)
+
+        df.insert(loc=0, column="participant_id", value="sub-" + bids_id)
+        df.insert(loc=3, column="condition",
+                  value=df["session_id"].map(dict_condition))
+        df.insert(loc=4, column="delay",
+                  value=df["session_id"].map(dict_delay))
+
+        dict_subject_tables[test] = df
+
+    return dict_subject_tables
+
+
+def check_export(export, method):
+    """
+    This function verifies that the dataset-level tables can be saved in the
+    selected format before anything is processed.
+    INPUTS:
+    -export: format of the dataset-level tables ("parquet", "feather" or
+             None)
+    -method: method used to activate the exporter (see master_run)
+    OUTPUTS:
+    -NO specific return to the script
+    -the script is stopped (or returns to the main menu) if the pyarrow
+     package is not installed
+    """
+
+    if export is None:
+        return
+
+    try:
+        # Only imported when needed: the tsv files do not use it
+        import pyarrow  # noqa: F401
+
+    except ImportError:
+        print(color.Fore.RED
+              + (f"ERROR: The pyarrow package is required to export the "
+                 f"{export} tables.\n"
+                 "\t   --> Please install it (pip install pyarrow) or run "
+                 "the exporter without the export option.\n"))
+
+        if method == "master_script":
+            raise RuntimeError("Return to the main menu")
+        else:
+            sys.exit(1)
+
+
+def table_path(parent_path, test, export):
+    """
+    This function builds the path of a dataset-level table.
+    INPUTS:
+    -parent_path: path inside the BIDS_data folder
+                  ([repo_root]/results/BIDS_data/)
+    -test: the selected test marker
+    -export: format of the table ("parquet" or "feather")
+    OUTPUTS:
+    -returns the path of the table
+     ([repo_root]/results/BIDS_data/derivatives/tables/task-XX_beh.ext)
+    """
+
+    return os.path.join(parent_path, "derivatives", "tables",
+                        f"task-{test}_beh.{export}")
+
+
+def read_table(path, export):
+    """
+    This function reads a dataset-level table.
+    INPUTS:
+    -path: path of the table (see table_path)
+    -export: format of the table ("parquet" or "feather")
+    OUTPUTS:
+    -returns the table in a pandas dataframe
+    """
+
+    if export == "parquet":
+        return pd.read_parquet(path)
+    else:
+        return pd.read_feather(path)
+
+
+def export_tables(dict_tables, ls_test, parent_path, export):
+    """
+    This function saves one long-format table per test, for the whole
+    dataset, in the derivatives folder.
+    INPUTS:
+    -dict_tables: dictionary {test: [long-format df, ...]} of the subjects'
+                  tables, in the subjects' order
+    -ls_test: list of the tests
+    -parent_path: path inside the BIDS_data folder
+                  ([repo_root]/results/BIDS_data/)
+    -export: format of the tables ("parquet" or "feather")
+    OUTPUTS:
+    -saved [repo_root]/results/BIDS_data/derivatives/tables/ files
+    -NO specific return to the script
+    """
+
+    os.makedirs(os.path.join(parent_path, "derivatives", "tables"),
+                exist_ok=True)
+
+    for test in ls_test:
+        path = table_path(parent_path, test, export)
+        ls_df = dict_tables.get(test, [])
+
+        if len(ls_df) == 0:
+            # No more data for this test: remove the outdated table
+            if os.path.exists(path):
+                os.remove(path)
+            continue
+
+        table = utils.typed_table(pd.concat(ls_df, ignore_index=True),
+                                  ls_text=["participant_id", "session_id",
+                                           "run", "condition"])
+
+        if export == "parquet":
+            table.to_parquet(path, index=False)
+        else:
+            table.to_feather(path)
+
+    print(f"The {export} tables of the dataset have been saved in "
+          f"\"{os.path.dirname(table_path(parent_path, '', export))}\".\n")
+
+
+def sqlite_column_type(sr):
+    """
+    This function selects the SQLite type of a column.
+    INPUTS:
+    -sr: column of a long-format table
+    OUTPUTS:
+    -returns "INTEGER", "REAL" or "TEXT" (an empty string for the columns
+     mixing numbers and text: each value then keeps its own type)
+    """
+
+    if pd.api.types.is_integer_dtype(sr) or pd.api.types.is_bool_dtype(sr):
+        return "INTEGER"
+    elif pd.api.types.is_float_dtype(sr):
+        return "REAL"
+
+    values = sr[sr.notna() & (sr != "n/a")]
+
+    if values.map(lambda value: isinstance(value, str)).all():
+        return "TEXT"
+    else:
+        return ""
+
+
+def sqlite_measurements(df):
+    """
+    This function normalizes a test's long-format table for the SQLite
+    database: the session-level columns are only kept in the sessions table
+    and the tests with one column per frequency (e.g. PTA, Reflex) get one
+    line per frequency (frequency and value columns).
+    INPUTS:
+    -df: test's long-format table (see subject_tables)
+    OUTPUTS:
+    -returns the table to store
+    """
+
+    df = df.drop(columns=["condition", "delay"])
+
+    ls_hz = [column for column in df.columns
+             if re.fullmatch(r"\d+_hz", str(column))]
+
+    if len(ls_hz) > 0:
+        ls_id = [column for column in df.columns if column not in ls_hz]
+        df = df.melt(id_vars=ls_id, value_vars=ls_hz,
+                     var_name="frequency", value_name="value")
+        df["frequency"] = df["frequency"].str[:-len("_hz")].astype(int)
+
+    return df
+
+
+def sqlite_table(con, table, df):
+    """
+    This function adds lines to a table of the SQLite database (the table is
+    created, or created again if its columns changed).
+    INPUTS:
+    -con: connection to the SQLite database (inside a transaction)
+    -table: name of the table
+    -df: lines to add
+    OUTPUTS:
+    -NO specific return to the script
+    """
+
+    ls_column = [str(column) for column in df.columns]
+
+    ls_existing = [line[1] for line in
+                   con.execute(f'PRAGMA table_info("{table}")')]
+
+    if len(ls_existing) > 0 and ls_existing != ls_column:
+        con.execute(f'DROP TABLE "{table}"')
+        ls_existing = []
+
+    if len(ls_existing) == 0:
+        definition = ", ".join(
+            f'"{column}" {sqlite_column_type(df[column])}'.rstrip()
+            for column in df.columns
+        )
+        con.execute(f'CREATE TABLE "{table}" ({definition})')
+
+    # Python values, with NULL for the missing ("n/a") values
+    values = df.astype(object).where(df.notna(), None)
+    values = values.mask(values == "n/a", None)
+
+    columns = ", ".join(f'"{column}"' for column in ls_column)
+    marks = ", ".join(["?"] * len(ls_column))
+
+    con.executemany(f'INSERT INTO "{table}" ({columns}) VALUES ({marks})',
+                    values.itertuples(index=False, name=None))
+
+
+def store_sqlite(db_path, ls_id_og, ls_id_bids, ls_skipped,
+                 dict_subject_tables, ls_test):
+    """
+    This function saves the measurements in a SQLite database with a
+    subjects table, a sessions table (sessions.tsv files' content) and a
+    task_XX table per test. Everything is written in a single transaction:
+    the lines of the BIDSified (and removed) subjects are replaced and the
+    ones of the skipped subjects (incremental mode) are kept.
+    INPUTS:
+    -db_path: path of the SQLite database
+    -ls_id_og: list of the original subject IDs
     -ls_id_bids: list of the bidsified subject IDs
+    -ls_skipped: list of the bidsified IDs of the skipped subjects
+    -dict_subject_tables: dictionary {bidsified ID: tables} of the
+                          BIDSified subjects (see subject_bidsifier)
+    -ls_test: list of the tests
+    OUTPUTS:
+    -saved SQLite database
+    -NO specific return to the script
+    """
+
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+    con = sqlite3.connect(db_path)
+
+    try:
+        with con:
+            con.execute("CREATE TABLE IF NOT EXISTS subjects "
+                        "(participant_id TEXT PRIMARY KEY, og_id TEXT)")
+            con.execute("DELETE FROM subjects")
+            con.executemany("INSERT INTO subjects VALUES (?, ?)",
+                            [("sub-" + bids_id, og_id) for og_id, bids_id
+                             in zip(ls_id_og, ls_id_bids)])
+
+            con.execute("CREATE TEMP TABLE kept "
+                        "(participant_id TEXT PRIMARY KEY)")
+            con.executemany("INSERT INTO kept VALUES (?)",
+                            [("sub-" + bids_id,) for bids_id in ls_skipped])
+
+            for name in ["sessions"] + ls_test:
+                if name == "sessions":
+                    table = "sessions"
+                else:
+                    table = f"task_{name}"
+
+                ls_df = [dict_tables[name]
+                         for bids_id, dict_tables
+                         in dict_subject_tables.items()
+                         if bids_id not in ls_skipped
+                         and name in dict_tables]
+
+                exists = con.execute(
+                    "SELECT 1 FROM sqlite_master "
+                    "WHERE type = 'table' AND name = ?", (table,)
+                ).fetchone() is not None
+
+                # Lines of the subjects that are not skipped
+                if exists:
+                    con.execute(f'DELETE FROM "{table}" WHERE participant_id '
+                                "NOT IN (SELECT participant_id FROM kept)")
+
+                if len(ls_df) == 0:
+                    continue
+
+                df = pd.concat(ls_df, ignore_index=True)
+
+                if table != "sessions":
+                    df = sqlite_measurements(df)
+
+                sqlite_table(con, table, df)
+
+                # Indexes: subject and session, condition and delay of the
+                # sessions, ear and frequency of the measurements
+                ls_index = [["participant_id", "session_id"]]
+
+                for column in ["condition", "delay", "side",
+                               "frequency", "freq", "freq2"]:
+                    if column in df.columns:
+                        ls_index.append([column])
+
+                for ls_column in ls_index:
+                    index_name = f"ix_{table}_{'_'.join(ls_column)}"
+                    columns = ", ".join(f'"{c}"' for c in ls_column)
+                    con.execute(f'CREATE INDEX IF NOT EXISTS "{index_name}" '
+                                f'ON "{table}" ({columns})')
+
+            con.execute("DROP TABLE kept")
+
+    finally:
+        con.close()
+
+    print(f"The measurements have been saved in the SQLite database "
+          f"\"{db_path}\".\n")
+
+
+def subject_bidsifier(i, bids_id, data_sub, data_oae_sub, date_bsl,
+                      oae_index, column_titles, var_json, parent_path,
+                      auditory_test_path, skip_oae, export=None,
+                      sqlite=False, split_flags=False):
+    """
+    This function BIDSifies the data for a specified subject
+    INPUTS:
+    -i: currently processed subject's ID as defined in the variables.json
+        file or in the database
+    -bids_id: bidsified version of the subject's ID (already verified for
+              conflicts by the bidsify function)
+    -data_sub: database lines of the subject (see subject_partition)
+    -data_oae_sub: OAE test files' names breakdown lines of the subject (see
+                   subject_partition)
+    -date_bsl: date of the subject's first baseline (see baseline_dates)
+    -oae_index: index of the subject's OAE test files (the part of the
+                index whose participant is the subject)
+    -column_titles: dictionary containing the database's column titles relevant
+                    for each of the auditory test types
+    -var_json: frequent-variables dictionary
     -parent_path: path inside the BIDS_data folder
                   ([repo_root]/results/BIDS_data/)
     -auditory_test_path:
     -skip_oae: boolean specifiying if the OAE data should be processed
                depending on the type of experimental condition
+    -export: format of the dataset-level tables ("parquet" or "feather",
+             Default = None: no dataset-level export)
+    -sqlite: boolean specifying if the measurements are also stored in the
+             SQLite database (Default = False)
+    -split_flags: boolean specifying if the " *" flags of the DPOAE values
+                  are written in boolean [column]_flag columns
+                  (Default = False: the flagged values are kept as text)
     OUTPUTS:
-    -NO specific return to the script
+    -returns the subject's long-format tables (see subject_tables) and
+     sessions.tsv content (key "sessions") if export or sqlite is specified
+     (None otherwise)
     -prints a message when the subject's data is processed
     """
 
@@ -487,34 +1217,23 @@ def subject_bidsifier(i, df, oae_tests_df, oae_file_list, column_titles,
     x_dpoae = var_json["bids"]["tsv_columns"]["dpoae"]
     x_growth = var_json["bids"]["tsv_columns"]["growth"]
 
-    # Update the list of original (non-BIDSified) IDs
-    ls_id_og.append(i)
+    # DPOAE columns whose " *" flags are split from the values
+    if split_flags:
+        ls_flag = var_json["bids"]["flag_columns"]["dpoae"]
+    else:
+        ls_flag = None
 
-    # Check if the subject ID is BIDS compatible
-    # If not, it modifies it to comply with BIDS standards
-    bids_id = common.bidsify_ID(i)
+    # List every session and plan the outputs before writing anything
+    data_sub = prepare_sessions(data_sub, var_json)
 
-    # Check if the new bidsified ID creates a conflict with another
-    # a previous bidsified ID
-    ls_id_bids = bids_id_verifier(bids_id, ls_id_og, ls_id_bids)
+    plan = plan_subject(i, bids_id, data_sub, oae_index, column_titles,
+                        parent_path, skip_oae)
+    ls_plan = plan.to_dict("records")
 
     # Check if the subject-level folders exist
     # If not, create them
     common.create_folder_subjects(bids_id, parent_path)
 
-    # Extraction of all the session for the subject
-    data_sub = subject_extractor(df, i)
-
-    if skip_oae:
-        pass
-    else:
-        data_oae_sub = subject_extractor(oae_tests_df, i)
-
-    data_sub.insert(loc=3, column="Session_ID", value=None)
-
-    # Add a session line for the post-scan OAE condition
-    data_sub = add_postscan_oae(data_sub, var_json)
-
     # Creation of a folder for each session
     ls_ses, subject_folder_path = create_folder_session(bids_id,
                                                         len(data_sub),
@@ -537,55 +1256,60 @@ def subject_bidsifier(i, df, oae_tests_df, oae_file_list, column_titles,
     mtx = utils.eliminate_columns(data_sub,
                                   columns_conditions,
                                   column_titles["columns_MTX"])
-    oae = data_sub[columns_conditions]
 
-    # Replace PTA values "130" with "No response"
-    pta = replace_130(pta, column_titles)
-
-    # Dataframe reconstruction
-    utils.extract_tymp(
-        tymp, column_titles["columns_tymp_R"],
-        column_titles["columns_tymp_L"], x_tymp,
-        subject_folder_path, bids_id
-    )
-    utils.extract_reflex(
-        reflex, column_titles["columns_reflex_R"],
-        column_titles["columns_reflex_L"], x_reflex,
-        subject_folder_path, bids_id
-    )
-    utils.extract_pta(
-        pta, column_titles["columns_PTA_R"],
-        column_titles["columns_PTA_L"], x_PTA,
-        subject_folder_path, bids_id
-    )
-    utils.extract_mtx(
-        mtx, column_titles["columns_MTX_L1"],
-        column_titles["columns_MTX_L2"], x_MTX,
-        subject_folder_path, bids_id
-    )
-
-    if skip_oae:
-        pass
-    else:
-        utils.extract_teoae(
-            oae, data_oae_sub, oae_file_list, x_teoae,
-            auditory_test_path,
-            subject_folder_path,
-            bids_id
+    # Dataframe reconstruction: every extractor executes the planned outputs
+    # -> the saved tests are recorded in the manifest for each session
+    manifest = {}
+
+    # Long-format copies of the saved dataframes (dataset-level export)
+    with utils.collect_tables(
+        enabled=export is not None or sqlite
+    ) as dict_tables:
+        utils.extract_tymp(
+            tymp, ls_plan, column_titles["columns_tymp_R"],
+            column_titles["columns_tymp_L"], x_tymp,
+            subject_folder_path, bids_id, manifest=manifest
+        )
+        utils.extract_reflex(
+            reflex, ls_plan, column_titles["columns_reflex_R"],
+            column_titles["columns_reflex_L"], x_reflex,
+            subject_folder_path, bids_id, manifest=manifest
         )
-        utils.extract_dpoae(
-            oae, data_oae_sub, oae_file_list, x_dpoae,
-            auditory_test_path,
-            subject_folder_path,
-            bids_id
+        utils.extract_pta(
+            pta, ls_plan, column_titles["columns_PTA_R"],
+            column_titles["columns_PTA_L"], x_PTA,
+            subject_folder_path, bids_id, manifest=manifest
         )
-        utils.extract_growth(
-            oae, data_oae_sub, oae_file_list, x_growth,
-            auditory_test_path,
-            subject_folder_path,
-            bids_id
+        utils.extract_mtx(
+            mtx, ls_plan, column_titles["columns_MTX_L1"],
+            column_titles["columns_MTX_L2"], x_MTX,
+            subject_folder_path, bids_id, manifest=manifest
         )
 
+        if skip_oae is False:
+            utils.extract_teoae(
+                data_sub, ls_plan, x_teoae,
+                auditory_test_path,
+                subject_folder_path,
+                bids_id,
+                manifest=manifest
+            )
+            utils.extract_dpoae(
+                data_sub, ls_plan, x_dpoae,
+                auditory_test_path,
+                subject_folder_path,
+                bids_id,
+                manifest=manifest,
+                ls_flag=ls_flag
+            )
+            utils.extract_growth(
+                data_sub, ls_plan, x_growth,
+                auditory_test_path,
+                subject_folder_path,
+                bids_id,
+                manifest=manifest
+            )
+
     # .tsv session-level reference file creation
     column_reference = ["session_id", "session_name",
                         "condition", "delay", "scan_type"]
@@ -598,20 +1322,14 @@ def subject_bidsifier(i, df, oae_tests_df, oae_file_list, column_titles,
     for x in range(0, len(ls_ses)):
         index_reference.append(x)
 
-    ls_name = []
-    ls_condition = []
-    ls_delay = []
-    ls_scan = []
-
-    for y in range(0, len(data_sub)):
-
-        # Calculation of the number of days since Baseline #1
-        value_delay = delay_baseline(y, data_sub)
+    # The missing session descriptors are written as "n/a"
+    ls_name = data_sub["Protocol name"].astype(object).fillna("n/a").tolist()
+    ls_condition = (data_sub["Protocol condition"].astype(object)
+                    .fillna("n/a").tolist())
+    ls_scan = data_sub["Scan type"].astype(object).fillna("n/a").tolist()
 
-        ls_name.append(data_sub.at[y, "Protocol name"])
-        ls_condition.append(data_sub.at[y, "Protocol condition"])
-        ls_delay.append(value_delay.days)
-        ls_scan.append(data_sub.at[y, "Scan type"])
+    # Calculation of the number of days since Baseline #1
+    ls_delay = delay_baseline(data_sub, date_bsl)
 
     dict_of_ls = {
         "ls_ses": ls_ses,
@@ -623,33 +1341,190 @@ def subject_bidsifier(i, df, oae_tests_df, oae_file_list, column_titles,
 
     # sessions.tsv file construction
     ref = ref_df_generator(index_reference, column_reference,
-                           dict_of_ls, subject_folder_path)
+                           dict_of_ls, subject_folder_path, manifest)
 
     ref_name = i + "_sessions"
     ref_save_path = os.path.join(subject_folder_path, ref_name + ".tsv")
-    ref.to_csv(ref_save_path, sep="\t")
+    utils.write_tsv(ref, ref_save_path)
 
     print(
         f"The tsv and json files for sub-{bids_id} ({i}) have been "
         "created.\n"
     )
 
+    if export is None and sqlite is False:
+        return None
+    else:
+        dict_subject_tables = subject_tables(dict_tables, bids_id,
+                                             dict_of_ls)
+
+        sessions = ref.reset_index()
+        sessions.insert(loc=0, column="participant_id",
+                        value="sub-" + bids_id)
+        dict_subject_tables["sessions"] = sessions
 
-def bidsify(df, oae_file_list, oae_tests_df, var_json,
-            result_path, auditory_test_path, skip_oae):
+        return dict_subject_tables
+
+
+def subject_fingerprint(bids_id, data_sub, ls_oae_path, var_json,
+                        export=None, sqlite=False, split_flags=False):
+    """
+    This function computes a fingerprint of everything that is used to
+    generate a subject's BIDS files.
+    INPUTS:
+    -bids_id: bidsified version of the subject's ID
+    -data_sub: database lines of the subject (see subject_partition)
+    -ls_oae_path: list of the paths to the subject's OAE test data files
+    -var_json: frequent-variables dictionary
+    -export: format of the dataset-level tables (Default = None)
+    -sqlite: boolean specifying if the measurements are stored in the
+             SQLite database (Default = False)
+    -split_flags: boolean specifying if the DPOAE flags are split from the
+                  values (Default = False)
+    OUTPUTS:
+    -returns a hash (string) of the subject's database lines, of the names,
+     sizes and modification times of their OAE test data files, of the
+     variables.json section used to generate the BIDS files and of the
+     output options (dataset-level tables, SQLite database and DPOAE
+     flags)
+    """
+
+    hasher = hashlib.sha256()
+
+    hasher.update(bids_id.encode())
+    hasher.update(data_sub.to_csv(index=False).encode())
+
+    for path in ls_oae_path:
+        stat = os.stat(path)
+        hasher.update((f"{os.path.basename(path)}\t{stat.st_size}\t"
+                       f"{stat.st_mtime_ns}\n").encode())
+
+    hasher.update(json.dumps(var_json["bids"], sort_keys=True).encode())
+    hasher.update(f"{export}\t{sqlite}\t{split_flags}".encode())
+
+    return hasher.hexdigest()
+
+
+def load_fingerprints(result_path):
+    """
+    This function loads the subjects' fingerprints saved by the previous run.
+    INPUTS:
+    -result_path: path inside the result folder ([repo_root]/results/)
+    OUTPUTS:
+    -returns a dictionary {original subject ID: fingerprint} (empty if no
+     previous run saved its fingerprints)
+    """
+
+    path = os.path.join(result_path, "BIDS_fingerprints.json")
+
+    if os.path.exists(path):
+        with open(path, "r") as origin:
+            dict_fingerprint = json.load(origin)
+        origin.close()
+    else:
+        dict_fingerprint = {}
+
+    return dict_fingerprint
+
+
+def save_fingerprints(result_path, dict_fingerprint):
+    """
+    This function saves the subjects' fingerprints for the next run.
+    INPUTS:
+    -result_path: path inside the result folder ([repo_root]/results/)
+    -dict_fingerprint: dictionary {original subject ID: fingerprint}
+    OUTPUTS:
+    -saved [repo_root]/results/BIDS_fingerprints.json file
+    -NO specific return to the script
+    """
+
+    path = os.path.join(result_path, "BIDS_fingerprints.json")
+
+    with open(path, "w") as destination:
+        json.dump(dict_fingerprint, destination, indent=2)
+    destination.close()
+
+
+def init_worker(kwargs):
+    """
+    This function receives, once per worker process, the subject_bidsifier
+    arguments shared by all the subjects.
+    INPUTS:
+    -kwargs: the shared subject_bidsifier arguments (see bidsify)
+    OUTPUTS:
+    -NO specific return to the script
+    """
+
+    global worker_kwargs
+
+    worker_kwargs = kwargs
+
+
+def subject_worker(subject_args):
+    """
+    This function runs the subject_bidsifier function inside a worker process
+    and captures everything it prints so that the parent process can show
+    the console feedback in the subjects' order.
+    INPUTS:
+    -subject_args: tuple containing the original and the bidsified subject's
+                   IDs, the subject's data_sub and data_oae_sub dataframes,
+                   first baseline date and part of the OAE test files' index
+                   (the other arguments are set by init_worker)
+    OUTPUTS:
+    -returns the console feedback generated for the subject and the
+     subject's long-format tables (None if they are not exported)
+    """
+
+    buffer = io.StringIO()
+
+    # Keep colorama's autoreset behaviour on the captured lines
+    stream = color.AnsiToWin32(buffer, convert=False,
+                               strip=False, autoreset=True).stream
+
+    with redirect_stdout(stream), utils.buffered_writes():
+        dict_subject_tables = subject_bidsifier(*subject_args,
+                                                **worker_kwargs)
+
+    return buffer.getvalue(), dict_subject_tables
+
+
+def bidsify(df, oae_index, oae_tests_df, var_json,
+            result_path, auditory_test_path, skip_oae, jobs=1,
+            incremental=False, link_json=False, dry_run=False,
+            export=None, sqlite=False, split_flags=False):
     """
     This function creates a BIDS compatible dataset
     INPUTS:
     -df: database in a pandas dataframe format
-    -oae_file_list:
+    -oae_index: index of the available OAE test files
     -oae_tests_df: dataframe with the OAE test files' names
     -var_json: frequent-variables dictionary
     -result_path: path inside the result folder ([repo_root]/results/)
     -auditory_test_path:
     -skip_oae: boolean specifiying if the OAE data should be processed
                depending on the type of experimental condition
+    -jobs: number of worker processes used to BIDSify the subjects
+           (Default = 1: the subjects are processed one after the other)
+    -incremental: boolean specifying if the subjects whose database lines,
+                  OAE test data files and variables.json settings did not
+                  change since the last run should be skipped
+                  (Default = False)
+    -link_json: boolean specifying if the json sidecars should be linked
+                instead of copied in the BIDS_data folder (Default = False)
+    -dry_run: boolean specifying if the outputs should only be planned and
+              reported, without writing anything (Default = False)
+    -export: format of the dataset-level long-format tables, one per test
+             ("parquet" or "feather", Default = None: no dataset-level
+             export)
+    -sqlite: boolean specifying if the measurements should also be stored
+             in a SQLite database (BIDS_data/derivatives/
+             BIDS_measurements.sqlite, Default = False)
+    -split_flags: boolean specifying if the " *" flags of the DPOAE values
+                  should be written in boolean [column]_flag columns
+                  (Default = False)
     OUTPUTS:
-    -NO specific return to the script
+    -returns the output plan of the subjects (see plan_subject) if dry_run
+     is True (None otherwise)
     """
 
     # Create a list of the subjects
@@ -657,8 +1532,12 @@ def bidsify(df, oae_file_list, oae_tests_df, var_json,
 
     # Create two lists of subject IDs to establish a concordence file between
     # the original IDs and the bidsified IDs
-    ls_id_og = []
-    ls_id_bids = []
+    # -> all the IDs are adapted to BIDS standards at once
+    ls_id_og = subjects
+    ls_id_bids = common.bidsify_IDs(pd.Series(subjects)).tolist()
+
+    # Check if the bidsified IDs create conflicts before writing anything
+    bids_id_verifier(ls_id_og, ls_id_bids)
 
     # Verifications:
     # - existence of the "results" folder
@@ -666,23 +1545,160 @@ def bidsify(df, oae_file_list, oae_tests_df, var_json,
     # - existence of the json sidecar originals
     #   (tymp, reflex, PTA, MTX, OAE, sessions)
     # If not, creates them.
-    utils.result_location(result_path)
+    if dry_run is False:
+        utils.result_location(result_path, var_json,
+                              split_flags=split_flags)
 
     parent_path = os.path.join(result_path, "BIDS_data")
 
     # Add the .json sidecar files in the BIDS_data folder
-    json_origin = os.path.join(result_path, "BIDS_sidecars_originals")
-    copy_json(parent_path, json_origin)
+    if dry_run is False:
+        json_origin = os.path.join(result_path, "BIDS_sidecars_originals")
+        copy_json(parent_path, json_origin, var_json["bids"]["ls_test"],
+                  link=link_json)
 
     # Initialize empty lists to be filled with the proper column titles
     # for each test
     column_titles = initialize_column_titles(df)
 
+    # Replace the PTA No Response values (e.g. "130" with "No response")
+    df = replace_no_response(df, column_titles, var_json)
+
+    # Split the database and the OAE test files' breakdown by subject
+    dict_data_sub = subject_partition(df)
+
+    # Date of the first baseline of each subject
+    sr_date_bsl = baseline_dates(df)
+
+    if skip_oae:
+        dict_data_oae_sub = {}
+    else:
+        dict_data_oae_sub = subject_partition(oae_tests_df)
+
+    # Split the OAE test files' index by subject: each subject only
+    # receives its own files
+    dict_oae_index = {}
+    dict_oae_path = {}
+
+    if skip_oae is False:
+        oae_folder_path = os.path.join(auditory_test_path, "OAE")
+
+        for key in sorted(oae_index):
+            dict_oae_index.setdefault(key[0], {})[key] = oae_index[key]
+            dict_oae_path.setdefault(key[0], []).append(
+                os.path.join(oae_folder_path, oae_index[key]))
+
+    # Fingerprints of the previous run (incremental mode)
+    dict_fingerprint_old = load_fingerprints(result_path)
+    dict_fingerprint = {}
+
+    # The skipped subjects' lines of the dataset-level tables are taken
+    # from the previous export (and kept in the SQLite database)
+    db_path = os.path.join(parent_path, "derivatives",
+                           "BIDS_measurements.sqlite")
+
+    tables_exist = ((export is None
+                     or os.path.isdir(os.path.join(parent_path,
+                                                   "derivatives", "tables")))
+                    and (sqlite is False or os.path.exists(db_path)))
+
+    ls_skipped = []
+    ls_subject_args = []
+
+    for i, bids_id in zip(ls_id_og, ls_id_bids):
+        dict_fingerprint[i] = subject_fingerprint(bids_id,
+                                                  dict_data_sub[i],
+                                                  dict_oae_path.get(i, []),
+                                                  var_json,
+                                                  export=export,
+                                                  sqlite=sqlite,
+                                                  split_flags=split_flags)
+
+        if (incremental
+                and tables_exist
+                and dict_fingerprint_old.get(i) == dict_fingerprint[i]
+                and os.path.isdir(os.path.join(parent_path,
+                                               f"sub-{bids_id}"))):
+            print(f"The tsv and json files for sub-{bids_id} ({i}) are up "
+                  "to date: this subject was skipped.\n")
+            ls_skipped.append(bids_id)
+            continue
+
+        if skip_oae:
+            data_oae_sub = None
+        elif i in dict_data_oae_sub:
+            data_oae_sub = dict_data_oae_sub[i]
+        else:
+            data_oae_sub = oae_tests_df.iloc[0:0]
+
+        ls_subject_args.append((i, bids_id, dict_data_sub[i], data_oae_sub,
+                                sr_date_bsl.get(i, pd.NaT),
+                                dict_oae_index.get(i, {})))
+
+    # Plan the outputs of each subject and report them without writing
+    # anything
+    if dry_run:
+        ls_plan = []
+        session_count = 0
+
+        for i, bids_id, data_sub, _, _, oae_index_sub in ls_subject_args:
+            data_sub = prepare_sessions(data_sub, var_json)
+            session_count += len(data_sub)
+
+            ls_plan.append(plan_subject(i, bids_id, data_sub, oae_index_sub,
+                                        column_titles, parent_path,
+                                        skip_oae))
+
+        if len(ls_plan) == 0:
+            plan = pd.DataFrame(columns=plan_columns)
+        else:
+            plan = pd.concat(ls_plan, ignore_index=True)
+
+        report_plan(plan, session_count, var_json, auditory_test_path)
+
+        return plan
+
+    # Arguments shared by all the subjects
+    subject_kwargs = {
+        "column_titles": column_titles,
+        "var_json": var_json,
+        "parent_path": parent_path,
+        "auditory_test_path": auditory_test_path,
+        "skip_oae": skip_oae,
+        "export": export,
+        "sqlite": sqlite,
+        "split_flags": split_flags
+    }
+
+    # Long-format tables of each subject (dataset-level export)
+    dict_subject_tables = {}
+
     # BIDSifiy each of the subjects' data
-    for i in subjects:
-        subject_bidsifier(i, df, oae_tests_df, oae_file_list, column_titles,
-                          var_json, ls_id_og, ls_id_bids, parent_path,
-                          auditory_test_path, skip_oae)
+    if jobs > 1:
+        # Each subject only writes inside its own sub-XX/ folder: they are
+        # dispatched to a pool of processes and the console feedback is
+        # printed back in the subjects' order. The shared arguments are sent
+        # once to each process, the subjects' tasks only carry their own
+        # data.
+        with ProcessPoolExecutor(max_workers=jobs,
+                                 initializer=init_worker,
+                                 initargs=(subject_kwargs,)) as executor:
+            ls_feedback = executor.map(subject_worker, ls_subject_args)
+
+            for subject_args, (feedback, dict_tables) in zip(
+                ls_subject_args, ls_feedback
+            ):
+                print(feedback, end="")
+                dict_subject_tables[subject_args[1]] = dict_tables
+
+    else:
+        # The tsv files are written in the background and all of them are
+        # on disk when the with block exits
+        with utils.buffered_writes():
+            for subject_args in ls_subject_args:
+                dict_subject_tables[subject_args[1]] = subject_bidsifier(
+                    *subject_args, **subject_kwargs
+                )
 
     # .tsv Original IDs - BIDSified IDs equivalence file generation
     dict_id_match = {"og_ID": ls_id_og, "BIDS_ID": ls_id_bids}
@@ -694,6 +1710,39 @@ def bidsify(df, oae_file_list, oae_tests_df, var_json,
 
     df_id_match.to_csv(id_match_save_path, sep="\t",)
 
+    # Dataset-level long-format tables (one per test)
+    if export is not None:
+        for test in var_json["bids"]["ls_test"]:
+            path = table_path(parent_path, test, export)
+
+            if len(ls_skipped) == 0 or os.path.exists(path) is False:
+                continue
+
+            table = read_table(path, export)
+
+            for bids_id, df in table.groupby("participant_id", sort=False):
+                if bids_id[len("sub-"):] in ls_skipped:
+                    dict_subject_tables.setdefault(
+                        bids_id[len("sub-"):], {}
+                    )[test] = df
+
+        dict_tables = {}
+
+        for bids_id in ls_id_bids:
+            for test, df in dict_subject_tables.get(bids_id, {}).items():
+                dict_tables.setdefault(test, []).append(df)
+
+        export_tables(dict_tables, var_json["bids"]["ls_test"],
+                      parent_path, export)
+
+    # Measurements database (batched in a single transaction)
+    if sqlite:
+        store_sqlite(db_path, ls_id_og, ls_id_bids, ls_skipped,
+                     dict_subject_tables, var_json["bids"]["ls_test"])
+
+    # Fingerprints for the next incremental run
+    save_fingerprints(result_path, dict_fingerprint)
+
     # The following lines of code are present if, for any reason, the
     # .tsv files are not properly saved. You will first need to activate
     # the "import glob" line (line 3). It is then possible to replace the
@@ -708,7 +1757,11 @@ def bidsify(df, oae_file_list, oae_tests_df, var_json,
     #     os.system(f"mv {path} {new_path}")
 
 
-def master_run(data_path, result_path, var_json, method="standalone"):
+def master_run(data_path, result_path, var_json, method="standalone",
+               jobs=1, incremental=False, db_ttl=0, offline=False,
+               source=None, location=None, link_json=False,
+               dry_run=False, export=None, sqlite=False,
+               split_flags=False):
     """
     This is the master function that activates the others.
     INPUTS:
@@ -723,25 +1776,61 @@ def master_run(data_path, result_path, var_json, method="standalone"):
                                    activated as a standalone script and is
                                    using this fonction.
                                        -> DEFAULT VALUE
+    -jobs: number of worker processes used to BIDSify the subjects
+           (Default = 1)
+    -incremental: boolean specifying if the unchanged subjects should be
+                  skipped (Default = False)
+    -db_ttl: time-to-live, in seconds, of the local snapshot of a database
+             downloaded from a URL (Default = 0: always download)
+    -offline: boolean forcing the use of the last local snapshot of a
+              database downloaded from a URL (Default = False)
+    -source: type of source of the database ("url", "urltsv", "xlsx" or
+             "csv"). When it is specified, the database is retrieved without
+             prompting the user (Default = None)
+    -location: URL or path of the database (Default = None: the URL.tsv or
+               test_database.xlsx file of the data folder)
+    -link_json: boolean specifying if the json sidecars should be linked
+                (reflink or hardlink) instead of copied (Default = False)
+    -dry_run: boolean specifying if the outputs should only be planned and
+              reported, without writing anything (Default = False)
+    -export: format of the dataset-level long-format tables ("parquet" or
+             "feather", Default = None: only the tsv files are written)
+    -sqlite: boolean specifying if the measurements should also be stored
+             in a SQLite database (Default = False)
+    -split_flags: boolean specifying if the " *" flags of the DPOAE values
+                  should be written in boolean [column]_flag columns, so
+                  that the values stay numerical (Default = False)
     OUTPUTS:
-    -NO specific return to the script (highest function level)
+    -returns the output plan (see plan_subject) if dry_run is True
+     (highest function level: None otherwise)
+    -saved [repo_root]/results/BIDS_normalization_QC.tsv file (values of the
+     database that could not be read, see normalize_db)
     -prints some feedback to the user in the terminal
     """
 
+    # The export format is verified before the long processing steps
+    if dry_run is False:
+        check_export(export, method)
+
     # retrieve a database
-    df = fetch_db(data_path, method)
+    df = fetch_db(data_path, method, var_json, db_ttl=db_ttl,
+                  offline=offline, source=source, location=location)
+
+    # Numeric values of the spreadsheet-based tests
+    df, qc_report = normalize_db(df, var_json)
+
     auditory_test_path = os.path.join(data_path, "auditory_tests")
 
     try:
         (oae_folder_path,
-         oae_file_list,
+         oae_index,
          oae_tests_df) = fetch_oae_data(auditory_test_path)
 
     except RuntimeError as error:
         if error.args[0] == "The OAE data folder is missing.":
             oae_folder_path = os.path.join(auditory_test_path, "OAE")
             skip_oae = True
-            oae_file_list = None
+            oae_index = None
             oae_tests_df = None
             print(color.Fore.YELLOW
                   + (f"WARNING: The following path does not exist "
@@ -753,11 +1842,66 @@ def master_run(data_path, result_path, var_json, method="standalone"):
     else:
         skip_oae = False
 
-    bidsify(df, oae_file_list, oae_tests_df, var_json,
-            result_path, auditory_test_path, skip_oae)
+    plan = bidsify(df, oae_index, oae_tests_df, var_json,
+                   result_path, auditory_test_path, skip_oae, jobs=jobs,
+                   incremental=incremental, link_json=link_json,
+                   dry_run=dry_run, export=export, sqlite=sqlite,
+                   split_flags=split_flags)
+
+    if dry_run is False:
+        save_qc_report(result_path, qc_report)
+
+    return plan
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="BIDS format's auditory data exporter"
+    )
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="number of worker processes used to BIDSify "
+                             "the subjects (default: 1)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip the subjects whose inputs did not change "
+                             "since the last run")
+    parser.add_argument("--db-ttl", type=int, default=0,
+                        help="reuse the local snapshot of a database "
+                             "downloaded from a URL if it is more recent "
+                             "than this number of seconds (default: 0)")
+    parser.add_argument("--offline", action="store_true",
+                        help="use the last local snapshot of a database "
+                             "downloaded from a URL")
+    parser.add_argument("--link-json", action="store_true",
+                        help="link the json sidecars (reflink or hardlink) "
+                             "instead of copying them (the linked "
+                             "files must not be edited in place)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="only report the files that would be written "
+                             "and read, and the missing OAE test data "
+                             "files, without writing anything")
+    parser.add_argument("--export", choices=["parquet", "feather"],
+                        help="also save one long-format table per test for "
+                             "the whole dataset in the BIDS_data/derivatives "
+                             "folder (requires pyarrow)")
+    parser.add_argument("--sqlite", action="store_true",
+                        help="also store the measurements in a SQLite "
+                             "database in the BIDS_data/derivatives folder")
+    parser.add_argument("--split-flags", action="store_true",
+                        help="write the \" *\" flags of the DPOAE values in "
+                             "boolean [column]_flag columns")
+    parser.add_argument("--source",
+                        choices=["url", "urltsv", "xlsx", "csv"],
+                        help="retrieve the database from this type of "
+                             "source without prompting")
+    parser.add_argument("location", nargs="?",
+                        help="URL or path of the database (default for the "
+                             "urltsv and xlsx sources: the file in the data "
+                             "folder)")
+    args = parser.parse_args()
+
+    # Initialize colorama
+    color.init(autoreset=True)
+
     root_path = ".."
 
     with open(os.path.join(root_path, "variables.json"), "r") as origin:
@@ -768,7 +1912,13 @@ if __name__ == "__main__":
     data_path = os.path.join(root_path, var_json["path"]["data"])
     result_path = os.path.join(root_path, var_json["path"]["result"])
 
-    master_run(data_path, result_path, var_json, "standalone")
+    master_run(data_path, result_path, var_json, "standalone",
+               jobs=args.jobs, incremental=args.incremental,
+               db_ttl=args.db_ttl, offline=args.offline,
+               source=args.source, location=args.location,
+               link_json=args.link_json, dry_run=args.dry_run,
+               export=args.export, sqlite=args.sqlite,
+               split_flags=args.split_flags)
     print("\n")
 
 
@@ -0,0 +1,375 @@
+import os
+import re
+import json
+import pandas as pd
+import colorama as color
+
+from functools import lru_cache
+
+"""
+SCRIPT DESCRIPTION:
+
+This script contains a reader of the BIDS compatible dataset generated by the
+BIDS_formater.py script ([repo_root]/results/BIDS_data/).
+
+The tsv files of the dataset are indexed once, using the
+sub-XX_ses-YY_task-ZZ_run-RR_beh.tsv names written by BIDS_utils.save_df and
+the sessions.tsv file of each subject (condition and delay of the sessions).
+The index is saved in the derivatives folder and only the subjects whose
+folders changed are scanned again by the next readers.
+
+A test's data is then selected with a lazy TaskFrame: the filters on the
+subjects, sessions, conditions and delays only use the index and the tsv
+files are read (and kept in a cache) when the data is loaded.
+
+Example (from a notebook started in the repository's root folder):
+    from src.BIDS_reader import BIDSReader
+
+    reader = BIDSReader("results/BIDS_data")
+    df = reader.task("PTA").filter(conditions=["Baseline"]).load()
+
+It is not designed to be used as a standalone script.
+"""
+
+# Name of the tsv files written by BIDS_utils.save_df
+tsv_name = re.compile(r"^sub-(?P<participant_id>[^_]+)"
+                      r"_ses-(?P<session_id>[^_]+)"
+                      r"_task-(?P<task>[^_]+)"
+                      r"_run-(?P<run>[^_]+)_beh\.tsv$")
+
+# Columns of the index (one line per tsv file)
+index_columns = ["participant_id", "session_id", "task", "run",
+                 "condition", "delay", "path"]
+
+
+def read_tsv(path, mtime_ns):
+    """
+    This function reads a tsv file of the dataset.
+    INPUTS:
+    -path: path of the tsv file
+    -mtime_ns: modification time of the file. It is only used to identify
+               the version of the file in the cache (see BIDSReader)
+    OUTPUTS:
+    -returns the content of the file in a pandas dataframe
+    """
+
+    return pd.read_csv(path, sep="\t", na_values=["n/a"],
+                       keep_default_na=False)
+
+
+def subject_signature(subject_path):
+    """
+    This function lists the modification times that reveal a change in a
+    subject's folder: the subject's folder, its session folders and its
+    sessions.tsv file.
+    INPUTS:
+    -subject_path: path of the subject's folder
+                   ([repo_root]/results/BIDS_data/sub-XX/)
+    OUTPUTS:
+    -returns a dictionary {name: modification time (ns)}
+    """
+
+    dict_signature = {".": os.stat(subject_path).st_mtime_ns}
+
+    with os.scandir(subject_path) as entries:
+        for entry in entries:
+            if ((entry.is_dir() and entry.name.startswith("ses-"))
+                    or entry.name.endswith("_sessions.tsv")):
+                dict_signature[entry.name] = entry.stat().st_mtime_ns
+
+    return dict_signature
+
+
+def scan_subject(subject_path):
+    """
+    This function indexes the tsv files of a subject.
+    INPUTS:
+    -subject_path: path of the subject's folder
+                   ([repo_root]/results/BIDS_data/sub-XX/)
+    OUTPUTS:
+    -returns a list of index lines (see index_columns). The paths are
+     relative to the BIDS_data folder
+    """
+
+    subject = os.path.basename(subject_path)
+
+    # Condition and delay of each session
+    dict_session = {}
+
+    for name in os.listdir(subject_path):
+        if name.endswith("_sessions.tsv"):
+            sessions = pd.read_csv(os.path.join(subject_path, name),
+                                   sep="\t", dtype=str,
+                                   keep_default_na=False)
+
+            for line in sessions.itertuples():
+                if line.delay == "n/a":
+                    delay = None
+                else:
+                    delay = int(line.delay)
+
+                dict_session[line.session_id] = [line.condition, delay]
+
+    ls_line = []
+
+    for ses in sorted(os.listdir(subject_path)):
+        ses_path = os.path.join(subject_path, ses)
+
+        if ses.startswith("ses-") is False or not os.path.isdir(ses_path):
+            continue
+
+        for name in sorted(os.listdir(ses_path)):
+            match = tsv_name.match(name)
+
+            if match is None:
+                continue
+
+            condition, delay = dict_session.get(ses, [None, None])
+
+            ls_line.append([
+                "sub-" + match["participant_id"],
+                "ses-" + match["session_id"],
+                match["task"],
+                match["run"],
+                condition,
+                delay,
+                "/".join([subject, ses, name])
+            ])
+
+    return ls_line
+
+
+class BIDSReader:
+    """
+    Reader of the BIDS compatible dataset: the tsv files are indexed once
+    (the index is saved in [bids_path]/derivatives/BIDS_index.json) and read
+    on demand through a cache.
+    INPUTS:
+    -bids_path: path of the BIDS_data folder ([repo_root]/results/BIDS_data/)
+    -cache_size: maximum number of tsv files kept in the cache
+                 (Default = 1024)
+    """
+
+    def __init__(self, bids_path, cache_size=1024):
+        if os.path.isdir(bids_path) is False:
+            print(color.Fore.RED
+                  + (f"ERROR: The following path does not exist "
+                     f"\"{bids_path}\".\n"
+                     "\t   --> Please run the BIDS format's auditory data "
+                     "exporter first.\n"))
+            raise FileNotFoundError(bids_path)
+
+        self.bids_path = bids_path
+        self.index_path = os.path.join(bids_path, "derivatives",
+                                       "BIDS_index.json")
+
+        # The cache key includes the files' modification times: a file that
+        # was written again is read again
+        self.read_file = lru_cache(maxsize=cache_size)(read_tsv)
+
+        self.index = self.load_index()
+
+    def load_index(self):
+        """
+        This function loads the saved index and scans again the subjects
+        whose folder changed (or that were added) since it was saved.
+        OUTPUTS:
+        -saved [bids_path]/derivatives/BIDS_index.json file (if the index
+         changed)
+        -returns the index in a pandas dataframe (see index_columns)
+        """
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r") as origin:
+                dict_saved = json.load(origin)
+            origin.close()
+        else:
+            dict_saved = {}
+
+        dict_index = {}
+        changed = False
+
+        for subject in sorted(os.listdir(self.bids_path)):
+            subject_path = os.path.join(self.bids_path, subject)
+
+            if (subject.startswith("sub-") is False
+                    or not os.path.isdir(subject_path)):
+                continue
+
+            dict_signature = subject_signature(subject_path)
+            saved = dict_saved.get(subject)
+
+            if saved is not None and saved["signature"] == dict_signature:
+                dict_index[subject] = saved
+            else:
+                dict_index[subject] = {"signature": dict_signature,
+                                       "files": scan_subject(subject_path)}
+                changed = True
+
+        # Removed subjects
+        if changed is False and dict_index.keys() != dict_saved.keys():
+            changed = True
+
+        if changed:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+
+            with open(self.index_path, "w") as destination:
+                json.dump(dict_index, destination)
+            destination.close()
+
+        ls_line = [line for subject in dict_index.values()
+                   for line in subject["files"]]
+
+        index = pd.DataFrame(ls_line, columns=index_columns)
+
+        return index.astype({"delay": "Int64"})
+
+    def refresh(self):
+        """
+        This function updates the index after the dataset was modified
+        (e.g. by a new run of the BIDS format's auditory data exporter).
+        OUTPUTS:
+        -NO specific return to the script
+        """
+
+        self.index = self.load_index()
+
+    def tasks(self):
+        """
+        This function lists the tests available in the dataset.
+        OUTPUTS:
+        -returns a list of the task names
+        """
+
+        return sorted(self.index["task"].unique().tolist())
+
+    def task(self, task):
+        """
+        This function selects all the tsv files of a test.
+        INPUTS:
+        -task: test marker (e.g. "PTA", "DPGrowth")
+        OUTPUTS:
+        -returns a lazy TaskFrame (no file is read)
+        """
+
+        return TaskFrame(self, self.index[self.index["task"] == task])
+
+    def read(self, relative_path):
+        """
+        This function reads a tsv file of the dataset through the cache.
+        INPUTS:
+        -relative_path: path of the file inside the BIDS_data folder
+        OUTPUTS:
+        -returns a copy of the file's content in a pandas dataframe
+        """
+
+        path = os.path.join(self.bids_path, *relative_path.split("/"))
+
+        return self.read_file(path, os.stat(path).st_mtime_ns).copy()
+
+
+class TaskFrame:
+    """
+    Lazy selection of the tsv files of a test: the filters only use the
+    index and the files are read when the data is loaded.
+    INPUTS:
+    -reader: BIDSReader of the dataset
+    -files: lines of the reader's index to select
+    """
+
+    def __init__(self, reader, files):
+        self.reader = reader
+        self.files = files
+
+    def __len__(self):
+        return len(self.files)
+
+    def filter(self, subjects=None, sessions=None, conditions=None,
+               delay=None):
+        """
+        This function narrows the selection of tsv files.
+        INPUTS:
+        -subjects: list of the subjects to keep ("sub-01" or "01")
+                   (Default = None: all the subjects)
+        -sessions: list of the sessions to keep ("ses-01" or "01")
+                   (Default = None: all the sessions)
+        -conditions: list of the experimental conditions to keep
+                     (Default = None: all the conditions)
+        -delay: (minimum, maximum) number of days since the first baseline,
+                both included. One of them can be None (no limit)
+                (Default = None: all the sessions, including the ones
+                without a known delay)
+        OUTPUTS:
+        -returns a new lazy TaskFrame (no file is read)
+        """
+
+        files = self.files
+
+        if subjects is not None:
+            ls_subject = [x if x.startswith("sub-") else "sub-" + x
+                          for x in subjects]
+            files = files[files["participant_id"].isin(ls_subject)]
+
+        if sessions is not None:
+            ls_session = [x if x.startswith("ses-") else "ses-" + x
+                          for x in sessions]
+            files = files[files["session_id"].isin(ls_session)]
+
+        if conditions is not None:
+            files = files[files["condition"].isin(conditions)]
+
+        if delay is not None:
+            delay_min, delay_max = delay
+            sr_delay = pd.to_numeric(files["delay"])
+            mask = sr_delay.notna()
+
+            if delay_min is not None:
+                mask &= sr_delay >= delay_min
+            if delay_max is not None:
+                mask &= sr_delay <= delay_max
+
+            files = files[mask]
+
+        return TaskFrame(self.reader, files)
+
+    def load(self):
+        """
+        This function reads the selected tsv files (through the reader's
+        cache) and assembles them in a long-format dataframe.
+        OUTPUTS:
+        -returns a dataframe with the participant_id, session_id, run,
+         condition and delay columns followed by the tsv files' columns
+        """
+
+        ls_df = []
+
+        for line in self.files.itertuples():
+            df = self.reader.read(line.path)
+
+            df.insert(loc=0, column="participant_id",
+                      value=line.participant_id)
+            df.insert(loc=1, column="session_id", value=line.session_id)
+            df.insert(loc=2, column="run", value=line.run)
+            df.insert(loc=3, column="condition", value=line.condition)
+            df.insert(loc=4, column="delay", value=line.delay)
+
+            ls_df.append(df)
+
+        if len(ls_df) == 0:
+            return pd.DataFrame(columns=["participant_id", "session_id",
+                                         "run", "condition", "delay"])
+        else:
+            return pd.concat(ls_df, ignore_index=True)
+
+
+if __name__ == "__main__":
+    # Initialize colorama
+    color.init(autoreset=True)
+
+    print(color.Fore.RED
+          + ("ERROR: This script is not designed to be used as a standalone "
+             "script.\nPlease import its BIDSReader class to read the "
+             "BIDS_data folder."))
+
+else:
+    pass
@@ -1,12 +1,16 @@
 import os
+import re
 import json
+import shutil
+import hashlib
+import numpy as np
 import pandas as pd
 import colorama as color
 
-from src import json_sidecar_generator as jsg
+from contextlib import contextmanager
 
-# Initialize colorama
-color.init(autoreset=True)
+from src import json_sidecar_generator as jsg
+from src.tsv_writer import TsvWriter
 
 """
 SCRIPT DESCRIPTION:
@@ -20,12 +24,166 @@ the BIDS_formater.py script.
 """
 
 
-def result_location(result_path):
+# Buffered tsv writer used by save_df (see buffered_writes)
+tsv_writer = None
+
+# Long-format copies of the saved dataframes (see collect_tables)
+table_collector = None
+
+# Raw OAE test data columns, in the order of the BIDS formated tsv files
+columns_teoae = ["order", "side", "Freq (Hz)",
+                 "OAE (dB)", "Noise (dB)", "snr",
+                 "Confidence (%)"]
+
+columns_dpoae = ["order", "side", "freq1", "Freq (Hz)",
+                 "F1 (dB)", "F2 (dB)", "DP (dB)", "snr",
+                 "Noise+2sd (dB)", "Noise+1sd (dB)",
+                 "2F2-F1 (dB)", "3F1-2F2 (dB)",
+                 "3F2-2F1 (dB)", "4F1-3F2 (dB)"]
+
+# Keywords identifying the OAE tests in the filenames (right before the ear)
+oae_keywords = {"TE": "TEOAE", "DPOAE6555": "DPOAE"}
+
+# DP-growth test frequencies (the DP-growth filenames' keyword)
+growth_keywords = ["2000", "4000", "6000"]
+
+# Test session date in the OAE test data filenames
+oae_date = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def load_var_json(result_path):
+    """
+    This function loads the frequent-variables dictionary saved next to the
+    results folder.
+    INPUTS:
+    -result_path: path of the results folder
+    OUTPUTS:
+    -returns the content of the [repo_root]/variables.json file
+    """
+
+    var_json_path = os.path.join(result_path, "..", "variables.json")
+
+    with open(var_json_path, "r") as origin:
+        var_json = json.load(origin)
+    origin.close()
+
+    return var_json
+
+
+def file_digest(path):
+    """
+    This function computes the hash of a file's content.
+    INPUTS:
+    -path: path of the file
+    OUTPUTS:
+    -returns the sha256 hash of the file's content (string)
+    """
+
+    hasher = hashlib.sha256()
+
+    with open(path, "rb") as origin:
+        for block in iter(lambda: origin.read(1 << 16), b""):
+            hasher.update(block)
+    origin.close()
+
+    return hasher.hexdigest()
+
+
+def same_content(path_1, path_2):
+    """
+    This function verifies if two files have the same content.
+    INPUTS:
+    -path_1, path_2: paths of the files to compare
+    OUTPUTS:
+    -returns True if both files exist and have the same content, False
+     otherwise
+    """
+
+    if os.path.exists(path_2) is False:
+        return False
+    elif os.path.samefile(path_1, path_2):
+        return True
+    elif os.path.getsize(path_1) != os.path.getsize(path_2):
+        return False
+    else:
+        return file_digest(path_1) == file_digest(path_2)
+
+
+def reflink(origin_path, destination_path):
+    """
+    This function creates a copy-on-write clone (reflink) of a file. It is
+    only supported on Linux, by some file systems (e.g. Btrfs, XFS).
+    INPUTS:
+    -origin_path: path of the file to clone
+    -destination_path: path of the clone (must not exist)
+    OUTPUTS:
+    -saved clone of the file
+    -raises OSError if reflinks are not supported
+    """
+
+    import fcntl
+
+    # FICLONE ioctl request code (linux/fs.h)
+    ficlone = 0x40049409
+
+    with open(origin_path, "rb") as origin:
+        with open(destination_path, "xb") as destination:
+            try:
+                fcntl.ioctl(destination.fileno(), ficlone, origin.fileno())
+            except OSError:
+                destination.close()
+                os.remove(destination_path)
+                raise
+
+
+def propagate_file(origin_path, destination_path, link=False):
+    """
+    This function copies a file, unless the destination already has the
+    same content. In link mode, the file is cloned (reflink) or hardlinked
+    when the file system supports it, and copied otherwise.
+    INPUTS:
+    -origin_path: path of the file to propagate
+    -destination_path: path of the destination file
+    -link: boolean specifying if the file should be linked instead of
+           copied (Default = False)
+    OUTPUTS:
+    -saved destination file
+    -NO specific return to the script
+    """
+
+    if same_content(origin_path, destination_path):
+        return
+
+    if link:
+        if os.path.exists(destination_path):
+            os.remove(destination_path)
+
+        try:
+            reflink(origin_path, destination_path)
+            return
+        except (OSError, ImportError):
+            pass
+
+        try:
+            os.link(origin_path, destination_path)
+            return
+        except OSError:
+            pass
+
+    shutil.copyfile(origin_path, destination_path)
+
+
+def result_location(result_path, var_json=None, split_flags=False):
     """
     This function makes sure that the destination for the formated file
     exists. If it doesn't, this function creates it.
     INPUTS:
     -result_path: path of the results folder
+    -var_json: frequent-variables dictionary (Default = None: it is loaded
+               from the [repo_root]/variables.json file if needed)
+    -split_flags: boolean specifying if the DPOAE sidecar should describe
+                  the flag columns (see json_sidecar_generator.gen_df_dpoae,
+                  Default = False)
     OUTPUTS:
     -prints some feedback lines to the user
     -NO specific return to the script
@@ -61,36 +219,26 @@ def result_location(result_path):
         print("The [repo_root]/results/BIDS_sidecars_originals folder is "
               "present.\n")
 
+        if var_json is None:
+            var_json = load_var_json(result_path)
+
         # Verification of the existence of the json sidecar originals
+        # Making sure that they are all present (tymp, reflex, PTA, MTX,
+        # TEOAE, DPOAE, DP Growth, sessions) and up to date
         sidecar_folder = os.path.join(result_path,
                                       "BIDS_sidecars_originals")
-        sidecar_list = os.listdir(sidecar_folder)
-        sidecar_list.sort()
-        # Making sure that they are all present (tymp, reflex, PTA, MTX)
-        if (sidecar_list.count("task-Tymp_beh.json") == 1
-                and sidecar_list.count("task-Reflex_beh.json") == 1
-                and sidecar_list.count("task-PTA_beh.json") == 1
-                and sidecar_list.count("task-MTX_beh.json") == 1
-                and sidecar_list.count("task-TEOAE_beh.json") == 1
-                and sidecar_list.count("task-DPOAE_beh.json") == 1
-                and sidecar_list.count("task-DPGrowth_beh.json") == 1
-                and sidecar_list.count("sessions.json") == 1):
+
+        if jsg.sidecars_up_to_date(sidecar_folder, var_json, split_flags):
 
             print("The json sidecars for:\n - tymp\n - reflex\n"
                   " - PTA\n - MTX\n - TEOAE\n - DPOAE\n - DP Growth\n"
                   " - sessions\nare present.\n")
         else:
             # run json_sidecar_generator.py
-            print("At least one of the target files is absent: we will "
-                  "create it (them) for you.\n")
-
-            var_json_path = os.path.join(result_path, "..", "variables.json")
+            print("At least one of the target files is absent or outdated: "
+                  "we will create it (them) for you.\n")
 
-            with open(var_json_path, "r") as origin:
-                var_json = json.load(origin)
-            origin.close()
-
-            jsg.create_sidecars(result_path, var_json)
+            jsg.create_sidecars(result_path, var_json, split_flags)
 
             print("\nThe json sidecars for:\n - tymp\n - reflex\n - PTA\n"
                   " - MTX\n - TEOAE\n - DPOAE\n - DP Growth\n - sessions\n"
@@ -101,13 +249,10 @@ def result_location(result_path):
         print("The BIDS_sidecars_originals folder is absent: we will "
               "create it for you.\n")
 
-        var_json_path = os.path.join(result_path, "..", "variables.json")
-
-        with open(var_json_path, "r") as origin:
-            var_json = json.load(origin)
-        origin.close()
+        if var_json is None:
+            var_json = load_var_json(result_path)
 
-        jsg.create_sidecars(result_path, var_json)
+        jsg.create_sidecars(result_path, var_json, split_flags)
 
         print("\nThe json sidecars for:\n - tymp\n - reflex\n"
               " - PTA\n - MTX\n - TEOAE\n - DPOAE\n - DP Growth\n"
@@ -195,8 +340,140 @@ def eliminate_columns(sub_df, columns_conditions, test_columns):
     return df_test
 
 
+@contextmanager
+def buffered_writes(max_workers=8, max_pending=256):
+    """
+    This function activates the buffered tsv writer: inside the with block,
+    the tsv files are queued and written in the background. All the files
+    are written when the block exits.
+    INPUTS:
+    -max_workers: number of writing threads (Default = 8)
+    -max_pending: maximum number of files waiting to be written
+                  (Default = 256)
+    OUTPUTS:
+    -NO specific return to the script
+    """
+
+    global tsv_writer
+
+    writer = TsvWriter(max_workers=max_workers, max_pending=max_pending)
+    tsv_writer = writer
+
+    try:
+        yield writer
+    finally:
+        tsv_writer = None
+        writer.close()
+
+
+@contextmanager
+def collect_tables(enabled=True):
+    """
+    This function activates the collection of the saved dataframes: inside
+    the with block, save_df also keeps a long-format copy of every dataframe
+    it saves (used by the dataset-level export).
+    INPUTS:
+    -enabled: boolean specifying if the dataframes should be collected
+              (Default = True)
+    OUTPUTS:
+    -returns a dictionary {test: [long-format df, ...]} filled by save_df
+     (it stays empty if enabled is False)
+    """
+
+    global table_collector
+
+    dict_tables = {}
+
+    if enabled:
+        table_collector = dict_tables
+
+    try:
+        yield dict_tables
+    finally:
+        table_collector = None
+
+
+def typed_table(df, ls_text=()):
+    """
+    This function prepares a long-format table to be saved in a columnar
+    file. The columns mixing numbers and text are stored as text (as they
+    appear in the tsv files) and the "n/a" values of the numeric columns
+    become missing values.
+    INPUTS:
+    -df: long-format table
+    -ls_text: list of the columns always stored as text (e.g. the run
+              indexer "01") (Default = (): none)
+    OUTPUTS:
+    -returns the table with a single type per column
+    """
+
+    df = df.copy()
+
+    for column in df.columns[df.dtypes == object]:
+        if column in ls_text:
+            df[column] = df[column].astype("string")
+            continue
+
+        values = df[column].mask(df[column] == "n/a")
+        numeric = pd.to_numeric(values, errors="coerce")
+
+        if numeric.notna().sum() == values.notna().sum():
+            df[column] = numeric
+        else:
+            df[column] = df[column].astype("string")
+
+    return df
+
+
+def write_tsv(df, path, **kwargs):
+    """
+    This function saves a dataframe in a tsv file, through the buffered tsv
+    writer if it is active.
+    INPUTS:
+    -df: dataframe to save
+    -path: path of the tsv file
+    -kwargs: arguments passed to the dataframe's to_csv method
+    OUTPUTS:
+    -saved (or queued) tsv file
+    -NO specific return to the script
+    """
+
+    if tsv_writer is None:
+        df.to_csv(path, sep="\t", **kwargs)
+    else:
+        tsv_writer.submit(df, path, **kwargs)
+
+
+def tsv_path(result_path, sub_id, ses, test, run="01"):
+    """
+    This function builds the path of a test's tsv file.
+    INPUTS:
+    -result_path: path to the subject's result folder
+                  ([repo_root]/results/BIDS_data/sub-XXXXXX/)
+    -sub_id: BIDS compliant subject ID
+    -ses: session ID (without the "ses-" prefix)
+    -test: the selected test marker
+    -run: run indexer value (Default = 01)
+    OUTPUTS:
+    -returns the path of the tsv file
+    """
+
+    sub = "sub-" + sub_id
+
+    # The next variable ("ext") can take the value ".csv".
+    # The last code section of BIDS_formater.py must then be activated
+    ext = '.tsv'
+
+    path = os.path.join(result_path, "ses-" + ses)
+
+    file_name = (sub + '_ses-' + ses + '_task-'
+                 + test + '_run-' + run + "_beh")
+
+    return os.path.join(path, file_name + ext)
+
+
 def save_df(data_tosave_df, single_test_df, index,
-            test, result_path, sub_id, run="01"):
+            test, result_path, sub_id, run="01", manifest=None, label=None):
     """
     This function is used to save the tsv files and json sidecars.
     INPUTS:
@@ -210,973 +487,837 @@ def save_df(data_tosave_df, single_test_df, index,
                   ([repo_root]/results/BIDS_data/sub-XXXXXX/)
     -sub_id: BIDS compliant subject ID
     -run: run indexer value (Default = 01)
+    -manifest: dictionary where the saved tests are recorded for each session
+               ({"ses-XX": [test, ...]}). Used to build the sessions.tsv
+               file without reading back the session folders
+               (Default = None: nothing is recorded)
+    -label: name under which the test is recorded in the manifest
+            (Default = None: the test marker is used)
     OUTPUTS:
-    -saved tsv file
+    -saved tsv file (a long-format copy of the df is also kept if the
+     collection is active, see collect_tables)
     -NO specific return to the script
     """
 
-    sub = "sub-" + sub_id
     ses = single_test_df["Session_ID"][index]
 
-    # The next variable ("ext") can take the value ".csv".
-    # The last code section of BIDS_formater.py must then be activated
-    ext = '.tsv'
+    # The missing values are written as "n/a"
+    write_tsv(data_tosave_df, tsv_path(result_path, sub_id, ses, test, run),
+              na_rep="n/a")
 
-    path = os.path.join(result_path, "ses-" + ses)
+    if table_collector is not None:
+        df_long = data_tosave_df.reset_index()
+        df_long.insert(loc=0, column="session_id", value="ses-" + ses)
+        df_long.insert(loc=1, column="run", value=run)
 
-    file_name = (sub + '_ses-' + ses + '_task-'
-                 + test + '_run-' + run + "_beh")
+        table_collector.setdefault(test, []).append(df_long)
+
+    if manifest is not None:
+        if label is None:
+            label = test
 
-    data_tosave_df.to_csv(os.path.join(path, file_name + ext), sep='\t')
+        manifest.setdefault("ses-" + ses, []).append(label)
 
 
-def oae_file_search(i, subject, data_sub, date, oae_file_list, keywords):
+def oae_file_index(ls_file):
     """
-    This function...
+    This function builds an index of the OAE test data files using the
+    informations contained in their filenames
+    ([participant]_[date]_..._[PreScan/PostScan]_..._[test]_[ear].csv).
+    The test keyword must be one of the keywords searched before the index
+    was used: TE, DPOAE6555 or the DP-growth frequency (2000, 4000, 6000).
     INPUTS:
-    -i: iterator scanning through the data_sub dataframe
-    -subject:
-    -data_sub: df containing the subject-specific session informations (from
-               the db spreadsheet)
-    -date:
-    -oae_file_list: list of all the available OAE test filenames
-    -keywords: dictionary with string values for the left and right
-               ears' files
+    -ls_file: list of all the available OAE test filenames
     OUTPUTS:
-    -returns
+    -returns a dictionary where the keys are tuples
+     (participant, date, test, prepost, frequency, ear) and the values are
+     the matching filenames:
+        - participant: everything before the date (it can contain "_")
+        - test: "TEOAE", "DPOAE" or "DPGrowth"
+        - prepost: "PreScan", "PostScan" or None
+        - frequency: DP-growth frequency (2000, 4000 or 6000) or None
+    -prints a warning if several files match the same key: none of them is
+     indexed (the test session is reported as missing)
     """
 
-    post = "Condition 3B (OAEs right after the scan)"
+    oae_index = {}
+    dict_duplicate = {}
 
-    oae_R_file = None
-    oae_L_file = None
+    for filename in ls_file:
+        if filename.endswith(".csv") is False:
+            continue
 
-    if data_sub.iloc[i]["Protocol condition"] == post:
+        ls_key = filename[:-len(".csv")].split("_")
 
-        for k, element_k in enumerate(oae_file_list):
+        # The participant's ID ends right before the test session date
+        ls_date = [k for k, token in enumerate(ls_key)
+                   if oae_date.match(token)]
 
-            if (element_k.startswith(subject)
-                    and element_k.find(date) != -1
-                    and element_k.find("PostScan") != -1):
+        if (len(ls_date) == 0 or ls_date[0] == 0
+                or len(ls_key) < ls_date[0] + 3
+                or ls_key[-1] not in ["R", "L"]):
+            continue
 
-                if element_k.endswith(keywords["R"]):
-                    oae_R_file = element_k
+        if "PostScan" in ls_key:
+            prepost = "PostScan"
+        elif "PreScan" in ls_key:
+            prepost = "PreScan"
+        else:
+            prepost = None
+
+        # The test is identified by the keyword right before the ear
+        if ls_key[-2] in oae_keywords:
+            test = oae_keywords[ls_key[-2]]
+            freq = None
+        elif ls_key[-2] in growth_keywords:
+            test = "DPGrowth"
+            freq = int(ls_key[-2])
+        else:
+            continue
 
-                elif oae_file_list[k].endswith(keywords["L"]):
-                    oae_L_file = element_k
+        key = ("_".join(ls_key[:ls_date[0]]), ls_key[ls_date[0]],
+               test, prepost, freq, ls_key[-1])
 
-                else:
-                    pass
+        if key in oae_index:
+            dict_duplicate.setdefault(key, [oae_index[key]]).append(filename)
+        else:
+            oae_index[key] = filename
 
-            else:
-                pass
+    # The files matching the same test session and ear are not processed:
+    # none of them can be chosen over the others
+    if len(dict_duplicate) != 0:
+        print(color.Fore.YELLOW
+              + ("WARNING: Several OAE test data files match the same test "
+                 "session and ear:"))
 
-    else:
-        for m in enumerate(oae_file_list):
-            if m[1].find("PostScan") != -1:
-                continue
+        for key, ls_duplicate in dict_duplicate.items():
+            del oae_index[key]
+            print(color.Fore.YELLOW
+                  + f"\t   --> {', '.join(ls_duplicate)}")
 
-            elif (m[1].startswith(subject) and
-                  m[1].find(date) != -1):
+        print(color.Fore.YELLOW
+              + ("\t   --> These files will not be processed. Please rename "
+                 "or remove the extra files.\n"))
 
-                if m[1].endswith(keywords["R"]):
-                    oae_R_file = m[1]
+    return oae_index
 
-                elif m[1].endswith(keywords["L"]):
-                    oae_L_file = m[1]
 
-                else:
-                    pass
+def oae_file_search(subject, date, oae_index, test,
+                    ls_prepost, freq=None):
+    """
+    This function looks up the right and left ears' OAE test data files of
+    a single test session in the OAE test data files' index.
+    INPUTS:
+    -subject: subject's ID (as used in the database and the filenames)
+    -date: test session date
+    -oae_index: index of the available OAE test files (see oae_file_index)
+    -test: type of OAE test ("TEOAE", "DPOAE" or "DPGrowth")
+    -ls_prepost: list of the accepted PreScan/PostScan markers, in order of
+                 preference (None for the files without any marker)
+    -freq: DP-growth frequency (Default = None)
+    OUTPUTS:
+    -returns the right and left ears' filenames (None if they are missing)
+    """
 
-            else:
-                pass
+    date = str(date).split(" ")[0]
+
+    oae_R_file = None
+    oae_L_file = None
+
+    for prepost in ls_prepost:
+        if oae_R_file is None:
+            oae_R_file = oae_index.get((subject, date, test,
+                                        prepost, freq, "R"))
+        if oae_L_file is None:
+            oae_L_file = oae_index.get((subject, date, test,
+                                        prepost, freq, "L"))
 
     return oae_R_file, oae_L_file
 
 
-def dpoae_suppl_values(seq_number, ear, df):
+def date_text(value):
     """
-    This function generates a dictionary with values to include in the BIDS
-    file that are computed-from but not already present in the raw OAE test
-    file.
+    This function formats a test date of the database.
     INPUTS:
-    -seq_number: rank in the order of presentation of the test condition
-                 (mostly related to which ear was tested in which order)
-    -ear: letter identifiying which ear the data is related to
-    -df: dataframe containing the raw OAE test data
+    -value: date parsed by BIDS_formater.fetch_db (NaT if missing)
     OUTPUTS:
-    -returns a dictionary with the lists of values for each of the value
-     categories to be added
+    -returns the date as a "YYYY-MM-DD" string ("n/a" if missing)
     """
 
-    order = []
-    side = []
-    freq1 = []
-    snr = []
-
-    for i in range(0, len(df)):
-        order.append(1)
-        side.append("R")
-        freq1.append(df["Freq (Hz)"][i] / 1.22)
-        snr.append(
-            df["DP (dB)"][i] - df["Noise+2sd (dB)"][i]
-        )
-
-    oae_dict = {"order": order, "side": side, "freq1": freq1, "snr": snr}
-
-    return oae_dict
+    if pd.isna(value):
+        return "n/a"
+    else:
+        return value.strftime("%Y-%m-%d")
 
 
-def extract_tymp(single_test_df, ls_columns_1,
-                 ls_columns_2, x, path, sub_id):
+def oae_session_prepost(condition):
     """
-    This function extracts every single tympanometry test and send the results
-    to be saved by the save_df function.
+    This function lists the PreScan/PostScan markers accepted in the OAE
+    test data filenames of a test session.
     INPUTS:
-    -single_test_df: df containing only the lines containing tympanometry tests
-                     and from which the useless columns have been removed
-    -ls_columns_1: list of right ear test data column names
-    -ls_columns_2: list of left ear test data column names
-    -x: list of column names to use in the reconstructed, BIDS formated df
-    -path: path inside the subject's result folder
-           ([repo_root]/results/sub-XXXXXX/)
-    -sub_id: BIDS compliant subject ID
+    -condition: experimental condition of the test session
     OUTPUTS:
-    -NO specific return to the script
-    -activates the save_df function
+    -returns a list of the accepted markers, in order of preference
     """
 
-    for j in range(0, len(single_test_df)):
-        y = [[], []]
+    post = "Condition 3B (OAEs right after the scan)"
 
-        y[0].append("1")
-        y[0].append("R")
+    if condition == post:
+        return ["PostScan"]
+    else:
+        return [None, "PreScan"]
 
-        for k in ls_columns_1:
-            y[0].append(single_test_df[k][j])
 
-        y[1].append("2")
-        y[1].append("L")
+def plan_line(index, test, run="01", label=None,
+              files=(None, None), missing=None):
+    """
+    This function describes a single output of the subject's plan.
+    INPUTS:
+    -index: the line index (in data_sub) of the test session
+    -test: the selected test marker
+    -run: run indexer value (Default = 01)
+    -label: name under which the test is recorded in the manifest
+            (Default = None: the test marker is used)
+    -files: right and left ears' OAE test data filenames
+            (Default = (None, None): spreadsheet-based test)
+    -missing: boolean specifying if the output can not be generated
+              (Default = None: missing if an OAE test data file is missing)
+    OUTPUTS:
+    -returns a dictionary describing the output
+    """
 
-        for m in ls_columns_2:
-            y[1].append(single_test_df[m][j])
+    if label is None:
+        label = test
 
-        mask_0 = []
-        mask_1 = []
+    if missing is None:
+        missing = test in ["TEOAE", "DPOAE", "DPGrowth"] and None in files
 
-        for n in range(2, len(y[0])):
-            if y[0][n] == 'n/a':
-                mask_0.append(True)
-            else:
-                mask_0.append(False)
+    return {"index": index,
+            "test": test,
+            "run": run,
+            "label": label,
+            "file_R": files[0],
+            "file_L": files[1],
+            "missing": missing}
 
-        for p in range(2, len(y[1])):
-            if y[1][p] == 'n/a':
-                mask_1.append(True)
-            else:
-                mask_1.append(False)
 
-        if False in mask_1:
-            pass
-        else:
-            del y[1]
+def plan_test(single_test_df, ls_columns_1, ls_columns_2, test, sides=True):
+    """
+    This function lists the outputs of a spreadsheet-based test type.
+    INPUTS:
+    -single_test_df: df containing the test columns
+    -ls_columns_1: list of right ear (or first sequence) test data column
+                   names
+    -ls_columns_2: list of left ear (or second sequence) test data column
+                   names
+    -test: the selected test marker
+    -sides: boolean specifying if the "side" column is part of the BIDS
+            formated df (Default = True)
+    OUTPUTS:
+    -returns a list of outputs (see plan_line): one per session with data
+     (the sessions extracted by extract_test)
+    """
 
-        if False in mask_0:
-            pass
-        else:
-            del y[0]
+    has_data = (ear_data_mask(single_test_df, ls_columns_1, sides=sides)
+                | ear_data_mask(single_test_df, ls_columns_2, sides=sides))
 
-        if len(y) > 0:
-            z = pd.DataFrame(data=y, columns=x).set_index("order")
-            save_df(z, single_test_df, j, 'Tymp', path, sub_id)
-        else:
-            continue
+    return [plan_line(j, test) for j in np.flatnonzero(has_data)]
 
 
-def extract_reflex(single_test_df, ls_columns_1,
-                   ls_columns_2, x, path, sub_id):
+def plan_oae(data_sub, oae_index):
     """
-    This function extracts every single stapedial reflex test and send the
-    results to be saved by the save_df function.
+    This function looks up the OAE test data files of every session of a
+    subject and lists the resulting outputs.
     INPUTS:
-    -single_test_df: df containing only the lines containing reflex tests and
-                     from which the useless columns have been removed
-    -ls_columns_1: list of right ear test data column names
-    -ls_columns_2: list of left ear test data column names
-    -x: list of column names to use in the reconstructed, BIDS formated df
-    -path: path inside the subject's result folder
-           ([repo_root]/results/BIDS_data/sub-XXXXXX/)
-    -sub_id: BIDS compliant subject ID
+    -data_sub: df containing the subject-specific session informations (from
+               the db spreadsheet)
+    -oae_index: index of the available OAE test files (see oae_file_index)
     OUTPUTS:
-    -NO specific return to the script
-    -activates the save_df function
+    -returns a list of outputs (see plan_line), in the extraction order:
+     TEOAE, DPOAE and then DP-growth tests. The outputs that can not be
+     generated because at least one of their files is missing are flagged.
     """
 
-    for j in range(0, len(single_test_df)):
-        y = [[], []]
+    no_oae = ["Condition 1A (right before the scan)",
+              "Condition 1B (right after the scan)",
+              "Supplementary PTA test (Baseline)",
+              "Suppl. PTA test (right before the scan)",
+              "Suppl. PTA test (right after the scan)"]
 
-        y[0].append("1")
-        y[0].append("R")
+    just_4k = ["Baseline", "Condition 2 (2-7 days post-scan)"]
 
-        for k in ls_columns_1:
-            y[0].append(single_test_df[k][j])
+    prepost = ["Condition 3A (OAEs right before the scan)",
+               "Condition 3B (OAEs right after the scan)"]
 
-        y[1].append("2")
-        y[1].append("L")
+    ls_subject = data_sub["Participant_ID"].tolist()
+    ls_date = [date_text(value) for value in data_sub["Date"]]
+    ls_condition = data_sub["Protocol condition"].tolist()
 
-        for m in ls_columns_2:
-            y[1].append(single_test_df[m][j])
+    ls_plan = []
 
-        mask_0 = []
-        mask_1 = []
+    for test in ["TEOAE", "DPOAE"]:
+        for j, condition in enumerate(ls_condition):
+            if condition in no_oae:
+                continue
 
-        for n in range(2, len(y[0])):
-            if y[0][n] == 'n/a':
-                mask_0.append(True)
-            else:
-                mask_0.append(False)
+            files = oae_file_search(ls_subject[j], ls_date[j], oae_index,
+                                    test, oae_session_prepost(condition))
+            ls_plan.append(plan_line(j, test, files=files))
 
-        for p in range(2, len(y[1])):
-            if y[1][p] == 'n/a':
-                mask_1.append(True)
+    for j, condition in enumerate(ls_condition):
+        if condition in just_4k:
+            files = oae_file_search(ls_subject[j], ls_date[j], oae_index,
+                                    "DPGrowth",
+                                    oae_session_prepost(condition), 4000)
+            ls_plan.append(plan_line(j, "DPGrowth", label="Growth_4",
+                                     files=files))
+
+        elif condition in prepost:
+            if condition.find("Condition 3A") != -1:
+                marker = "PreScan"
             else:
-                mask_1.append(False)
+                marker = "PostScan"
 
-        if False in mask_1:
-            pass
-        else:
-            del y[1]
+            ls_freq = [2000, 4000, 6000]
+            ls_files = [oae_file_search(ls_subject[j], ls_date[j], oae_index,
+                                        "DPGrowth", [marker], freq)
+                        for freq in ls_freq]
 
-        if False in mask_0:
-            pass
-        else:
-            del y[0]
+            # The three frequencies are only saved if all the files exist
+            missing = any(None in files for files in ls_files)
 
-        if len(y) > 0:
-            z = pd.DataFrame(data=y, columns=x).set_index("order")
-            save_df(z, single_test_df, j, 'Reflex', path, sub_id)
-        else:
-            continue
+            for d, freq in enumerate(ls_freq):
+                ls_plan.append(plan_line(j, "DPGrowth", run=f"{d+1:02d}",
+                                         label=f"Growth_{freq // 1000}",
+                                         files=ls_files[d],
+                                         missing=missing))
 
+    return ls_plan
 
-def extract_pta(single_test_df, ls_columns_1,
-                ls_columns_2, x, path, sub_id):
+
+def oae_column_values(column):
     """
-    This function extracts every single pure-tone audiometry test and send the
-    results to be saved by the save_df function.
+    This function converts the text values of a raw OAE test data column.
     INPUTS:
-    -single_test_df: df containing only the lines containing PTA tests and from
-                     which the useless columns have been removed
-    -ls_columns_1: list of right ear test data column names
-    -ls_columns_2: list of left ear test data column names
-    -x: list of column names to use in the reconstructed, BIDS formated df
-    -path: path inside the subject's result folder
-           ([repo_root]/results/BIDS_data/sub-XXXXXX/)
-    sub_id: BIDS compliant subject ID
+    -column: column of a raw OAE test data file that could not be read as
+             numbers
     OUTPUTS:
-    -NO specific return to the script
-    -activates the save_df function
+    -returns the column where:
+        - the numbers are converted to floats (decimal comma or point)
+        - the values flagged with " *" are kept as strings, with a decimal
+          point (ex.: "12.3 *")
+        - the "-" values are replaced with "n/a"
     """
 
-    for j in range(0, len(single_test_df)):
-        y = [[], []]
-
-        y[0].append("1")
-        y[0].append("R")
+    text = column.astype(str)
+    flagged = text.str.endswith(" *")
+    missing = text == "-"
 
-        for k in ls_columns_1:
-            y[0].append(single_test_df[k][j])
+    values = pd.to_numeric(text.str.replace(",", ".", regex=False),
+                           errors="coerce").astype(object)
+    values[flagged] = (text[flagged].str[:-len(" *")]
+                       .str.replace(",", ".", regex=False) + " *")
+    values[missing] = "n/a"
 
-        y[1].append("2")
-        y[1].append("L")
+    return values
 
-        for m in ls_columns_2:
-            y[1].append(single_test_df[m][j])
 
-        mask_0 = []
-        mask_1 = []
-
-        for n in range(2, len(y[0])):
-            if y[0][n] == 'n/a':
-                mask_0.append(True)
-            else:
-                mask_0.append(False)
-
-        for p in range(2, len(y[1])):
-            if y[1][p] == 'n/a':
-                mask_1.append(True)
-            else:
-                mask_1.append(False)
+def oae_numeric(column):
+    """
+    This function returns the numerical version of an OAE test data column
+    (the " *" flags are ignored and the "n/a" values become NaN).
+    INPUTS:
+    -column: column of an OAE test data dataframe (see read_oae_csv)
+    OUTPUTS:
+    -returns a float column
+    """
 
-        if False in mask_1:
-            pass
-        else:
-            del y[1]
+    if pd.api.types.is_numeric_dtype(column):
+        return column
 
-        if False in mask_0:
-            pass
-        else:
-            del y[0]
+    text = column.astype(str).str.removesuffix(" *")
 
-        if len(y) > 0:
-            z = pd.DataFrame(data=y, columns=x).set_index("order")
-            save_df(z, single_test_df, j, 'PTA', path, sub_id)
-        else:
-            continue
+    return pd.to_numeric(text, errors="coerce")
 
 
-def extract_mtx(single_test_df, ls_columns_1,
-                ls_columns_2, x, path, sub_id):
+def read_oae_csv(filepath):
     """
-    This function extracts every single matrix speech-in-noise perception test
-    and send the results to be saved by the save_df function.
+    This function reads a raw OAE test data file (TEOAE, DPOAE or DP-growth
+    csv file exported with decimal commas).
     INPUTS:
-    -single_test_df: df containing only the lines containing MTX tests and from
-                     which the useless columns have been removed
-    -ls_columns_1: list of right ear test data column names
-    -ls_columns_2: list of left ear test data column names
-    -x: list of column names to use in the reconstructed, BIDS formated df
-    -path: path inside the subject's result folder
-           ([repo_root]/results/BIDS_data/sub-XXXXXX/)
-    -sub_id: BIDS compliant subject ID
+    -filepath: path to the OAE test data file
     OUTPUTS:
-    -NO specific return to the script
-    -activates the save_df function
+    -returns a dataframe with numerical columns (see oae_column_values for
+     the columns containing flagged or missing values)
     """
 
-    for j in range(0, len(single_test_df)):
-        y = [[], []]
+    df = pd.read_csv(filepath, sep=";", decimal=",")
 
-        y[0].append("1")
+    # The trailing ";" of each line generates an empty "Unnamed" column
+    column_to_drop = [n for n in df.columns if n.startswith("Unnamed")]
+    df.drop(columns=column_to_drop, inplace=True)
 
-        for k in ls_columns_1:
-            value_1 = str(single_test_df[k][j]).replace(",", ".")
-            try:
-                float(value_1)
-            except ValueError:
-                y[0].append(single_test_df[k][j])
-            else:
-                y[0].append(float(value_1))
+    for column in df.columns:
+        if df[column].dtype == object:
+            df[column] = oae_column_values(df[column])
 
-        y[1].append("2")
+    return df
 
-        for m in ls_columns_2:
-            value_2 = str(single_test_df[m][j]).replace(",", ".")
-            try:
-                float(value_2)
-            except ValueError:
-                y[1].append(single_test_df[m][j])
-            else:
-                y[1].append(float(value_2))
 
-        mask_0 = []
-        mask_1 = []
+def oae_suppl_values(seq_number, ear, df):
+    """
+    This function adds to an OAE test dataframe the values to include in the
+    BIDS file that are computed-from but not already present in the raw OAE
+    test file.
+    INPUTS:
+    -seq_number: rank in the order of presentation of the test condition
+                 (mostly related to which ear was tested in which order)
+    -ear: letter identifiying which ear the data is related to
+    -df: dataframe containing the raw OAE test data (see read_oae_csv)
+    OUTPUTS:
+    -returns the dataframe with the order, side, snr and (distortion product
+     tests only) freq1 columns
+    """
 
-        for n in range(2, len(y[0])):
-            if y[0][n] == 'n/a':
-                mask_0.append(True)
-            else:
-                mask_0.append(False)
+    df["order"] = seq_number
+    df["side"] = ear
 
-        for p in range(2, len(y[1])):
-            if y[1][p] == 'n/a':
-                mask_1.append(True)
-            else:
-                mask_1.append(False)
+    if "DP (dB)" in df.columns:
+        # F2/F1 ratio = 1.22
+        df["freq1"] = df["Freq (Hz)"] / 1.22
+        snr = oae_numeric(df["DP (dB)"]) - oae_numeric(df["Noise+2sd (dB)"])
+    else:
+        snr = df["OAE (dB)"] - df["Noise (dB)"]
 
-        if False in mask_1:
-            pass
-        else:
-            del y[1]
+    if snr.isna().any():
+        snr = snr.astype(object).where(snr.notna(), "n/a")
 
-        if False in mask_0:
-            pass
-        else:
-            del y[0]
+    df["snr"] = snr
 
-        if len(y) > 0:
-            z = pd.DataFrame(data=y, columns=x).set_index("order")
-            save_df(z, single_test_df, j, 'MTX', path, sub_id)
-        else:
-            continue
+    return df
 
 
-def extract_teoae(data_sub, data_oae_sub, oae_file_list,
-                  x_teoae, data_path, result_path, sub_id):
+def split_flags(df_oae, ls_flag):
     """
-    This function extracts every single transient-evoked otoacoustic emissions
-    test and send the results to be saved by the save_df function.
+    This function splits the " *" flags of an OAE test dataframe's values
+    into boolean columns, so that the values stay numerical.
     INPUTS:
-    -data_sub: df containing the subject-specific session informations (from
-               the db spreadsheet)
-    -data_oae_sub: df containing the subject-specific available test data files
-                   breakdown informations
-    -oae_file_list: list of all the available OAE test filenames
-    -x_teoae: list of column names to use in the reconstructed, BIDS formated
-              df
-    -data_path: path inside the auditory_tests data folder
-                ([repo_root]/data/auditory_tests/)
-    -result_path: path inside the subject's result folder
-                  ([repo_root]/results/BIDS_data/sub-XXXXXX/)
-    -sub_id: BIDS compliant subject ID
+    -df_oae: BIDS formated OAE test dataframe (see oae_concat)
+    -ls_flag: list of the columns whose flags are split
     OUTPUTS:
-    -NO specific return to the script
-    -activates the save_df function
+    -returns the dataframe where each listed column contains floats ("n/a"
+     values become NaN) and is followed by a [column]_flag column (True if
+     the value was flagged)
     """
 
-    data_path = os.path.join(data_path, "OAE")
-
-    no_oae = ["Condition 1A (right before the scan)",
-              "Condition 1B (right after the scan)",
-              "Supplementary PTA test (Baseline)",
-              "Suppl. PTA test (right before the scan)",
-              "Suppl. PTA test (right after the scan)"]
+    for column in ls_flag:
+        if pd.api.types.is_numeric_dtype(df_oae[column]):
+            flagged = pd.Series(False, index=df_oae.index)
+        else:
+            text = df_oae[column].astype(str)
+            flagged = text.str.endswith(" *")
+            df_oae[column] = pd.to_numeric(text.str.removesuffix(" *"),
+                                           errors="coerce")
 
-    keywords = {"R": "TE_R.csv", "L": "TE_L.csv"}
+        df_oae.insert(loc=df_oae.columns.get_loc(column) + 1,
+                      column=column + "_flag", value=flagged)
 
-    for j in range(0, len(data_sub)):
-        subject = data_sub["Participant_ID"][j]
-        date = data_sub["Date"][j]
-        condition = data_sub["Protocol condition"][j]
+    return df_oae
 
-        if condition in no_oae:
-            continue
 
-        else:
-            teoae_R_file, teoae_L_file = oae_file_search(j,
-                                                         subject,
-                                                         data_sub,
-                                                         date,
-                                                         oae_file_list,
-                                                         keywords)
-
-        if (teoae_R_file is None or teoae_L_file is None):
-            print(color.Fore.RED
-                  + (f"ERROR: At least one of {subject}'s TEOAE csv "
-                     f"files for the {date} session ({condition}) "
-                     f"is missing.\n"))
-            continue
-
-        else:
-            df_L = pd.read_csv(os.path.join(data_path, teoae_L_file),
-                               sep=";")
-            df_R = pd.read_csv(os.path.join(data_path, teoae_R_file),
-                               sep=";")
-
-            for a in df_L.columns.tolist():
-                for b in range(0, len(df_L)):
-                    value_L = str(df_L.iloc[b][a]).replace(",", ".")
-                    df_L.at[b, a] = float(value_L)
-
-            for c in df_R.columns.tolist():
-                for d in range(0, len(df_R)):
-                    value_R = str(df_R.iloc[d][c]).replace(",", ".")
-                    df_R.at[d, c] = float(value_R)
-
-            order_R = []
-            order_L = []
-            side_R = []
-            side_L = []
-            snr_R = []
-            snr_L = []
-
-            for q in range(0, len(df_R)):
-                order_R.append(1)
-                side_R.append("R")
-                snr_R.append(df_R["OAE (dB)"][q] - df_R["Noise (dB)"][q])
-
-            for r in range(0, len(df_L)):
-                order_L.append(2)
-                side_L.append("L")
-                snr_L.append(df_L["OAE (dB)"][r] - df_L["Noise (dB)"][r])
-
-            df_R["order"] = order_R
-            df_R["side"] = side_R
-            df_R["snr"] = snr_R
-            df_L["order"] = order_L
-            df_L["side"] = side_L
-            df_L["snr"] = snr_L
-
-            df_teoae = pd.concat([df_R, df_L])
-            df_teoae.reset_index(inplace=True, drop=True)
-
-            ls_columns = df_teoae.columns.tolist()
-
-            if any("Unnamed" in n for n in ls_columns):
-                column_to_drop = [p for p in ls_columns if "Unnamed" in p]
-                df_teoae.drop(labels=column_to_drop.pop(),
-                              axis=1, inplace=True)
-            else:
-                pass
+def oae_concat(df_R, df_L, oae_columns, x_oae):
+    """
+    This function assembles the right and left ears' data of an OAE test
+    in a BIDS formated dataframe.
+    INPUTS:
+    -df_R: right ear's OAE test dataframe (see read_oae_csv)
+    -df_L: left ear's OAE test dataframe (see read_oae_csv)
+    -oae_columns: list of the columns to keep, in the BIDS order
+    -x_oae: list of column names to use in the reconstructed, BIDS formated
+            df
+    OUTPUTS:
+    -returns a dataframe ready to be saved by the save_df function
+    """
 
-            df_teoae = df_teoae[["order", "side", "Freq (Hz)",
-                                 "OAE (dB)", "Noise (dB)", "snr",
-                                 "Confidence (%)"]]
+    df_R = oae_suppl_values(1, "R", df_R)
+    df_L = oae_suppl_values(2, "L", df_L)
 
-            df_teoae = df_teoae.set_axis(x_teoae, axis=1, copy=False)
-            df_teoae.set_index("order", inplace=True)
+    df_oae = pd.concat([df_R, df_L], ignore_index=True)
+    df_oae = df_oae[oae_columns]
+    df_oae = df_oae.set_axis(x_oae, axis=1)
+    df_oae.set_index("order", inplace=True)
 
-            save_df(df_teoae, data_sub, j, 'TEOAE', result_path, sub_id)
+    return df_oae
 
 
-def extract_dpoae(data_sub, data_oae_sub, oae_file_list,
-                  x_dpoae, data_path, result_path, sub_id):
+def ear_data_mask(single_test_df, ls_columns, sides=True):
     """
-    This function extracts every single distortion product otoacoustic
-    emissions test and send the results to be saved by the save_df function.
+    This function finds the sessions where an ear (or a sequence) has data.
     INPUTS:
-    -data_sub: df containing the subject-specific session informations (from
-               the db spreadsheet)
-    -data_oae_sub: df containing the subject-specific available test data files
-                   breakdown informations
-    -oae_file_list: list of all the available OAE test filenames
-    -x_dpoae: list of column names to use in the reconstructed, BIDS formated
-              df
-    -data_path: path inside the auditory_tests data folder
-                ([repo_root]/data/auditory_tests/)
-    -result_path: path inside the subject's result folder
-                  ([repo_root]/results/BIDS_data/sub-XXXXXX/)
-    -sub_id: BIDS compliant subject ID
+    -single_test_df: df containing the test columns
+    -ls_columns: list of the ear's (or sequence's) test data column names
+    -sides: boolean specifying if the "side" column is part of the BIDS
+            formated df. If not, the first test data column (e.g. the MTX
+            language) is not considered as data (Default = True)
     OUTPUTS:
-    -NO specific return to the script
-    -activates the save_df function
+    -returns a boolean array: True for the lines of single_test_df where at
+     least one value is not missing
     """
 
-    data_path = os.path.join(data_path, "OAE")
+    if sides:
+        ls_checked = ls_columns
+    else:
+        ls_checked = ls_columns[1:]
 
-    no_oae = ["Condition 1A (right before the scan)",
-              "Condition 1B (right after the scan)",
-              "Supplementary PTA test (Baseline)",
-              "Suppl. PTA test (right before the scan)",
-              "Suppl. PTA test (right after the scan)"]
+    return single_test_df[ls_checked].notna().any(axis=1).to_numpy()
 
-    keywords = {"R": "DPOAE6555_R.csv", "L": "DPOAE6555_L.csv"}
 
-    for j in range(0, len(data_sub)):
-        subject = data_sub["Participant_ID"][j]
-        date = data_sub["Date"][j]
-        condition = data_sub["Protocol condition"][j]
+def reshape_test(single_test_df, ls_columns_1, ls_columns_2, x, sides=True):
+    """
+    This function reshapes the wide spreadsheet lines (one line per session,
+    one column per ear and measure) into long, BIDS formated dataframes
+    (one line per ear) in a single pass over all the lines.
+    INPUTS:
+    -single_test_df: df containing the test columns
+    -ls_columns_1: list of right ear (or first sequence) test data column
+                   names
+    -ls_columns_2: list of left ear (or second sequence) test data column
+                   names
+    -x: list of column names to use in the reconstructed, BIDS formated df
+    -sides: boolean specifying if the "side" column is part of x
+            (Default = True)
+    OUTPUTS:
+    -returns a list of (line index in single_test_df, BIDS formated df)
+     tuples. The ears without any data (all missing from the third column of
+     x onward) are removed and the sessions without any data are skipped.
+    """
 
-        if condition in no_oae:
-            continue
+    session_count = len(single_test_df)
 
-        else:
-            dpoae_R_file, dpoae_L_file = oae_file_search(j,
-                                                         subject,
-                                                         data_sub,
-                                                         date,
-                                                         oae_file_list,
-                                                         keywords)
-
-        if (dpoae_R_file is None or dpoae_L_file is None):
-            print(color.Fore.RED
-                  + (f"ERROR: At least one of {subject}'s DPOAE csv "
-                     f"files for the {date} session ({condition}) "
-                     f"is missing.\n"))
+    if sides:
+        lead = [["1", "R"], ["2", "L"]]
+    else:
+        lead = [["1"], ["2"]]
+
+    # (session, ear, measure) array
+    data = np.empty((session_count, 2, len(x)), dtype=object)
+    data[:, 0, :len(lead[0])] = lead[0]
+    data[:, 1, :len(lead[1])] = lead[1]
+    data[:, 0, len(lead[0]):] = single_test_df[ls_columns_1].to_numpy(
+        dtype=object)
+    data[:, 1, len(lead[1]):] = single_test_df[ls_columns_2].to_numpy(
+        dtype=object)
+
+    data = data.reshape(session_count * 2, len(x))
+    session = np.repeat(np.arange(session_count), 2)
+
+    # Remove the ears without any data
+    keep = np.stack([ear_data_mask(single_test_df, ls_columns_1, sides),
+                     ear_data_mask(single_test_df, ls_columns_2, sides)],
+                    axis=1).reshape(-1)
+    data = data[keep]
+    session = session[keep]
+
+    # Split the remaining lines by session
+    boundaries = np.flatnonzero(np.diff(session)) + 1
+
+    ls_df = []
+
+    for rows in np.split(np.arange(len(session)), boundaries):
+        if len(rows) == 0:
             continue
 
-        else:
-            df_L = pd.read_csv(os.path.join(data_path, dpoae_L_file),
-                               sep=";")
-            df_R = pd.read_csv(os.path.join(data_path, dpoae_R_file),
-                               sep=";")
-
-            for a in df_L.columns.tolist():
-                for b in range(0, len(df_L)):
-                    if str(df_L.iloc[b][a]).endswith(" *"):
-                        value_L = str(df_L.iloc[b][a].rstrip(" *"))
-                        value_L = value_L.replace(",", ".")
-                        df_L.at[b, a] = value_L + " *"
-                    elif str(df_L.iloc[b][a]) == "-":
-                        df_L.at[b, a] = "n/a"
-                    else:
-                        value_L = str(df_L.iloc[b][a]).replace(",", ".")
-                        df_L.at[b, a] = float(value_L)
-
-            for c in df_R.columns.tolist():
-                for d in range(0, len(df_R)):
-                    if str(df_R.iloc[d][c]).endswith(" *"):
-                        value_R = str(df_R.iloc[d][c].rstrip(" *"))
-                        value_R = value_R.replace(",", ".")
-                        df_R.at[d, c] = value_R + " *"
-                    elif str(df_R.iloc[d][c]) == "-":
-                        df_R.at[d, c] = "n/a"
-                    else:
-                        value_R = str(df_R.iloc[d][c]).replace(",", ".")
-                        df_R.at[d, c] = float(value_R)
-
-            values_R = dpoae_suppl_values(1, "R", df_R)
-            values_L = dpoae_suppl_values(2, "L", df_L)
-
-            df_R["order"] = values_R["order"]
-            df_R["side"] = values_R["side"]
-            df_R["freq1"] = values_R["freq1"]
-            df_R["snr"] = values_R["snr"]
-            df_L["order"] = values_L["order"]
-            df_L["side"] = values_L["side"]
-            df_L["freq1"] = values_L["freq1"]
-            df_L["snr"] = values_L["snr"]
-
-            df_dpoae = pd.concat([df_R, df_L])
-            df_dpoae.reset_index(inplace=True, drop=True)
-
-            ls_columns = df_dpoae.columns.tolist()
-
-            if any("Unnamed" in n for n in ls_columns):
-                column_to_drop = [p for p in ls_columns if "Unnamed" in p]
-                df_dpoae.drop(labels=column_to_drop.pop(),
-                              axis=1, inplace=True)
-            else:
-                pass
-
-            df_dpoae = df_dpoae[["order", "side", "freq1", "Freq (Hz)",
-                                 "F1 (dB)", "F2 (dB)", "DP (dB)", "snr",
-                                 "Noise+2sd (dB)", "Noise+1sd (dB)",
-                                 "2F2-F1 (dB)", "3F1-2F2 (dB)",
-                                 "3F2-2F1 (dB)", "4F1-3F2 (dB)"]]
-
-            df_dpoae = df_dpoae.set_axis(x_dpoae, axis=1, copy=False)
-            df_dpoae.set_index("order", inplace=True)
+        z = pd.DataFrame(data=data[rows].tolist(),
+                         columns=x).set_index("order")
+        ls_df.append((session[rows[0]], z))
 
-            save_df(df_dpoae, data_sub, j, 'DPOAE', result_path, sub_id)
+    return ls_df
 
 
-def prepost_growth_files(element, subject, date, prepost, dict_file_prepost):
+def extract_test(single_test_df, ls_plan, ls_columns_1, ls_columns_2,
+                 x, path, sub_id, test, sides=True, manifest=None):
     """
-    This function...
+    This function extracts the planned outputs of a spreadsheet-based test
+    type and send the results to be saved by the save_df function.
     INPUTS:
-    -element:
-    -subject: subject's ID
-    -date: test session date
-    -prepost:
-    -dict_file_prepost:
+    -single_test_df: df containing only the lines containing the tests and
+                     from which the useless columns have been removed
+    -ls_plan: list of the subject's planned outputs (see plan_test)
+    -ls_columns_1: list of right ear (or first sequence) test data column
+                   names
+    -ls_columns_2: list of left ear (or second sequence) test data column
+                   names
+    -x: list of column names to use in the reconstructed, BIDS formated df
+    -path: path inside the subject's result folder
+           ([repo_root]/results/BIDS_data/sub-XXXXXX/)
+    -sub_id: BIDS compliant subject ID
+    -test: the selected test marker
+    -sides: boolean specifying if the "side" column is part of x
+            (Default = True)
+    -manifest: dictionary where the saved tests are recorded for each session
+               (see save_df, Default = None)
     OUTPUTS:
-    -returns a dictionary with the different lists of file names generated by
-     this function
+    -NO specific return to the script
+    -activates the save_df function
     """
 
-    if element.find(prepost) == -1:
-        return dict_file_prepost
+    ls_plan = [line for line in ls_plan if line["test"] == test]
 
-    elif (element.startswith(subject) and
-          element.find(date) != -1 and
-          element.find(prepost) != -1):
+    # Only the planned sessions are reshaped
+    planned_df = single_test_df.iloc[[line["index"] for line in ls_plan]]
 
-        if element.endswith("R.csv"):
+    ls_df = reshape_test(planned_df, ls_columns_1,
+                         ls_columns_2, x, sides=sides)
 
-            if element.find("2000") != -1:
-                dict_file_prepost["2R"] = element
+    for k, z in ls_df:
+        line = ls_plan[k]
 
-            elif element.find("4000") != -1:
-                dict_file_prepost["4R"] = element
+        save_df(z, single_test_df, line["index"], test, path, sub_id,
+                run=line["run"], manifest=manifest, label=line["label"])
 
-            elif element.find("6000") != -1:
-                dict_file_prepost["6R"] = element
 
-            else:
-                pass
+def extract_tymp(single_test_df, ls_plan, ls_columns_1,
+                 ls_columns_2, x, path, sub_id, manifest=None):
+    """
+    This function extracts every single tympanometry test and send the results
+    to be saved by the save_df function.
+    INPUTS:
+    -single_test_df: df containing only the lines containing tympanometry tests
+                     and from which the useless columns have been removed
+    -ls_plan: list of the subject's planned outputs (see plan_test)
+    -ls_columns_1: list of right ear test data column names
+    -ls_columns_2: list of left ear test data column names
+    -x: list of column names to use in the reconstructed, BIDS formated df
+    -path: path inside the subject's result folder
+           ([repo_root]/results/sub-XXXXXX/)
+    -sub_id: BIDS compliant subject ID
+    -manifest: dictionary where the saved tests are recorded for each session
+               (see save_df, Default = None)
+    OUTPUTS:
+    -NO specific return to the script
+    -activates the save_df function
+    """
 
-        elif element.endswith("L.csv"):
+    extract_test(single_test_df, ls_plan, ls_columns_1, ls_columns_2,
+                 x, path, sub_id, 'Tymp', manifest=manifest)
 
-            if element.find("2000") != -1:
-                dict_file_prepost["2L"] = element
 
-            elif element.find("4000") != -1:
-                dict_file_prepost["4L"] = element
+def extract_reflex(single_test_df, ls_plan, ls_columns_1,
+                   ls_columns_2, x, path, sub_id, manifest=None):
+    """
+    This function extracts every single stapedial reflex test and send the
+    results to be saved by the save_df function.
+    INPUTS:
+    -single_test_df: df containing only the lines containing reflex tests and
+                     from which the useless columns have been removed
+    -ls_plan: list of the subject's planned outputs (see plan_test)
+    -ls_columns_1: list of right ear test data column names
+    -ls_columns_2: list of left ear test data column names
+    -x: list of column names to use in the reconstructed, BIDS formated df
+    -path: path inside the subject's result folder
+           ([repo_root]/results/BIDS_data/sub-XXXXXX/)
+    -sub_id: BIDS compliant subject ID
+    -manifest: dictionary where the saved tests are recorded for each session
+               (see save_df, Default = None)
+    OUTPUTS:
+    -NO specific return to the script
+    -activates the save_df function
+    """
 
-            elif element.find("6000") != -1:
-                dict_file_prepost["6L"] = element
+    extract_test(single_test_df, ls_plan, ls_columns_1, ls_columns_2,
+                 x, path, sub_id, 'Reflex', manifest=manifest)
 
-            else:
-                pass
 
-        else:
-            pass
+def extract_pta(single_test_df, ls_plan, ls_columns_1,
+                ls_columns_2, x, path, sub_id, manifest=None):
+    """
+    This function extracts every single pure-tone audiometry test and send the
+    results to be saved by the save_df function.
+    INPUTS:
+    -single_test_df: df containing only the lines containing PTA tests and from
+                     which the useless columns have been removed
+    -ls_plan: list of the subject's planned outputs (see plan_test)
+    -ls_columns_1: list of right ear test data column names
+    -ls_columns_2: list of left ear test data column names
+    -x: list of column names to use in the reconstructed, BIDS formated df
+    -path: path inside the subject's result folder
+           ([repo_root]/results/BIDS_data/sub-XXXXXX/)
+    sub_id: BIDS compliant subject ID
+    -manifest: dictionary where the saved tests are recorded for each session
+               (see save_df, Default = None)
+    OUTPUTS:
+    -NO specific return to the script
+    -activates the save_df function
+    """
 
-    else:
-        pass
+    extract_test(single_test_df, ls_plan, ls_columns_1, ls_columns_2,
+                 x, path, sub_id, 'PTA', manifest=manifest)
 
-    return dict_file_prepost
 
+def extract_mtx(single_test_df, ls_plan, ls_columns_1,
+                ls_columns_2, x, path, sub_id, manifest=None):
+    """
+    This function extracts every single matrix speech-in-noise perception test
+    and send the results to be saved by the save_df function.
+    INPUTS:
+    -single_test_df: df containing only the lines containing MTX tests and from
+                     which the useless columns have been removed
+    -ls_plan: list of the subject's planned outputs (see plan_test)
+    -ls_columns_1: list of right ear test data column names
+    -ls_columns_2: list of left ear test data column names
+    -x: list of column names to use in the reconstructed, BIDS formated df
+    -path: path inside the subject's result folder
+           ([repo_root]/results/BIDS_data/sub-XXXXXX/)
+    -sub_id: BIDS compliant subject ID
+    -manifest: dictionary where the saved tests are recorded for each session
+               (see save_df, Default = None)
+    OUTPUTS:
+    -NO specific return to the script
+    -activates the save_df function
+    """
 
-def growth_prepost(data_sub, i, oae_file_list,
-                   x_growth, data_path, result_path, sub_id):
+    # The decimal commas are converted by BIDS_formater.normalize_db
+    extract_test(single_test_df, ls_plan, ls_columns_1, ls_columns_2,
+                 x, path, sub_id, 'MTX', sides=False,
+                 manifest=manifest)
+
+
+def extract_oae(data_sub, ls_plan, oae_columns, x_oae,
+                data_path, result_path, sub_id, name, manifest=None,
+                ls_flag=None):
     """
-    This function extracts the conditions 3A (pre-scan) and 3B (post-scan)
-    distortion product otoacoustic emissions' growth function tests and send
+    This function extracts the planned outputs of an OAE test type and send
     the results to be saved by the save_df function.
     INPUTS:
     -data_sub: df containing the subject-specific session informations (from
                the db spreadsheet)
-    -i: index of the line to use in data_sub
-    -oae_file_list: list of all the available OAE test filenames
-    -x_growth: list of column names to use in the reconstructed, BIDS formated
-               df
-    -data_path: path inside the OAE test data folder
-                ([repo_root]/data/auditory_tests/OAE/)
+    -ls_plan: list of the test type's planned outputs (see plan_oae)
+    -oae_columns: list of the raw OAE test data columns to keep
+    -x_oae: list of column names to use in the reconstructed, BIDS formated
+            df
+    -data_path: path inside the auditory_tests data folder
+                ([repo_root]/data/auditory_tests/)
     -result_path: path inside the subject's result folder
                   ([repo_root]/results/BIDS_data/sub-XXXXXX/)
     -sub_id: BIDS compliant subject ID
+    -name: name of the test type in the error messages
+    -manifest: dictionary where the saved tests are recorded for each session
+               (see save_df, Default = None)
+    -ls_flag: list of the columns whose " *" flags are split into boolean
+              columns (see split_flags, Default = None: the flagged values
+              are kept as text, ex.: "12.3 *")
     OUTPUTS:
     -NO specific return to the script
     -activates the save_df function
     """
 
-    subject = data_sub["Participant_ID"][i]
-    date = data_sub["Date"][i]
-    condition = data_sub["Protocol condition"][i]
-
-    if condition.find("Condition 3A") != -1:
-        prepost = "PreScan"
-    elif condition.find("Condition 3B") != -1:
-        prepost = "PostScan"
-
-    g2k_R_file = None
-    g4k_R_file = None
-    g6k_R_file = None
-    g2k_L_file = None
-    g4k_L_file = None
-    g6k_L_file = None
+    data_path = os.path.join(data_path, "OAE")
 
-    dict_file_prepost = {
-        "2R": g2k_R_file, "4R": g4k_R_file, "6R": g6k_R_file,
-        "2L": g2k_L_file, "4L": g4k_L_file, "6L": g6k_L_file
-    }
+    # A single error message per session
+    ls_reported = []
 
-    for n, element_n in enumerate(oae_file_list):
+    for line in ls_plan:
+        j = line["index"]
 
-        #######################################################################
+        if line["missing"]:
+            if j not in ls_reported:
+                subject = data_sub["Participant_ID"][j]
+                date = date_text(data_sub["Date"][j])
+                condition = data_sub["Protocol condition"][j]
 
-        dict_file_prepost = prepost_growth_files(element_n,
-                                                 subject,
-                                                 date, prepost,
-                                                 dict_file_prepost)
+                print(color.Fore.RED
+                      + (f"ERROR: At least one of {subject}'s {name} csv "
+                         f"files for the {date} session ({condition}) "
+                         f"is missing.\n"))
+                ls_reported.append(j)
 
-        #######################################################################
+            continue
 
-    print(dict_file_prepost)
+        df_R = read_oae_csv(os.path.join(data_path, line["file_R"]))
+        df_L = read_oae_csv(os.path.join(data_path, line["file_L"]))
 
-    if (g2k_R_file is None or g4k_R_file is None
-            or g6k_R_file is None or g2k_L_file is None
-            or g4k_L_file is None or g6k_L_file is None):
-        print(color.Fore.RED
-              + (f"ERROR: At least one of {subject}'s DP-growth csv files "
-                 f"for the {date} session ({condition}) is missing.\n"))
+        df_oae = oae_concat(df_R, df_L, oae_columns, x_oae)
 
-    else:
-        df_2k_L = pd.read_csv(os.path.join(data_path, g2k_L_file),
-                              sep=";")
-        df_4k_L = pd.read_csv(os.path.join(data_path, g4k_L_file),
-                              sep=";")
-        df_6k_L = pd.read_csv(os.path.join(data_path, g6k_L_file),
-                              sep=";")
-        df_2k_R = pd.read_csv(os.path.join(data_path, g2k_R_file),
-                              sep=";")
-        df_4k_R = pd.read_csv(os.path.join(data_path, g4k_R_file),
-                              sep=";")
-        df_6k_R = pd.read_csv(os.path.join(data_path, g6k_R_file),
-                              sep=";")
-
-        ls_1df = [df_2k_L, df_4k_L, df_6k_L,
-                  df_2k_R, df_4k_R, df_6k_R]
-        ls_2df = [[df_2k_L, df_2k_R],
-                  [df_4k_L, df_4k_R],
-                  [df_6k_L, df_6k_R]]
-
-        for a in ls_1df:
-            for b in a.columns.tolist():
-                for c in range(0, len(a)):
-                    value_L = str(a.iloc[c][b]).replace(",", ".")
-                    a.at[c, b] = float(value_L)
-
-        for d in range(0, len(ls_2df)):
-            print("ls_2df[d], DP-Growth prepost")
-            print(ls_2df[d])
-
-            order_R = []
-            order_L = []
-            side_R = []
-            side_L = []
-            freq1_R = []
-            freq1_L = []
-            snr_R = []
-            snr_L = []
-
-            for q in range(0, len(ls_2df[d][1])):
-                order_R.append(1)
-                side_R.append("R")
-                freq1_R.append(ls_2df[d][1]["Freq (Hz)"][q] / 1.22)
-                snr_R.append(ls_2df[d][1]["DP (dB)"][q]
-                             - ls_2df[d][1]["Noise+2sd (dB)"][q])
-
-            for r in range(0, len(ls_2df[d][0])):
-                order_L.append(2)
-                side_L.append("L")
-                freq1_L.append(ls_2df[d][0]["Freq (Hz)"][r] / 1.22)
-                snr_L.append(ls_2df[d][0]["DP (dB)"][r]
-                             - ls_2df[d][0]["Noise+2sd (dB)"][r])
-
-            ls_2df[d][1]["order"] = order_R
-            ls_2df[d][1]["side"] = side_R
-            ls_2df[d][1]["freq1"] = freq1_R
-            ls_2df[d][1]["snr"] = snr_R
-            ls_2df[d][0]["order"] = order_L
-            ls_2df[d][0]["side"] = side_L
-            ls_2df[d][0]["freq1"] = freq1_L
-            ls_2df[d][0]["snr"] = snr_L
-
-            df_growth = pd.concat([ls_2df[d][1], ls_2df[d][0]])
-            df_growth.reset_index(inplace=True, drop=True)
-
-            ls_columns = df_growth.columns.tolist()
-
-            if any("Unnamed" in n for n in ls_columns):
-                column_to_drop = [p for p in ls_columns if "Unnamed" in p]
-                df_growth.drop(labels=column_to_drop.pop(),
-                               axis=1, inplace=True)
-            else:
-                pass
-
-            df_growth = df_growth[["order", "side", "freq1", "Freq (Hz)",
-                                   "F1 (dB)", "F2 (dB)", "DP (dB)", "snr",
-                                   "Noise+2sd (dB)", "Noise+1sd (dB)",
-                                   "2F2-F1 (dB)", "3F1-2F2 (dB)",
-                                   "3F2-2F1 (dB)", "4F1-3F2 (dB)"]]
-
-            df_growth = df_growth.set_axis(x_growth, axis=1, copy=False)
-            df_growth.set_index("order", inplace=True)
-
-            if d == 0:
-                run = "01"
-            elif d == 1:
-                run = "02"
-            elif d == 2:
-                run = "03"
-            else:
-                print("ERROR: counter value out of bound")
+        if ls_flag is not None:
+            df_oae = split_flags(df_oae, ls_flag)
 
-            save_df(df_growth, data_sub, i,
-                    'DPGrowth', result_path, sub_id, run=run)
+        save_df(df_oae, data_sub, j, line["test"], result_path, sub_id,
+                run=line["run"], manifest=manifest, label=line["label"])
 
 
-def growth_others(data_sub, i, oae_file_list,
-                  x_growth, data_path, result_path, sub_id):
+def extract_teoae(data_sub, ls_plan,
+                  x_teoae, data_path, result_path, sub_id, manifest=None):
     """
-    This function extracts the baseline and condition 2 sessions' distortion
-    product otoacoustic emissions' growth function tests and send the results
-    to be saved by the save_df function.
+    This function extracts every single transient-evoked otoacoustic emissions
+    test and send the results to be saved by the save_df function.
     INPUTS:
     -data_sub: df containing the subject-specific session informations (from
                the db spreadsheet)
-    -i: index of the line to use in data_sub
-    -oae_file_list: list of all the available OAE test filenames
-    -x_growth: list of column names to use in the reconstructed, BIDS formated
-               df
-    -data_path: path inside the OAE test data folder
-                ([repo_root]/data/auditory_tests/OAE/)
+    -ls_plan: list of the subject's planned outputs (see plan_oae)
+    -x_teoae: list of column names to use in the reconstructed, BIDS formated
+              df
+    -data_path: path inside the auditory_tests data folder
+                ([repo_root]/data/auditory_tests/)
     -result_path: path inside the subject's result folder
                   ([repo_root]/results/BIDS_data/sub-XXXXXX/)
     -sub_id: BIDS compliant subject ID
+    -manifest: dictionary where the saved tests are recorded for each session
+               (see save_df, Default = None)
     OUTPUTS:
     -NO specific return to the script
-    -activates the save_df function
+    -activates the extract_oae function
     """
 
-    subject = data_sub["Participant_ID"][i]
-    date = data_sub["Date"][i]
-    condition = data_sub["Protocol condition"][i]
+    ls_plan = [line for line in ls_plan if line["test"] == "TEOAE"]
 
-    growth_R_file = None
-    growth_L_file = None
+    extract_oae(data_sub, ls_plan, columns_teoae, x_teoae,
+                data_path, result_path, sub_id, "TEOAE", manifest=manifest)
 
-    for m in enumerate(oae_file_list):
-        if m[1].find("PostScan") != -1:
-            pass
-
-        elif (m[1].startswith(subject) and
-              m[1].find(date) != -1):
-
-            if m[1].endswith("4000_R.csv"):
-                growth_R_file = m[1]
-
-            elif m[1].endswith("4000_L.csv"):
-                growth_L_file = m[1]
-
-            else:
-                pass
-
-        else:
-            pass
-
-    if (growth_R_file is None or growth_L_file is None):
-        print(color.Fore.RED
-              + (f"ERROR: At least one of {subject}'s DP-growth csv files "
-                 f"for the {date} session ({condition}) is missing.\n"))
-
-    else:
-        df_L = pd.read_csv(os.path.join(data_path, growth_L_file),
-                           sep=";")
-        df_R = pd.read_csv(os.path.join(data_path, growth_R_file),
-                           sep=";")
-
-        for a in df_L.columns.tolist():
-            for b in range(0, len(df_L)):
-                value_L = str(df_L.iloc[b][a]).replace(",", ".")
-                df_L.at[b, a] = float(value_L)
-
-        for c in df_R.columns.tolist():
-            for d in range(0, len(df_R)):
-                value_R = str(df_R.iloc[d][c]).replace(",", ".")
-                df_R.at[d, c] = float(value_R)
-
-        values_R = dpoae_suppl_values(1, "R", df_R)
-        values_L = dpoae_suppl_values(2, "L", df_L)
-
-        df_R["order"] = values_R["order"]
-        df_R["side"] = values_R["side"]
-        df_R["freq1"] = values_R["freq1"]
-        df_R["snr"] = values_R["snr"]
-        df_L["order"] = values_L["order"]
-        df_L["side"] = values_L["side"]
-        df_L["freq1"] = values_L["freq1"]
-        df_L["snr"] = values_L["snr"]
-
-        df_growth = pd.concat([df_R, df_L])
-        df_growth.reset_index(inplace=True, drop=True)
-
-        ls_columns = df_growth.columns.tolist()
-
-        if any("Unnamed" in n for n in ls_columns):
-            column_to_drop = [p for p in ls_columns if "Unnamed" in p]
-            df_growth.drop(labels=column_to_drop.pop(),
-                           axis=1, inplace=True)
-        else:
-            pass
 
-        df_growth = df_growth[["order", "side", "freq1", "Freq (Hz)",
-                               "F1 (dB)", "F2 (dB)", "DP (dB)", "snr",
-                               "Noise+2sd (dB)", "Noise+1sd (dB)",
-                               "2F2-F1 (dB)", "3F1-2F2 (dB)",
-                               "3F2-2F1 (dB)", "4F1-3F2 (dB)"]]
+def extract_dpoae(data_sub, ls_plan,
+                  x_dpoae, data_path, result_path, sub_id, manifest=None,
+                  ls_flag=None):
+    """
+    This function extracts every single distortion product otoacoustic
+    emissions test and send the results to be saved by the save_df function.
+    INPUTS:
+    -data_sub: df containing the subject-specific session informations (from
+               the db spreadsheet)
+    -ls_plan: list of the subject's planned outputs (see plan_oae)
+    -x_dpoae: list of column names to use in the reconstructed, BIDS formated
+              df
+    -data_path: path inside the auditory_tests data folder
+                ([repo_root]/data/auditory_tests/)
+    -result_path: path inside the subject's result folder
+                  ([repo_root]/results/BIDS_data/sub-XXXXXX/)
+    -sub_id: BIDS compliant subject ID
+    -manifest: dictionary where the saved tests are recorded for each session
+               (see save_df, Default = None)
+    -ls_flag: list of the columns whose " *" flags are split into boolean
+              columns (see split_flags, Default = None)
+    OUTPUTS:
+    -NO specific return to the script
+    -activates the extract_oae function
+    """
 
-        df_growth = df_growth.set_axis(x_growth, axis=1, copy=False)
-        df_growth.set_index("order", inplace=True)
+    ls_plan = [line for line in ls_plan if line["test"] == "DPOAE"]
 
-        save_df(df_growth, data_sub, i, 'DPGrowth', result_path, sub_id)
+    extract_oae(data_sub, ls_plan, columns_dpoae, x_dpoae,
+                data_path, result_path, sub_id, "DPOAE", manifest=manifest,
+                ls_flag=ls_flag)
 
 
-def extract_growth(data_sub, data_oae_sub, oae_file_list,
-                   x_growth, data_path, result_path, sub_id):
+def extract_growth(data_sub, ls_plan,
+                   x_growth, data_path, result_path, sub_id, manifest=None):
     """
-    This function extracts every DP growth function OAE test and separate them
-    according to the experimental condition in which they were acquired.
-    It then calls the proper function for processing.
+    This function extracts every DP growth function OAE test: a single run
+    (4 kHz) for the baseline and condition 2 sessions and three runs (2, 4
+    and 6 kHz) for the conditions 3A (pre-scan) and 3B (post-scan) sessions
+    (see plan_oae).
     INPUTS:
     -data_sub: df containing the subject-specific session informations (from
                the db spreadsheet)
-    -data_oae_sub: df containing the subject-specific available test data files
-                   breakdown informations
-    -oae_file_list: list of all the available OAE test filenames
+    -ls_plan: list of the subject's planned outputs (see plan_oae)
     -x_growth: list of column names to use in the reconstructed, BIDS formated
                df
     -data_path: path inside the auditory_tests data folder
@@ -1184,41 +1325,24 @@ def extract_growth(data_sub, data_oae_sub, oae_file_list,
     -result_path: path inside the subject's result folder
                   ([repo_root]/results/BIDS_data/sub-XXXXXX/)
     -sub_id: BIDS compliant subject ID
+    -manifest: dictionary where the saved tests are recorded for each session
+               (see save_df, Default = None)
     OUTPUTS:
     -NO specific return to the script
-    -activates the growth_prepost and growth_others functions
+    -activates the extract_oae function
     """
 
-    data_path = os.path.join(data_path, "OAE")
+    ls_plan = [line for line in ls_plan if line["test"] == "DPGrowth"]
 
-    no_oae = ["n/a",
-              "Condition 1A (right before the scan)",
-              "Condition 1B (right after the scan)",
-              "Supplementary PTA test (Baseline)",
-              "Suppl. PTA test (right before the scan)",
-              "Suppl. PTA test (right after the scan)"]
-
-    just_4k = ["Baseline", "Condition 2 (2-7 days post-scan)"]
-
-    prepost = ["Condition 3A (OAEs right before the scan)",
-               "Condition 3B (OAEs right after the scan)"]
-
-    for j in range(0, len(data_sub)):
-        condition = data_sub["Protocol condition"][j]
-
-        if condition in no_oae:
-            continue
-
-        elif condition in just_4k:
-            growth_others(data_sub, j, oae_file_list,
-                          x_growth, data_path, result_path, sub_id)
-
-        elif condition in prepost:
-            growth_prepost(data_sub, j, oae_file_list,
-                           x_growth, data_path, result_path, sub_id)
+    extract_oae(data_sub, ls_plan, columns_dpoae, x_growth,
+                data_path, result_path, sub_id, "DP-growth",
+                manifest=manifest)
 
 
 if __name__ == "__main__":
+    # Initialize colorama
+    color.init(autoreset=True)
+
     print(color.Fore.RED
           + ("ERROR: This script is not designed to be used as a standalone "
              "script.\nPlease use main.py functionalities or "
@@ -1,12 +1,13 @@
 import os
+import sys
+import time
+import hashlib
+import datetime
 import pandas as pd
 # import numpy as np
 # import matplotlib.cm as cm
 import colorama as color
 
-# Initialize colorama
-color.init(autoreset=True)
-
 """
 SCRIPT DESCRIPTION:
 
@@ -22,7 +23,227 @@ another script:
 """
 
 
-def retrieve_db(data_path, method):
+def db_snapshot_path(data_path, url_csv):
+    """
+    This function generates the path of the local snapshot of a database
+    downloaded from a URL.
+    INPUTS:
+    -data_path: path to the [repo_root]/data folder
+    -url_csv: URL used to download the database in csv format
+    OUTPUTS:
+    -returns the path of the snapshot
+     ([repo_root]/data/db_snapshots/[URL hash].pkl)
+    """
+
+    url_hash = hashlib.sha256(url_csv.encode()).hexdigest()[:16]
+
+    return os.path.join(data_path, "db_snapshots", f"{url_hash}.pkl")
+
+
+def read_db_url(url_csv, data_path, method, ttl=0, offline=False):
+    """
+    This function downloads a database from a URL and keeps a local
+    snapshot of it. The snapshot is used instead of the download when it is
+    more recent than the time-to-live or when working offline.
+    INPUTS:
+    -url_csv: URL used to download the database in csv format
+    -data_path: path to the [repo_root]/data folder
+    -method: method used to activate retrieve_db (see retrieve_db)
+    -ttl: time-to-live of the snapshot in seconds (Default = 0: the
+          database is always downloaded)
+    -offline: boolean forcing the use of the last snapshot, whatever its age
+              (Default = False)
+    OUTPUTS:
+    -saved [repo_root]/data/db_snapshots/[URL hash].pkl file
+    -returns the database in a pandas dataframe
+    """
+
+    snapshot_path = db_snapshot_path(data_path, url_csv)
+
+    if os.path.exists(snapshot_path):
+        age = time.time() - os.path.getmtime(snapshot_path)
+    else:
+        age = None
+
+    if offline and age is None:
+        print(color.Fore.RED
+              + ("ERROR: No local snapshot of the database is available for "
+                 "the following URL:\n")
+              + f"{url_csv}\n"
+              + ("\nPlease run the script at least once while online.\n"))
+
+        if method == "master_script":
+            raise RuntimeError("Return to the main menu")
+        else:
+            sys.exit(1)
+
+    elif age is not None and (offline or age < ttl):
+        print(f"The database was loaded from its local snapshot "
+              f"({int(age // 60)} minute(s) old).\n")
+        df = pd.read_pickle(snapshot_path)
+
+    else:
+        df = pd.read_csv(url_csv, sep=',', na_filter=True)
+
+        # Write to a temporary file first: an interrupted run does not
+        # leave a truncated snapshot behind
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        temp_path = snapshot_path + ".tmp"
+        df.to_pickle(temp_path)
+        os.replace(temp_path, snapshot_path)
+
+    return df
+
+
+def xlsx_cell_value(value):
+    """
+    This function converts the value of a spreadsheet cell into the value
+    that would be found in the csv export of the same spreadsheet.
+    INPUTS:
+    -value: value of the cell as returned by openpyxl
+    OUTPUTS:
+    -returns the dates as "YYYY-MM-DD" strings and the other values as is
+    """
+
+    if (isinstance(value, datetime.datetime)
+            and value.time() == datetime.time()):
+        return value.date().isoformat()
+    elif isinstance(value, (datetime.datetime, datetime.date)):
+        return str(value)
+    else:
+        return value
+
+
+def read_db_xlsx(filename, usecols=None):
+    """
+    This function reads a database saved in a xlsx file. The rows of the
+    first worksheet are streamed (openpyxl read-only mode) and only the
+    selected columns are kept, so the whole workbook is never loaded in
+    memory.
+    INPUTS:
+    -filename: path to the xlsx file
+    -usecols: function receiving a column title and returning True if the
+              column is to be read (Default = None: all the columns are read)
+    OUTPUTS:
+    -returns the database in a pandas dataframe
+    """
+
+    # Only imported when needed: the other retrieval methods do not use it
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(filename, read_only=True,
+                                      data_only=True)
+
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, ())
+
+        ls_index = [k for k, title in enumerate(header)
+                    if title is not None
+                    and (usecols is None or usecols(str(title)))]
+
+        ls_rows = []
+
+        for row in rows:
+            values = [xlsx_cell_value(row[k]) if k < len(row) else None
+                      for k in ls_index]
+
+            # Formatted but empty rows are left out
+            if any(value is not None for value in values):
+                ls_rows.append(values)
+
+    finally:
+        workbook.close()
+
+    df = pd.DataFrame(ls_rows, columns=[str(header[k]) for k in ls_index])
+
+    return df.infer_objects()
+
+
+def check_db_file(path, method):
+    """
+    This function verifies that a database file (or URL.tsv file) exists
+    before it is read.
+    INPUTS:
+    -path: path of the file
+    -method: method used to activate retrieve_db (see retrieve_db)
+    OUTPUTS:
+    -NO specific return to the script
+    -the script is stopped (or returns to the main menu) if the file does not
+     exist
+    """
+
+    if os.path.isfile(path) is False:
+        print(color.Fore.RED
+              + (f"ERROR: The following database file does not exist "
+                 f"\"{path}\".\n"
+                 "\t   --> Please verify the location of the database.\n"))
+
+        if method == "master_script":
+            raise RuntimeError("Return to the main menu")
+        else:
+            sys.exit(1)
+
+
+def load_db(source, location, data_path, method, ttl=0, offline=False,
+            usecols=None):
+    """
+    This function retrieves the database from a specified source without
+    prompting the user.
+    INPUTS:
+    -source: type of source of the database. The valid sources are:
+                -"url": Google Spreadsheet URL
+                -"urltsv": URL listed in a URL.tsv file
+                -"xlsx": xlsx file
+                -"csv": csv file
+    -location: URL ("url") or path to the file (other sources). For the
+               "urltsv" and "xlsx" sources, None selects the
+               [repo_root]/data/URL.tsv and [repo_root]/data/test_database.xlsx
+               files
+    -data_path: path to the [repo_root]/data folder
+    -method: method used to activate this function (see retrieve_db)
+    -ttl, offline: local snapshot options for the URL sources
+                   (see read_db_url)
+    -usecols: column selection function for the "xlsx" source
+              (see read_db_xlsx)
+    OUTPUTS:
+    -returns the database in a pandas dataframe (the script is stopped, or
+     returns to the main menu, if the database file does not exist)
+    """
+
+    if source == "url":
+        url_csv = location.replace("/edit#gid=", "/export?format=csv&gid=")
+        df = read_db_url(url_csv, data_path, method,
+                         ttl=ttl, offline=offline)
+
+    elif source == "urltsv":
+        if location is None:
+            location = os.path.join(data_path, "URL.tsv")
+        check_db_file(location, method)
+        df_URL = pd.read_csv(location, sep="\t")
+        url_share = df_URL["test_database"][0]
+        url_csv = url_share.replace("/edit#gid=", "/export?format=csv&gid=")
+        df = read_db_url(url_csv, data_path, method,
+                         ttl=ttl, offline=offline)
+
+    elif source == "xlsx":
+        if location is None:
+            location = os.path.join(data_path, "test_database.xlsx")
+        check_db_file(location, method)
+        df = read_db_xlsx(location, usecols=usecols)
+
+    elif source == "csv":
+        check_db_file(location, method)
+        df = pd.read_csv(location, sep=',', na_filter=True)
+
+    else:
+        raise ValueError(f"Invalid database source: \"{source}\"")
+
+    return df
+
+
+def retrieve_db(data_path, method, ttl=0, offline=False, usecols=None,
+                source=None, location=None):
     """
     This function gives the user a choice on how to retrieve the database.
     Available options are:
@@ -42,10 +263,26 @@ def retrieve_db(data_path, method):
                 -"standalone": one of the scripts in the src/ folder is
                                activated as a standalone script and is
                                using this fonction.
+    -ttl: time-to-live, in seconds, of the local snapshot of a database
+          downloaded from a URL (Default = 0: always download)
+    -offline: boolean forcing the use of the last local snapshot of a
+              database downloaded from a URL (Default = False)
+    -usecols: function receiving a column title and returning True if the
+              column is to be read from the test_database.xlsx file
+              (Default = None: all the columns are read)
+    -source: type of source of the database (see load_db). When it is
+             specified, the database is retrieved without prompting the
+             user (Default = None: the user is prompted)
+    -location: URL or path of the database (see load_db) (Default = None)
     OUTPUTS:
     -returns the database in a pandas dataframe
     """
 
+    # Non-interactive retrieval
+    if source is not None:
+        return load_db(source, location, data_path, method, ttl=ttl,
+                       offline=offline, usecols=usecols)
+
     # Available functions list
     ls_fct = [
         "Retrieve from a user supplied URL (Google Spreadsheet)",
@@ -121,21 +358,29 @@ def retrieve_db(data_path, method):
                         url_share = input("Enter the Google "
                                           "Spreadsheet URL: ")
                         print("\n")
-                        url_csv = url_share.replace("/edit#gid=",
-                                                    "/export?"
-                                                    "format=csv&gid=")
-                        df = pd.read_csv(url_csv, sep=',', na_filter=True)
+                        df = load_db("url", url_share, data_path, method,
+                                     ttl=ttl, offline=offline)
                         return df
 
                     # Use the URL.tsv file
                     elif ls_fct[value - 1].count("URL.tsv") == 1:
-                        filename = os.path.join(data_path, "URL.tsv")
-                        df_URL = pd.read_csv(filename, sep="\t")
-                        url_share = df_URL["test_database"][0]
-                        url_csv = url_share.replace("/edit#gid=",
-                                                    "/export?"
-                                                    "format=csv&gid=")
-                        df = pd.read_csv(url_csv, sep=',', na_filter=True)
+                        df = load_db("urltsv", None, data_path, method,
+                                     ttl=ttl, offline=offline)
+                        return df
+
+                    # Use the test_database.xlsx file
+                    elif ls_fct[value - 1].count("test_database.xlsx") == 1:
+                        filename = os.path.join(data_path,
+                                                "test_database.xlsx")
+
+                        if os.path.exists(filename) is False:
+                            print(color.Fore.RED
+                                  + ("ERROR: The following file does not "
+                                     f"exist \"{filename}\".\n"))
+                            continue
+
+                        df = load_db("xlsx", filename, data_path, method,
+                                     usecols=usecols)
                         return df
 
                     # Test Dummy
@@ -159,10 +404,34 @@ def retrieve_db(data_path, method):
                      "(not a digit).\n"))
             continue
 
+
+# Characters removed from the subject IDs and prefix removed from their start
+# to comply with BIDS standards (see bidsify_IDs)
+id_removed_characters = r"[ _-]"
+id_prefix = r"^(?:sub|Sub|SUB)"
+
+
+def bidsify_IDs(sr_id):
+    """
+    This function adapts a series of subject IDs to BIDS standards: the
+    spaces, hyphens and underscores are removed, then the "sub" prefix
+    (sub, Sub or SUB) is removed once from the start of the ID.
+    INPUTS:
+    -sr_id: series of subject IDs to be evaluated
+    OUTPUT:
+    -returns a series of the adapted IDs (unchanged if already compliant)
+    """
+
+    return (sr_id.astype(str)
+            .str.replace(id_removed_characters, "", regex=True)
+            .str.replace(id_prefix, "", n=1, regex=True))
+
+
 def bidsify_ID(ID):
     """
     This function verifies that a subject ID is compliant with BIDS
-    standards. If it is not, it modifies it to comply with BIDS standards.
+    standards. If it is not, it modifies it to comply with BIDS standards
+    (see bidsify_IDs).
     INPUTS:
     -ID: subject ID to be evaluated
     OUTPUT:
@@ -170,41 +439,14 @@ def bidsify_ID(ID):
      the original was not compliant
     """
 
-    if ID.count(" ") != 0:
-        ls_ID = ID.split(" ")
-        ID = "".join(ls_ID)
-    else:
-        pass
-
-    if ID.count("-") != 0:
-        ls_ID = ID.split("-")
-        ID = "".join(ls_ID)
-    else:
-        pass
-
-    if ID.count("_") != 0:
-        ls_ID = ID.split("_")
-        ID = "".join(ls_ID)
-    else:
-        pass
-
-    if ID.startswith("sub"):
-        ID = ID.lstrip("sub")
-    elif ID.startswith("Sub"):
-        ID = ID.lstrip("Sub")
-    elif ID.startswith("SUB"):
-        ID = ID.lstrip("SUB")
-    else:
-        pass
+    return bidsify_IDs(pd.Series([ID])).iloc[0]
 
-    return ID
 
 def create_folder_subjects(subject, parent_path):
     """
     This function creates by-subject folders in a specified folder
     INPUTS:
-    -subject: subject ID used by the script or the database's
-              dataframe
+    -subject: BIDSified subject ID (see bidsify_IDs)
     -parent_path: path to get inside the specified folder
     OUTPUTS:
     -folder for the provided subject ID in the BIDS_data/ folder
@@ -217,22 +459,6 @@ def create_folder_subjects(subject, parent_path):
     dir_content = os.listdir(parent_path)
     dir_content.sort()
 
-    sub_lower = subject.lower()
-
-    if sub_lower.startswith("sub"):
-        sub_ID = ""
-
-        for i in sub_lower:
-            if i.isdigit():
-                sub_ID += i
-            else:
-                continue
-
-        subject = sub_ID
-
-    else:
-        pass
-
     if dir_content.count(f"sub-{subject}") == 1:
         print(f"The subject's subfolder for sub-{subject} is present.\n")
     else:
@@ -241,6 +467,9 @@ def create_folder_subjects(subject, parent_path):
 
 
 if __name__ == "__main__":
+    # Initialize colorama
+    color.init(autoreset=True)
+
     print(
         color.Fore.RED
         + ("ERROR: This script is not designed to be used as a "
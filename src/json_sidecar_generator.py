@@ -1,6 +1,6 @@
 import os
-import pandas as pd
 import json
+import hashlib
 from pathlib import Path
 
 utf = "UTF-8-SIG"
@@ -14,6 +14,10 @@ lvl_order = {"1": "First sequence acquired",
 
 lvl_side = {"R": "Right ear", "L": "Left ear"}
 
+lvl_flag = {"True": "Value flagged with \" *\" in the raw OAE test data "
+                    "file",
+            "False": "Value not flagged in the raw OAE test data file"}
+
 lvl_ses_test = {"1": "Test data available for this type of test",
                 "0": "No test data available for this type of test"}
 
@@ -27,16 +31,16 @@ index = ["LongName", "Description", "Levels", "Units"]
 def gen_df_tymp(var_json):
     """
     This function generates the tympanometry test (Tymp)
-    sidecar dataframe.
+    sidecar dictionary.
     INPUTS:
     -var_json: config file with user-supplied values
     OUTPUTS:
-    -returns a dataframe ready to be saved in a json format
+    -returns a dictionary ready to be saved in a json format
     """
 
     keys_tymp = var_json["json"]["keys"]["tymp"]
 
-    df_tymp = pd.DataFrame(index=index, columns=keys_tymp)
+    dict_tymp = {k: {} for k in keys_tymp}
 
     dict_longname_tymp = {keys_tymp[3]: "Tympanometric peak pressure/"
                                         "Middle ear pressure",
@@ -60,61 +64,57 @@ def gen_df_tymp(var_json):
 
     for k_tymp in keys_tymp:
         if k_tymp == keys_tymp[0]:
-            df_tymp.at[index[0],
-                       k_tymp] = long_order
-            df_tymp.at[index[2],
-                       k_tymp] = lvl_order
+            dict_tymp[k_tymp][index[0]] = long_order
+            dict_tymp[k_tymp][index[2]] = lvl_order
 
         elif k_tymp == keys_tymp[1]:
-            df_tymp.at[index[0],
-                       k_tymp] = long_side
-            df_tymp.at[index[2],
-                       k_tymp] = lvl_side
+            dict_tymp[k_tymp][index[0]] = long_side
+            dict_tymp[k_tymp][index[2]] = lvl_side
 
         elif k_tymp == keys_tymp[2]:
-            df_tymp.at[index[0],
-                       k_tymp] = "Type of curve"
-            df_tymp.at[index[1], k_tymp] = ("The type parameter is a "
-                                            "simplified representation of the "
-                                            "actual tympanogram curve. It "
-                                            "provides an indication on the "
-                                            "shape of the response curve and "
-                                            "a clinical judgement on the "
-                                            "normality of the result.")
-            df_tymp.at[index[2],
-                       k_tymp] = {"A": "Within normal mobility range",
-                                  "Ad": "Presents a higher than expected "
-                                        "mobility of the tympanic membrane",
-                                  "As": "Presents a lower than expected "
-                                        "mobility of the tympanic membrane",
-                                  "B": "Presents a very low mobility of the "
-                                       "tympanic membrane",
-                                  "C": "Presents a lower fluid pressure in "
-                                       "the middle ear than in the ear canal",
-                                  "D": " *** DESCRIPTION TO BE ADDED *** ",
-                                  "E": " *** DESCRIPTION TO BE ADDED *** "}
+            dict_tymp[k_tymp][index[0]] = "Type of curve"
+            dict_tymp[k_tymp][index[1]] = ("The type parameter is a "
+                                           "simplified representation of the "
+                                           "actual tympanogram curve. It "
+                                           "provides an indication on the "
+                                           "shape of the response curve and "
+                                           "a clinical judgement on the "
+                                           "normality of the result.")
+            dict_tymp[k_tymp][index[2]] = {
+                "A": "Within normal mobility range",
+                "Ad": "Presents a higher than expected "
+                      "mobility of the tympanic membrane",
+                "As": "Presents a lower than expected "
+                      "mobility of the tympanic membrane",
+                "B": "Presents a very low mobility of the "
+                     "tympanic membrane",
+                "C": "Presents a lower fluid pressure in "
+                     "the middle ear than in the ear canal",
+                "D": " *** DESCRIPTION TO BE ADDED *** ",
+                "E": " *** DESCRIPTION TO BE ADDED *** "
+            }
 
         else:
-            df_tymp.at[index[0], k_tymp] = dict_longname_tymp[k_tymp]
-            df_tymp.at[index[1], k_tymp] = dict_desc_tymp[k_tymp]
-            df_tymp.at[index[3], k_tymp] = dict_units_tymp[k_tymp]
+            dict_tymp[k_tymp][index[0]] = dict_longname_tymp[k_tymp]
+            dict_tymp[k_tymp][index[1]] = dict_desc_tymp[k_tymp]
+            dict_tymp[k_tymp][index[3]] = dict_units_tymp[k_tymp]
 
-    return df_tymp
+    return dict_tymp
 
 
 def gen_df_reflex(var_json):
     """
     This function generates the stapedial reflex test (Reflex)
-    sidecar dataframe.
+    sidecar dictionary.
     INPUTS:
     -var_json: config file with user-supplied values
     OUTPUTS:
-    -returns a dataframe ready to be saved in a json format
+    -returns a dictionary ready to be saved in a json format
     """
 
     keys_reflex = var_json["json"]["keys"]["reflex"]
 
-    df_reflex = pd.DataFrame(index=index, columns=keys_reflex)
+    dict_reflex = {k: {} for k in keys_reflex}
 
     dict_desc_reflex = {"500_hz": "",
                         "1000_hz": "",
@@ -123,78 +123,78 @@ def gen_df_reflex(var_json):
 
     for k_ref in keys_reflex:
         if k_ref == keys_reflex[0]:
-            df_reflex.at[index[0], k_ref] = long_order
-            df_reflex.at[index[2], k_ref] = lvl_order
+            dict_reflex[k_ref][index[0]] = long_order
+            dict_reflex[k_ref][index[2]] = lvl_order
 
         elif k_ref == keys_reflex[1]:
-            df_reflex.at[index[0], k_ref] = long_side
-            df_reflex.at[index[2], k_ref] = lvl_side
+            dict_reflex[k_ref][index[0]] = long_side
+            dict_reflex[k_ref][index[2]] = lvl_side
 
         elif k_ref == keys_reflex[6]:
-            df_reflex.at[index[0], k_ref] = (f"Stapedial reflex threshold "
-                                             f"for broadband {k_ref}")
-            df_reflex.at[index[1], k_ref] = ""
-            df_reflex.at[index[3], k_ref] = "dB HL"
+            dict_reflex[k_ref][index[0]] = (f"Stapedial reflex threshold "
+                                            f"for broadband {k_ref}")
+            dict_reflex[k_ref][index[1]] = ""
+            dict_reflex[k_ref][index[3]] = "dB HL"
 
         else:
             keys_word_reflex = k_ref.replace("_", " ").title()
-            df_reflex.at[index[0], k_ref] = (f"Stapedial reflex threshold "
-                                             f"at {keys_word_reflex}")
-            df_reflex.at[index[1], k_ref] = dict_desc_reflex[k_ref]
-            df_reflex.at[index[3], k_ref] = "dB HL"
+            dict_reflex[k_ref][index[0]] = (f"Stapedial reflex threshold "
+                                            f"at {keys_word_reflex}")
+            dict_reflex[k_ref][index[1]] = dict_desc_reflex[k_ref]
+            dict_reflex[k_ref][index[3]] = "dB HL"
 
-    return df_reflex
+    return dict_reflex
 
 
 def gen_df_pta(var_json):
     """
     This function generates the pure-tone audiometry test (PTA)
-    sidecar dataframe.
+    sidecar dictionary.
     INPUTS:
     -var_json: config file with user-supplied values
     OUTPUTS:
-    -returns a dataframe ready to be saved in a json format
+    -returns a dictionary ready to be saved in a json format
     """
 
     keys_pta = var_json["json"]["keys"]["pta"]
 
-    df_pta = pd.DataFrame(index=index, columns=keys_pta)
+    dict_pta = {k: {} for k in keys_pta}
 
     for k_pta in keys_pta:
         if k_pta == keys_pta[0]:
-            df_pta.at[index[0], k_pta] = long_order
-            df_pta.at[index[2], k_pta] = lvl_order
+            dict_pta[k_pta][index[0]] = long_order
+            dict_pta[k_pta][index[2]] = lvl_order
 
         elif k_pta == keys_pta[1]:
-            df_pta.at[index[0], k_pta] = long_side
-            df_pta.at[index[2], k_pta] = lvl_side
+            dict_pta[k_pta][index[0]] = long_side
+            dict_pta[k_pta][index[2]] = lvl_side
 
         else:
             keys_word_pta = k_pta.replace("_", " ").title()
-            df_pta.at[index[0], k_pta] = f"Threshold at {keys_word_pta}"
-            df_pta.at[index[1], k_pta] = (f"The participants are asked to "
-                                          f"press a button when they hear a "
-                                          f"sound. This value represents the "
-                                          f"hearing threshold obtained with "
-                                          f"a pure-tone at {keys_word_pta}.")
-            df_pta.at[index[3], k_pta] = "dB HL"
+            dict_pta[k_pta][index[0]] = f"Threshold at {keys_word_pta}"
+            dict_pta[k_pta][index[1]] = (f"The participants are asked to "
+                                         f"press a button when they hear a "
+                                         f"sound. This value represents the "
+                                         f"hearing threshold obtained with "
+                                         f"a pure-tone at {keys_word_pta}.")
+            dict_pta[k_pta][index[3]] = "dB HL"
 
-    return df_pta
+    return dict_pta
 
 
 def gen_df_mtx(var_json):
     """
     This function generates the matrix speech-in-noise perception
-    test (MTX) sidecar dataframe.
+    test (MTX) sidecar dictionary.
     INPUTS:
     -var_json: config file with user-supplied values
     OUTPUTS:
-    -returns a dataframe ready to be saved in a json format
+    -returns a dictionary ready to be saved in a json format
     """
 
     keys_mtx = var_json["json"]["keys"]["mtx"]
 
-    df_mtx = pd.DataFrame(index=index, columns=keys_mtx)
+    dict_mtx = {k: {} for k in keys_mtx}
 
     dict_longname_mtx = {"practice": "First condition of the sequence "
                                      "(see Description).",
@@ -226,43 +226,43 @@ def gen_df_mtx(var_json):
 
     for k_mtx in keys_mtx:
         if k_mtx == keys_mtx[0]:
-            df_mtx.at[index[0], k_mtx] = long_order
-            df_mtx.at[index[2], k_mtx] = lvl_order
+            dict_mtx[k_mtx][index[0]] = long_order
+            dict_mtx[k_mtx][index[2]] = lvl_order
 
         elif k_mtx == keys_mtx[1]:
-            df_mtx.at[index[0],
-                      k_mtx] = "Language used for this sequence of acquisition"
-            df_mtx.at[index[2], k_mtx] = {"French": "French",
-                                          "English": "English"}
+            dict_mtx[k_mtx][index[0]] = ("Language used for this sequence "
+                                         "of acquisition")
+            dict_mtx[k_mtx][index[2]] = {"French": "French",
+                                         "English": "English"}
 
         else:
-            df_mtx.at[index[0], k_mtx] = dict_longname_mtx[k_mtx]
-            df_mtx.at[index[1], k_mtx] = (f"The participants are asked to "
-                                          f"repeat out loud the sentences "
-                                          f"that are presented to them. This "
-                                          f"value represents the hearing "
-                                          f"threshold for a 50% rate of "
-                                          f"correct answers with these "
-                                          f"conditions: "
-                                          f"{dict_desc_mtx[k_mtx]}.")
-            df_mtx.at[index[3], k_mtx] = "dB SNR"
+            dict_mtx[k_mtx][index[0]] = dict_longname_mtx[k_mtx]
+            dict_mtx[k_mtx][index[1]] = (f"The participants are asked to "
+                                         f"repeat out loud the sentences "
+                                         f"that are presented to them. This "
+                                         f"value represents the hearing "
+                                         f"threshold for a 50% rate of "
+                                         f"correct answers with these "
+                                         f"conditions: "
+                                         f"{dict_desc_mtx[k_mtx]}.")
+            dict_mtx[k_mtx][index[3]] = "dB SNR"
 
-    return df_mtx
+    return dict_mtx
 
 
 def gen_df_teoae(var_json):
     """
     This function generates the transient-evoked otoacoustic
-    emissions test (TEOAE) sidecar dataframe.
+    emissions test (TEOAE) sidecar dictionary.
     INPUTS:
     -var_json: config file with user-supplied values
     OUTPUTS:
-    -returns a dataframe ready to be saved in a json format
+    -returns a dictionary ready to be saved in a json format
     """
 
     keys_teoae = var_json["json"]["keys"]["teoae"]
 
-    df_teoae = pd.DataFrame(index=index, columns=keys_teoae)
+    dict_teoae = {k: {} for k in keys_teoae}
 
     dict_longname_teoae = {keys_teoae[2]: "Frequency",
                            keys_teoae[3]: "Otoacoustic emissions response",
@@ -294,38 +294,37 @@ def gen_df_teoae(var_json):
 
     for k_teoae in keys_teoae:
         if k_teoae == keys_teoae[0]:
-            df_teoae.at[index[0],
-                        k_teoae] = long_order
-            df_teoae.at[index[2],
-                        k_teoae] = lvl_order
+            dict_teoae[k_teoae][index[0]] = long_order
+            dict_teoae[k_teoae][index[2]] = lvl_order
 
         elif k_teoae == keys_teoae[1]:
-            df_teoae.at[index[0],
-                        k_teoae] = long_side
-            df_teoae.at[index[2],
-                        k_teoae] = lvl_side
+            dict_teoae[k_teoae][index[0]] = long_side
+            dict_teoae[k_teoae][index[2]] = lvl_side
 
         else:
-            df_teoae.at[index[0], k_teoae] = dict_longname_teoae[k_teoae]
-            df_teoae.at[index[1], k_teoae] = dict_desc_teoae[k_teoae]
-            df_teoae.at[index[3], k_teoae] = dict_units_teoae[k_teoae]
+            dict_teoae[k_teoae][index[0]] = dict_longname_teoae[k_teoae]
+            dict_teoae[k_teoae][index[1]] = dict_desc_teoae[k_teoae]
+            dict_teoae[k_teoae][index[3]] = dict_units_teoae[k_teoae]
 
-    return df_teoae
+    return dict_teoae
 
 
-def gen_df_dpoae(var_json):
+def gen_df_dpoae(var_json, split_flags=False):
     """
     This function generates the distortion product otoacoustic
-    emissions test (DPOAE) sidecar dataframe.
+    emissions test (DPOAE) sidecar dictionary.
     INPUTS:
     -var_json: config file with user-supplied values
+    -split_flags: boolean specifying if the " *" flags of the DPOAE values
+                  are written in boolean [column]_flag columns, which are
+                  then described (Default = False)
     OUTPUTS:
-    -returns a dataframe ready to be saved in a json format
+    -returns a dictionary ready to be saved in a json format
     """
 
     keys_dpoae = var_json["json"]["keys"]["dpoae"]
 
-    df_dpoae = pd.DataFrame(index=index, columns=keys_dpoae)
+    dict_dpoae = {k: {} for k in keys_dpoae}
 
     dict_longname_dpoae = {keys_dpoae[2]: "Frequency #1",
                            keys_dpoae[3]: "Frequency #2",
@@ -396,38 +395,44 @@ def gen_df_dpoae(var_json):
 
     for k_dpoae in keys_dpoae:
         if k_dpoae == keys_dpoae[0]:
-            df_dpoae.at[index[0],
-                        k_dpoae] = long_order
-            df_dpoae.at[index[2],
-                        k_dpoae] = lvl_order
+            dict_dpoae[k_dpoae][index[0]] = long_order
+            dict_dpoae[k_dpoae][index[2]] = lvl_order
 
         elif k_dpoae == keys_dpoae[1]:
-            df_dpoae.at[index[0],
-                        k_dpoae] = long_side
-            df_dpoae.at[index[2],
-                        k_dpoae] = lvl_side
+            dict_dpoae[k_dpoae][index[0]] = long_side
+            dict_dpoae[k_dpoae][index[2]] = lvl_side
 
         else:
-            df_dpoae.at[index[0], k_dpoae] = dict_longname_dpoae[k_dpoae]
-            df_dpoae.at[index[1], k_dpoae] = dict_desc_dpoae[k_dpoae]
-            df_dpoae.at[index[3], k_dpoae] = dict_units_dpoae[k_dpoae]
+            dict_dpoae[k_dpoae][index[0]] = dict_longname_dpoae[k_dpoae]
+            dict_dpoae[k_dpoae][index[1]] = dict_desc_dpoae[k_dpoae]
+            dict_dpoae[k_dpoae][index[3]] = dict_units_dpoae[k_dpoae]
+
+    # Flag columns (only written when the BIDS format's auditory data
+    # exporter splits the " *" flags of the raw values)
+    if split_flags:
+        for k_dpoae in var_json["bids"]["flag_columns"]["dpoae"]:
+            dict_dpoae[k_dpoae + "_flag"] = {
+                index[0]: dict_longname_dpoae[k_dpoae] + " flag",
+                index[1]: f"Flag of the {k_dpoae} value.",
+                index[2]: lvl_flag
+            }
 
-    return df_dpoae
+    return dict_dpoae
 
 
 def gen_df_growth(var_json):
     """
     This function generates the distortion product otoacoustic
-    emissions growth function test (DP-Growth) sidecar dataframe.
+    emissions growth function test (DP-Growth) sidecar dictionary.
     INPUTS:
     -var_json: config file with user-supplied values
     OUTPUTS:
-    -returns a dataframe ready to be saved in a json format
+    -returns a dictionary ready to be saved in a json format
     """
 
     keys_growth = var_json["json"]["keys"]["growth"]
 
-    df_growth = pd.DataFrame(index=index, columns=keys_growth)
+    dict_growth = {k: {} for k in keys_growth}
 
     dict_longname_growth = {keys_growth[2]: "Frequency #1",
                             keys_growth[3]: "Frequency #2",
@@ -498,37 +503,33 @@ def gen_df_growth(var_json):
 
     for k_growth in keys_growth:
         if k_growth == keys_growth[0]:
-            df_growth.at[index[0],
-                         k_growth] = long_order
-            df_growth.at[index[2],
-                         k_growth] = lvl_order
+            dict_growth[k_growth][index[0]] = long_order
+            dict_growth[k_growth][index[2]] = lvl_order
 
         elif k_growth == keys_growth[1]:
-            df_growth.at[index[0],
-                         k_growth] = long_side
-            df_growth.at[index[2],
-                         k_growth] = lvl_side
+            dict_growth[k_growth][index[0]] = long_side
+            dict_growth[k_growth][index[2]] = lvl_side
 
         else:
-            df_growth.at[index[0], k_growth] = dict_longname_growth[k_growth]
-            df_growth.at[index[1], k_growth] = dict_desc_growth[k_growth]
-            df_growth.at[index[3], k_growth] = dict_units_growth[k_growth]
+            dict_growth[k_growth][index[0]] = dict_longname_growth[k_growth]
+            dict_growth[k_growth][index[1]] = dict_desc_growth[k_growth]
+            dict_growth[k_growth][index[3]] = dict_units_growth[k_growth]
 
-    return df_growth
+    return dict_growth
 
 
 def gen_df_sessions(var_json):
     """
-    This function generates the session-level sessions.tsv sidecar dataframe.
+    This function generates the session-level sessions.tsv sidecar dictionary.
     INPUTS:
     -var_json: config file with user-supplied values
     OUTPUTS:
-    -returns a dataframe ready to be saved in a json format
+    -returns a dictionary ready to be saved in a json format
     """
 
     keys_ses = var_json["json"]["keys"]["ses"]
 
-    df_ses = pd.DataFrame(index=index, columns=keys_ses)
+    dict_ses = {k: {} for k in keys_ses}
 
     dict_longname_sessions = {keys_ses[0]: "Session identification number",
                               keys_ses[1]: "Session name and/or type",
@@ -600,43 +601,43 @@ def gen_df_sessions(var_json):
 
     for k_ses in keys_ses:
         if k_ses == keys_ses[0]:
-            df_ses.at[index[0], k_ses] = dict_longname_sessions[k_ses]
-            df_ses.at[index[1], k_ses] = dict_desc_sessions[k_ses]
+            dict_ses[k_ses][index[0]] = dict_longname_sessions[k_ses]
+            dict_ses[k_ses][index[1]] = dict_desc_sessions[k_ses]
 
         elif k_ses == keys_ses[1]:
-            df_ses.at[index[0], k_ses] = dict_longname_sessions[k_ses]
-            df_ses.at[index[1], k_ses] = dict_desc_sessions[k_ses]
-            df_ses.at[index[2], k_ses] = var_json["json"]["lvl"]["ses_name"]
+            dict_ses[k_ses][index[0]] = dict_longname_sessions[k_ses]
+            dict_ses[k_ses][index[1]] = dict_desc_sessions[k_ses]
+            dict_ses[k_ses][index[2]] = var_json["json"]["lvl"]["ses_name"]
 
         elif k_ses == keys_ses[2]:
-            df_ses.at[index[0], k_ses] = dict_longname_sessions[k_ses]
-            df_ses.at[index[1], k_ses] = dict_desc_sessions[k_ses]
-            df_ses.at[index[2], k_ses] = var_json["json"]["lvl"]["cond"]
+            dict_ses[k_ses][index[0]] = dict_longname_sessions[k_ses]
+            dict_ses[k_ses][index[1]] = dict_desc_sessions[k_ses]
+            dict_ses[k_ses][index[2]] = var_json["json"]["lvl"]["cond"]
 
         elif k_ses == keys_ses[3]:
-            df_ses.at[index[0], k_ses] = dict_longname_sessions[k_ses]
-            df_ses.at[index[1], k_ses] = dict_desc_sessions[k_ses]
-            df_ses.at[index[3], k_ses] = "days"
+            dict_ses[k_ses][index[0]] = dict_longname_sessions[k_ses]
+            dict_ses[k_ses][index[1]] = dict_desc_sessions[k_ses]
+            dict_ses[k_ses][index[3]] = "days"
 
         elif k_ses == keys_ses[4]:
-            df_ses.at[index[0], k_ses] = dict_longname_sessions[k_ses]
-            df_ses.at[index[1], k_ses] = dict_desc_sessions[k_ses]
-            df_ses.at[index[2], k_ses] = var_json["json"]["lvl"]["scan"]
+            dict_ses[k_ses][index[0]] = dict_longname_sessions[k_ses]
+            dict_ses[k_ses][index[1]] = dict_desc_sessions[k_ses]
+            dict_ses[k_ses][index[2]] = var_json["json"]["lvl"]["scan"]
 
         else:
-            df_ses.at[index[0], k_ses] = dict_longname_sessions[k_ses]
-            df_ses.at[index[1], k_ses] = dict_desc_sessions[k_ses]
-            df_ses.at[index[2], k_ses] = lvl_ses_test
+            dict_ses[k_ses][index[0]] = dict_longname_sessions[k_ses]
+            dict_ses[k_ses][index[1]] = dict_desc_sessions[k_ses]
+            dict_ses[k_ses][index[2]] = lvl_ses_test
 
-    return df_ses
+    return dict_ses
 
 
-def save_json(df, save_folder, test):
+def save_json(dict_sidecar, save_folder, test):
     """
-    This function saves the provided dataframe in a json file and formats it
-    to comply with BIDS standards.
+    This function saves the provided sidecar dictionary in a json file and
+    formats it to comply with BIDS standards.
     INPUTS:
-    -df: dataframe to save in a json format
+    -dict_sidecar: dictionary to save in a json format
     -save_folder: path to save the json file
     -test: string containing the name of the test to insert in the json
            file name.
@@ -645,21 +646,11 @@ def save_json(df, save_folder, test):
     -NO specific return to the script
     """
 
-    if test == "sessions":
-        filename = test + ".json"
-    else:
-        filename = "task-" + test + "_beh.json"
-
-    df.to_json(os.path.join(save_folder, filename), indent=2)
-
-    with open(os.path.join(save_folder, filename), "r") as origin:
-        json_file = json.load(origin)
-    origin.close()
+    filename = sidecar_filename(test)
 
-    for i in list(json_file.keys()):
-        for j in list(json_file[i].keys()):
-            if json_file[i][j] is None:
-                del json_file[i][j]
+    # The fields of each column are saved in the order of the index list
+    json_file = {key: {i: value[i] for i in index if i in value}
+                 for key, value in dict_sidecar.items()}
 
     to_write = Path(os.path.join(save_folder, filename))
     to_write.write_text(json.dumps(json_file,
@@ -669,13 +660,113 @@ def save_json(df, save_folder, test):
     print("Saved", filename)
 
 
-def create_sidecars(results_folder, var_json):
+def sidecar_filename(test):
+    """
+    This function generates the name of a json sidecar file.
+    INPUTS:
+    -test: name of the test (or "sessions")
+    OUTPUTS:
+    -returns the name of the json sidecar file
+    """
+
+    if test == "sessions":
+        return test + ".json"
+    else:
+        return "task-" + test + "_beh.json"
+
+
+def sidecar_key(var_json, split_flags=False):
+    """
+    This function computes the key identifying a set of json sidecars: a hash
+    of the variables.json sections used to generate them, of the DPOAE flag
+    columns option and of this script.
+    INPUTS:
+    -var_json: config file with user-supplied values
+    -split_flags: boolean specifying if the DPOAE flag columns are described
+                  (Default = False)
+    OUTPUTS:
+    -returns the key (string)
+    """
+
+    hasher = hashlib.sha256()
+    hasher.update(json.dumps(var_json["json"], sort_keys=True).encode())
+
+    if split_flags:
+        hasher.update(json.dumps(var_json["bids"]["flag_columns"],
+                                 sort_keys=True).encode())
+
+    with open(__file__, "rb") as origin:
+        hasher.update(origin.read())
+    origin.close()
+
+    return hasher.hexdigest()
+
+
+def sidecar_digests(save_folder):
+    """
+    This function computes the hash of the content of the saved json
+    sidecars.
+    INPUTS:
+    -save_folder: path of the json sidecar originals
+    OUTPUTS:
+    -returns a dictionary {file name: sha256 hash} (None for the missing
+     files)
+    """
+
+    dict_digest = {}
+
+    for test in dict_gen:
+        path = Path(os.path.join(save_folder, sidecar_filename(test)))
+
+        if path.exists():
+            dict_digest[path.name] = hashlib.sha256(
+                path.read_bytes()
+            ).hexdigest()
+        else:
+            dict_digest[path.name] = None
+
+    return dict_digest
+
+
+def sidecars_up_to_date(save_folder, var_json, split_flags=False):
+    """
+    This function verifies if the json sidecars saved in a folder were
+    generated with the current variables.json values and were not modified
+    since (e.g. through a linked copy, see BIDS_utils.propagate_file).
+    INPUTS:
+    -save_folder: path of the json sidecar originals
+    -var_json: config file with user-supplied values
+    -split_flags: boolean specifying if the DPOAE flag columns should be
+                  described (Default = False)
+    OUTPUTS:
+    -returns True if all the json sidecars are present and up to date,
+     False otherwise
+    """
+
+    key_path = os.path.join(save_folder, key_filename)
+
+    if os.path.exists(key_path) is False:
+        return False
+
+    with open(key_path, "r") as origin:
+        dict_saved = json.load(origin)
+    origin.close()
+
+    return (dict_saved.get("key") == sidecar_key(var_json, split_flags)
+            and dict_saved.get("files") == sidecar_digests(save_folder))
+
+
+def create_sidecars(results_folder, var_json, split_flags=False):
     """
     This function serves a master function for this script. It runs the
     complete json sidecar generation and saves the newly created files.
+    The generation is skipped when the saved files are up to date (see
+    sidecars_up_to_date).
     INPUTS:
     -results_folder: path where to save the created files
     -var_json: config file with user-supplied values
+    -split_flags: boolean specifying if the DPOAE flag columns should be
+                  described (see gen_df_dpoae, Default = False)
     OUTPUTS:
     -NO specific return to the script
     """
@@ -690,23 +781,38 @@ def create_sidecars(results_folder, var_json):
 
     save_folder = os.path.join(results_folder, "BIDS_sidecars_originals")
 
-    df_tymp = gen_df_tymp(var_json)
-    df_reflex = gen_df_reflex(var_json)
-    df_pta = gen_df_pta(var_json)
-    df_mtx = gen_df_mtx(var_json)
-    df_teoae = gen_df_teoae(var_json)
-    df_dpoae = gen_df_dpoae(var_json)
-    df_growth = gen_df_growth(var_json)
-    df_sessions = gen_df_sessions(var_json)
-
-    save_json(df_tymp, save_folder, "Tymp")
-    save_json(df_reflex, save_folder, "Reflex")
-    save_json(df_pta, save_folder, "PTA")
-    save_json(df_mtx, save_folder, "MTX")
-    save_json(df_teoae, save_folder, "TEOAE")
-    save_json(df_dpoae, save_folder, "DPOAE")
-    save_json(df_growth, save_folder, "DPGrowth")
-    save_json(df_sessions, save_folder, "sessions")
+    if sidecars_up_to_date(save_folder, var_json, split_flags):
+        print("The json sidecars are up to date.")
+        return
+
+    for test, gen_sidecar in dict_gen.items():
+        if test == "DPOAE":
+            dict_sidecar = gen_sidecar(var_json, split_flags=split_flags)
+        else:
+            dict_sidecar = gen_sidecar(var_json)
+
+        save_json(dict_sidecar, save_folder, test)
+
+    dict_saved = {"key": sidecar_key(var_json, split_flags),
+                  "files": sidecar_digests(save_folder)}
+
+    with open(os.path.join(save_folder, key_filename), "w") as destination:
+        json.dump(dict_saved, destination, indent=2)
+    destination.close()
+
+
+# Sidecar generation function of each test (in the order they are saved)
+dict_gen = {"Tymp": gen_df_tymp,
+            "Reflex": gen_df_reflex,
+            "PTA": gen_df_pta,
+            "MTX": gen_df_mtx,
+            "TEOAE": gen_df_teoae,
+            "DPOAE": gen_df_dpoae,
+            "DPGrowth": gen_df_growth,
+            "sessions": gen_df_sessions}
+
+# Name of the file recording the key of the saved json sidecars
+key_filename = "sidecars_key.json"
 
 
 if __name__ == "__main__":
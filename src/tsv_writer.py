@@ -0,0 +1,109 @@
+import threading
+
+from concurrent.futures import ThreadPoolExecutor, wait
+
+"""
+SCRIPT DESCRIPTION:
+
+This script contains the buffered tsv writer used while a BIDS compatible
+dataset is generated. The dataframes are serialized as soon as they are
+submitted and the resulting text is written to disk by a bounded pool of
+threads, so that the data extraction does not wait on each file's
+open/write/close.
+
+It is not designed to be used as a standalone script, but rather as a slave to
+the BIDS_utils.py script.
+"""
+
+
+def write_text(path, text):
+    """
+    This function writes an already serialized tsv file.
+    INPUTS:
+    -path: path of the file to write
+    -text: content of the file
+    OUTPUTS:
+    -saved tsv file
+    -NO specific return to the script
+    """
+
+    # newline="" keeps the line terminators chosen by pandas' to_csv
+    with open(path, "w", encoding="utf-8", newline="") as destination:
+        destination.write(text)
+
+
+class TsvWriter:
+    """
+    Buffered tsv writer: the submitted dataframes are serialized right away
+    and written to disk by a pool of threads.
+    INPUTS:
+    -max_workers: number of writing threads (Default = 8)
+    -max_pending: maximum number of serialized files waiting to be written.
+                  When it is reached, submit blocks until a file is written
+                  (Default = 256)
+    """
+
+    def __init__(self, max_workers=8, max_pending=256):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.pending = threading.BoundedSemaphore(max_pending)
+        self.futures = []
+
+    def submit(self, df, path, **kwargs):
+        """
+        This function queues a dataframe to be saved in a tsv file.
+        INPUTS:
+        -df: dataframe to save
+        -path: path of the file to write
+        -kwargs: arguments passed to the dataframe's to_csv method
+        OUTPUTS:
+        -NO specific return to the script
+        """
+
+        text = df.to_csv(sep="\t", **kwargs)
+
+        # Back-pressure: wait for a free slot before queuing the file
+        self.pending.acquire()
+
+        try:
+            future = self.executor.submit(write_text, path, text)
+        except BaseException:
+            self.pending.release()
+            raise
+
+        future.add_done_callback(lambda done: self.pending.release())
+        self.futures.append(future)
+
+    def flush(self):
+        """
+        This function waits until all the queued files are written.
+        OUTPUTS:
+        -NO specific return to the script
+        -raises the first error encountered while writing the files
+        """
+
+        futures = self.futures
+        self.futures = []
+
+        wait(futures)
+
+        for future in futures:
+            future.result()
+
+    def close(self):
+        """
+        This function writes all the queued files and stops the writing
+        threads.
+        OUTPUTS:
+        -NO specific return to the script
+        """
+
+        try:
+            self.flush()
+        finally:
+            self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,28 @@
+import os
+import sys
+import json
+
+import pytest
+
+"""
+Shared settings of the test suite: the tests import the src/ package from
+the repository's root folder and use its variables.json file.
+"""
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if repo_root not in sys.path:
+    sys.path.insert(0, repo_root)
+
+
+@pytest.fixture
+def var_json():
+    """
+    Frequent-variables dictionary of the repository (variables.json).
+    """
+
+    with open(os.path.join(repo_root, "variables.json"), "r") as origin:
+        var_json = json.load(origin)
+    origin.close()
+
+    return var_json
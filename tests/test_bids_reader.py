@@ -0,0 +1,206 @@
+import os
+
+import pytest
+
+from src import BIDS_reader
+
+"""
+Tests of the reader of the BIDS compatible dataset (src/BIDS_reader.py),
+on a small BIDS_data tree.
+"""
+
+sessions_header = "session_id\tsession_name\tcondition\tdelay\tscan_type\n"
+
+dict_sessions = {
+    "sub-01": ("ses-01\tBaseline 1\tBaseline\t0\tn/a\n"
+               "ses-02\tPost-exposure 1\tSupra\t2\tn/a\n"),
+    "sub-02": ("ses-01\tBaseline 1\tBaseline\t0\tn/a\n"
+               "ses-02\tPost-exposure 1\tSupra\tn/a\tn/a\n")
+}
+
+
+def write_test_file(bids_path, subject, session, task):
+    """
+    This function writes a tsv file of a test in the BIDS_data tree.
+    INPUTS:
+    -bids_path: path of the BIDS_data folder
+    -subject: subject's folder name (e.g. "sub-01")
+    -session: session's folder name (e.g. "ses-01")
+    -task: test marker (e.g. "PTA")
+    OUTPUTS:
+    -saved tsv file
+    """
+
+    ses_path = bids_path / subject / session
+    ses_path.mkdir(parents=True, exist_ok=True)
+
+    name = f"{subject}_{session}_task-{task}_run-01_beh.tsv"
+    (ses_path / name).write_text("order\tside\n1\tR\n2\tL\n")
+
+
+def backdate(bids_path):
+    """
+    This function sets an old modification time on all the files and folders
+    of the tree, so that the next changes are detected even with a coarse
+    file system clock.
+    INPUTS:
+    -bids_path: path of the BIDS_data folder
+    OUTPUTS:
+    -NO specific return to the script
+    """
+
+    for root, ls_dir, ls_file in os.walk(bids_path, topdown=False):
+        for name in ls_file:
+            os.utime(os.path.join(root, name), ns=(10**18, 10**18))
+        os.utime(root, ns=(10**18, 10**18))
+
+
+@pytest.fixture
+def bids_path(tmp_path):
+    """
+    BIDS_data tree of two subjects with two sessions each (PTA files in all
+    the sessions, Tymp files in the first sessions). The delay of sub-02's
+    second session is unknown.
+    """
+
+    bids_path = tmp_path / "BIDS_data"
+
+    for subject, sessions in dict_sessions.items():
+        for session in ["ses-01", "ses-02"]:
+            write_test_file(bids_path, subject, session, "PTA")
+
+        write_test_file(bids_path, subject, "ses-01", "Tymp")
+
+        (bids_path / subject / f"{subject}_sessions.tsv").write_text(
+            sessions_header + sessions
+        )
+
+    backdate(bids_path)
+
+    return bids_path
+
+
+@pytest.fixture
+def scan_count(monkeypatch):
+    """
+    List of the subjects scanned by the reader (scan_subject calls).
+    """
+
+    ls_scanned = []
+    scan_subject = BIDS_reader.scan_subject
+
+    def counting_scan(subject_path):
+        ls_scanned.append(os.path.basename(subject_path))
+        return scan_subject(subject_path)
+
+    monkeypatch.setattr(BIDS_reader, "scan_subject", counting_scan)
+
+    return ls_scanned
+
+
+def test_index_reused(bids_path, scan_count):
+    reader = BIDS_reader.BIDSReader(str(bids_path))
+
+    assert scan_count == ["sub-01", "sub-02"]
+    assert os.path.isfile(reader.index_path)
+    assert len(reader.index) == 6
+    assert reader.tasks() == ["PTA", "Tymp"]
+
+    # Nothing changed: neither the refresh nor a new reader scans again
+    reader.refresh()
+    second_reader = BIDS_reader.BIDSReader(str(bids_path))
+
+    assert scan_count == ["sub-01", "sub-02"]
+    assert second_reader.index.equals(reader.index)
+
+
+def test_rescan_after_new_file(bids_path, scan_count):
+    reader = BIDS_reader.BIDSReader(str(bids_path))
+    scan_count.clear()
+
+    write_test_file(bids_path, "sub-02", "ses-02", "Tymp")
+    reader.refresh()
+
+    assert scan_count == ["sub-02"]
+    assert len(reader.task("Tymp")) == 3
+
+
+def test_rescan_after_new_sessions_file(bids_path, scan_count):
+    reader = BIDS_reader.BIDSReader(str(bids_path))
+    scan_count.clear()
+
+    (bids_path / "sub-01" / "sub-01_sessions.tsv").write_text(
+        sessions_header
+        + "ses-01\tBaseline 1\tBaseline\t0\tn/a\n"
+        + "ses-02\tPost-exposure 1\tSham\t5\tn/a\n"
+    )
+    reader.refresh()
+
+    assert scan_count == ["sub-01"]
+
+    files = reader.task("PTA").filter(subjects=["sub-01"],
+                                      sessions=["ses-02"]).files
+
+    assert files["condition"].tolist() == ["Sham"]
+    assert files["delay"].tolist() == [5]
+
+
+def test_filter(bids_path):
+    reader = BIDS_reader.BIDSReader(str(bids_path))
+    pta = reader.task("PTA")
+
+    assert len(pta) == 4
+
+    # With and without the sub-/ses- prefixes
+    for subjects, sessions in [(["sub-01"], ["ses-02"]), (["01"], ["02"])]:
+        files = pta.filter(subjects=subjects, sessions=sessions).files
+
+        assert files["path"].tolist() == [
+            "sub-01/ses-02/sub-01_ses-02_task-PTA_run-01_beh.tsv"
+        ]
+
+    files = pta.filter(conditions=["Supra"]).files
+
+    assert files["participant_id"].tolist() == ["sub-01", "sub-02"]
+    assert files["session_id"].tolist() == ["ses-02", "ses-02"]
+
+    # The filters are lazy: the selection of the TaskFrame is unchanged
+    assert len(pta) == 4
+
+
+def test_filter_delay(bids_path):
+    reader = BIDS_reader.BIDSReader(str(bids_path))
+    pta = reader.task("PTA")
+
+    # The session without a known delay is only kept without a delay filter
+    files = pta.filter(delay=(1, None)).files
+
+    assert files["participant_id"].tolist() == ["sub-01"]
+    assert files["delay"].tolist() == [2]
+
+    files = pta.filter(delay=(None, 2)).files
+
+    assert files["participant_id"].tolist() == ["sub-01", "sub-01", "sub-02"]
+
+
+def test_load(bids_path):
+    reader = BIDS_reader.BIDSReader(str(bids_path))
+    df = reader.task("Tymp").load()
+
+    assert df.columns.tolist() == ["participant_id", "session_id", "run",
+                                   "condition", "delay", "order", "side"]
+    assert df["participant_id"].tolist() == ["sub-01", "sub-01",
+                                             "sub-02", "sub-02"]
+    assert df["delay"].tolist() == [0, 0, 0, 0]
+    assert df["side"].tolist() == ["R", "L", "R", "L"]
+
+    df = reader.task("Unknown").load()
+
+    assert df.empty
+    assert df.columns.tolist() == ["participant_id", "session_id", "run",
+                                   "condition", "delay"]
+
+
+def test_missing_dataset(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        BIDS_reader.BIDSReader(str(tmp_path / "BIDS_data"))
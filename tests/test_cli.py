@@ -0,0 +1,108 @@
+import os
+import sys
+import shutil
+import subprocess
+
+import Auditory_toolbox_software as toolbox
+
+"""
+Tests of the toolbox's command line options and of the headless
+subcommands' exit status.
+"""
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_options_before_the_subcommand():
+    parser = toolbox.get_parser()
+
+    args = parser.parse_args(["--jobs", "4", "--sqlite",
+                              "bidsify", "--source", "csv", "db.csv"])
+
+    assert args.jobs == 4
+    assert args.sqlite is True
+    assert args.location == "db.csv"
+
+
+def test_options_after_the_subcommand():
+    parser = toolbox.get_parser()
+
+    args = parser.parse_args(["--jobs", "2", "bidsify", "--jobs", "3",
+                              "--export", "parquet", "--source", "xlsx"])
+
+    assert args.jobs == 3
+    assert args.export == "parquet"
+    assert args.sqlite is False
+    assert args.location is None
+
+
+def test_menu_defaults():
+    args = toolbox.get_parser().parse_args([])
+
+    assert args.command is None
+    assert args.jobs == 1
+    assert args.split_flags is False
+
+
+def run_toolbox(tmp_path, ls_arg, env=None):
+    """
+    This function runs the toolbox's entry point from a temporary folder
+    (containing a copy of the variables.json file).
+    INPUTS:
+    -tmp_path: temporary folder of the test
+    -ls_arg: command line arguments
+    -env: environment variables (Default = None: the current ones)
+    OUTPUTS:
+    -returns the completed process
+    """
+
+    shutil.copy(os.path.join(repo_root, "variables.json"), tmp_path)
+
+    script_path = os.path.join(repo_root, "Auditory_toolbox_software.py")
+
+    return subprocess.run(
+        [sys.executable, script_path] + ls_arg,
+        cwd=tmp_path, capture_output=True, text=True, env=env
+    )
+
+
+def test_missing_csv_database(tmp_path):
+    result = run_toolbox(tmp_path, ["bidsify", "--source", "csv",
+                                    "missing.csv"])
+
+    assert result.returncode == 1
+    assert "ERROR: The following database file does not exist" in (
+        result.stdout)
+    assert "Traceback" not in result.stderr
+
+
+def test_missing_xlsx_database(tmp_path):
+    result = run_toolbox(tmp_path, ["bidsify", "--source", "xlsx"])
+
+    assert result.returncode == 1
+    assert "test_database.xlsx" in result.stdout
+
+
+def test_offline_without_snapshot(tmp_path):
+    result = run_toolbox(tmp_path, ["bidsify", "--offline", "--source", "url",
+                                    "http://127.0.0.1:9/db/edit#gid=0"])
+
+    assert result.returncode == 1
+    assert "ERROR: No local snapshot" in result.stdout
+
+
+def test_export_without_pyarrow(tmp_path):
+    # A pyarrow package that can not be imported
+    blocker_path = tmp_path / "blocker" / "pyarrow"
+    blocker_path.mkdir(parents=True)
+    (blocker_path / "__init__.py").write_text(
+        "raise ImportError('pyarrow is blocked')\n"
+    )
+
+    env = dict(os.environ, PYTHONPATH=str(tmp_path / "blocker"))
+
+    result = run_toolbox(tmp_path, ["bidsify", "--export", "parquet",
+                                    "--source", "csv", "db.csv"], env=env)
+
+    assert result.returncode == 1
+    assert "ERROR: The pyarrow package is required" in result.stdout
@@ -0,0 +1,113 @@
+import threading
+
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from functools import partial
+
+import pytest
+
+from src import common_functions as common
+
+"""
+Tests of the local snapshot of a database downloaded from a URL
+(common_functions.read_db_url), against a local HTTP stand-in for the
+Google Spreadsheet csv export.
+"""
+
+db_csv = ("Participant_ID,Date,Protocol name\n"
+          "Sub01,2021-01-10,Baseline 1\n"
+          "Sub02,2021-01-13,Baseline 1\n")
+
+
+class CountingHandler(SimpleHTTPRequestHandler):
+    """
+    Static file handler that counts the requests it receives.
+    """
+
+    ls_request = []
+
+    def do_GET(self):
+        self.ls_request.append(self.path)
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def db_server(tmp_path):
+    """
+    Local HTTP server (ephemeral port) serving the database csv file.
+    OUTPUTS:
+    -yields the URL of the csv file, the list of the received requests and
+     the server (shut down at the end of the test if still running)
+    """
+
+    served_path = tmp_path / "served"
+    served_path.mkdir()
+    (served_path / "db.csv").write_text(db_csv)
+
+    CountingHandler.ls_request = []
+    handler = partial(CountingHandler, directory=str(served_path))
+    server = HTTPServer(("127.0.0.1", 0), handler)
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    url = f"http://127.0.0.1:{server.server_address[1]}/db.csv"
+
+    yield url, CountingHandler.ls_request, server
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_snapshot_ttl_and_offline(tmp_path, db_server):
+    url, ls_request, server = db_server
+    data_path = str(tmp_path / "data")
+
+    # First call: the database is downloaded and a snapshot is saved
+    df_first = common.read_db_url(url, data_path, "standalone", ttl=3600)
+
+    assert len(ls_request) == 1
+    assert df_first["Participant_ID"].tolist() == ["Sub01", "Sub02"]
+
+    # Within the time-to-live: the snapshot is used, no request is sent
+    df_cached = common.read_db_url(url, data_path, "standalone", ttl=3600)
+
+    assert len(ls_request) == 1
+    assert df_cached.equals(df_first)
+
+    # Without a time-to-live: the database is downloaded again
+    common.read_db_url(url, data_path, "standalone", ttl=0)
+
+    assert len(ls_request) == 2
+
+    # Offline with the server stopped: the last snapshot is used
+    server.shutdown()
+    server.server_close()
+
+    df_offline = common.read_db_url(url, data_path, "standalone",
+                                    offline=True)
+
+    assert df_offline.equals(df_first)
+
+
+def test_offline_without_snapshot(tmp_path, db_server):
+    url, ls_request, _ = db_server
+
+    with pytest.raises(RuntimeError, match="Return to the main menu"):
+        common.read_db_url(url, str(tmp_path / "data"), "master_script",
+                           offline=True)
+
+    assert len(ls_request) == 0
+
+
+def test_offline_without_snapshot_standalone(tmp_path, db_server):
+    url, ls_request, _ = db_server
+
+    with pytest.raises(SystemExit) as stop:
+        common.read_db_url(url, str(tmp_path / "data"), "standalone",
+                           offline=True)
+
+    assert stop.value.code == 1
+    assert len(ls_request) == 0
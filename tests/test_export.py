@@ -0,0 +1,35 @@
+import sys
+
+import pytest
+
+from src import BIDS_formater as formater
+
+"""
+Tests of the dataset-level export's verification (BIDS_formater.check_export)
+when the pyarrow package can not be imported.
+"""
+
+
+@pytest.fixture
+def no_pyarrow(monkeypatch):
+    """
+    Makes the pyarrow package impossible to import.
+    """
+
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+
+
+def test_missing_pyarrow_standalone(no_pyarrow):
+    with pytest.raises(SystemExit) as stop:
+        formater.check_export("parquet", "standalone")
+
+    assert stop.value.code == 1
+
+
+def test_missing_pyarrow_master_script(no_pyarrow):
+    with pytest.raises(RuntimeError, match="Return to the main menu"):
+        formater.check_export("feather", "master_script")
+
+
+def test_no_export_without_pyarrow(no_pyarrow):
+    assert formater.check_export(None, "standalone") is None
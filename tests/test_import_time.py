@@ -0,0 +1,72 @@
+import os
+import sys
+import subprocess
+
+"""
+Import-time budget of the toolbox's entry point: the menu and --help must
+not import the pipeline's heavy dependencies (see the lazy imports of
+Auditory_toolbox_software.py).
+"""
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages only imported when a pipeline functionality is selected
+heavy_packages = ["pandas", "numpy", "openpyxl"]
+
+# Cumulative import time budget of the entry point (microseconds)
+budget_us = 100000
+
+
+def import_times(ls_arg):
+    """
+    This function runs Python with the -X importtime option.
+    INPUTS:
+    -ls_arg: arguments following the interpreter options
+    OUTPUTS:
+    -returns a dictionary {module: cumulative import time (us)}
+    """
+
+    result = subprocess.run([sys.executable, "-X", "importtime"] + ls_arg,
+                            cwd=repo_root, capture_output=True, text=True,
+                            check=True)
+
+    dict_time = {}
+
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") is False:
+            continue
+
+        ls_field = line[len("import time:"):].split("|")
+
+        if ls_field[0].strip().isdigit() is False:
+            continue
+
+        dict_time[ls_field[2].strip()] = int(ls_field[1])
+
+    return dict_time
+
+
+def heavy_modules(dict_time):
+    """
+    This function lists the imported modules of the heavy packages.
+    INPUTS:
+    -dict_time: imported modules (see import_times)
+    OUTPUTS:
+    -returns a list of module names
+    """
+
+    return [module for module in dict_time
+            if module.split(".")[0] in heavy_packages]
+
+
+def test_entry_point_import_budget():
+    dict_time = import_times(["-c", "import Auditory_toolbox_software"])
+
+    assert heavy_modules(dict_time) == []
+    assert dict_time["Auditory_toolbox_software"] < budget_us
+
+
+def test_help_does_not_import_the_pipeline():
+    dict_time = import_times(["Auditory_toolbox_software.py", "--help"])
+
+    assert heavy_modules(dict_time) == []
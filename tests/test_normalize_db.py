@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from src import BIDS_formater as formater
+
+"""
+Tests of the numeric normalization of the spreadsheet-based tests
+(BIDS_formater.normalize_db).
+"""
+
+
+def dirty_db():
+    """
+    This function generates a database with the values of the PTA and
+    tympanometry columns written in different ways.
+    OUTPUTS:
+    -returns the database
+    """
+
+    return pd.DataFrame({
+        "Participant_ID": ["Sub01"] * 6,
+        "Protocol name": [f"Session {k}" for k in range(6)],
+        "Tymp_RE": ["A", "As", "Ad", "A", "B", "C"],
+        "TPP_RE": [25, 1.5, np.nan, -10, 0, 5],
+        "RE_250": ["25", "12,5", "12,5 *", "-", "NR", np.nan],
+        "RE_500": ["10", "15", "20*", "n/a", "30", "35"]
+    })
+
+
+def test_values_are_kept_as_written(var_json):
+    df, _ = formater.normalize_db(dirty_db(), var_json)
+
+    assert df["RE_250"].tolist()[:3] == [25, 12.5, "12.5 *"]
+    assert df["RE_250"].iloc[4] == "NR"
+    assert df["RE_250"].isna().tolist() == [False] * 3 + [True, False, True]
+    assert df["RE_500"].tolist()[:3] == [10, 15, "20 *"]
+    assert isinstance(df["RE_250"].iloc[0], (int, np.integer))
+
+    # The text and numerical columns are not modified
+    assert df["Tymp_RE"].tolist() == ["A", "As", "Ad", "A", "B", "C"]
+    assert df["TPP_RE"].dtype == float
+
+
+def test_unreadable_values_are_reported(var_json):
+    _, qc_report = formater.normalize_db(dirty_db(), var_json)
+
+    assert qc_report["column"].tolist() == ["RE_250"]
+    assert qc_report["value"].tolist() == ["NR"]
+    assert qc_report["Protocol name"].tolist() == ["Session 4"]
+
+
+def test_tsv_values(var_json, tmp_path):
+    df, _ = formater.normalize_db(dirty_db(), var_json)
+
+    path = tmp_path / "pta.tsv"
+    df[["RE_250", "RE_500"]].to_csv(path, sep="\t", index=False,
+                                    na_rep="n/a")
+
+    assert path.read_text().splitlines()[1:] == [
+        "25\t10", "12.5\t15", "12.5 *\t20 *", "n/a\tn/a", "NR\t30",
+        "n/a\t35"
+    ]
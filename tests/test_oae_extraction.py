@@ -0,0 +1,94 @@
+import os
+
+import pandas as pd
+
+from src import BIDS_utils as utils
+
+"""
+Regression tests of the OAE extractors: the left ear's lines of the DPOAE
+and baseline/condition 2 DP-growth tsv files used to be labelled 1/R
+(dpoae_suppl_values ignored its seq_number and ear arguments).
+"""
+
+dpoae_header = ("Freq (Hz);F1 (dB);F2 (dB);DP (dB);Noise+2sd (dB);"
+                "Noise+1sd (dB);2F2-F1 (dB);3F1-2F2 (dB);3F2-2F1 (dB);"
+                "4F1-3F2 (dB);\n")
+
+
+def write_dp_csv(path, ls_freq):
+    """
+    This function writes a raw DPOAE (or DP-growth) csv file.
+    INPUTS:
+    -path: path of the csv file
+    -ls_freq: list of the F2 frequencies (one line per frequency)
+    OUTPUTS:
+    -saved csv file
+    """
+
+    with open(path, "w") as destination:
+        destination.write(dpoae_header)
+
+        for freq in ls_freq:
+            destination.write(f"{freq};65;55;10,5;-12,3;-14,1;-8,2 *;"
+                              "-9,4;-;-20,7;\n")
+    destination.close()
+
+
+def bidsify_baseline(tmp_path, extractor, x_oae):
+    """
+    This function extracts the OAE tests of a single baseline session.
+    INPUTS:
+    -tmp_path: temporary folder of the test
+    -extractor: BIDS_utils.extract_dpoae or BIDS_utils.extract_growth
+    -x_oae: list of column names of the BIDS formated df
+    OUTPUTS:
+    -returns the content of the saved tsv file
+    """
+
+    oae_path = tmp_path / "auditory_tests" / "OAE"
+    oae_path.mkdir(parents=True)
+
+    for ear in ["R", "L"]:
+        write_dp_csv(oae_path / f"Sub01_2021-01-10_Baseline_DPOAE6555_{ear}"
+                                ".csv", [1001, 2002, 4004])
+        write_dp_csv(oae_path / f"Sub01_2021-01-10_Baseline_4000_{ear}.csv",
+                     [4004] * 3)
+
+    data_sub = pd.DataFrame({
+        "Participant_ID": ["Sub01"],
+        "Date": pd.to_datetime(["2021-01-10"]),
+        "Protocol condition": ["Baseline"],
+        "Session_ID": ["01"]
+    })
+
+    oae_index = utils.oae_file_index(os.listdir(oae_path))
+    ls_plan = utils.plan_oae(data_sub, oae_index)
+
+    result_path = tmp_path / "sub-01"
+    (result_path / "ses-01").mkdir(parents=True)
+
+    extractor(data_sub, ls_plan, x_oae, str(tmp_path / "auditory_tests"),
+              str(result_path), "01")
+
+    ls_tsv = list((result_path / "ses-01").iterdir())
+    assert len(ls_tsv) == 1
+
+    return pd.read_csv(ls_tsv[0], sep="\t", keep_default_na=False)
+
+
+def test_dpoae_left_ear_labels(tmp_path, var_json):
+    df = bidsify_baseline(tmp_path, utils.extract_dpoae,
+                          var_json["bids"]["tsv_columns"]["dpoae"])
+
+    assert df["order"].tolist() == [1, 1, 1, 2, 2, 2]
+    assert df["side"].tolist() == ["R", "R", "R", "L", "L", "L"]
+    assert df["2f2-f1"].tolist() == ["-8.2 *"] * 6
+    assert df["3f2-2f1"].tolist() == ["n/a"] * 6
+
+
+def test_growth_left_ear_labels(tmp_path, var_json):
+    df = bidsify_baseline(tmp_path, utils.extract_growth,
+                          var_json["bids"]["tsv_columns"]["growth"])
+
+    assert df["order"].tolist() == [1, 1, 1, 2, 2, 2]
+    assert df["side"].tolist() == ["R", "R", "R", "L", "L", "L"]
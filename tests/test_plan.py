@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from src import BIDS_utils as utils
+
+"""
+Tests of the output plan: the spreadsheet-based tests are extracted from the
+same plan lines as the ones reported by the dry run.
+"""
+
+
+def tymp_sessions():
+    """
+    This function generates the tympanometry columns of three sessions (the
+    second one without any data).
+    OUTPUTS:
+    -returns the sessions' dataframe
+    """
+
+    return pd.DataFrame({
+        "Session_ID": ["01", "02", "03"],
+        "Tymp_RE": ["A", np.nan, "A"],
+        "TPP_RE": [-10, np.nan, 5],
+        "Tymp_LE": ["As", np.nan, np.nan],
+        "TPP_LE": [0, np.nan, np.nan]
+    })
+
+
+def test_plan_lists_the_sessions_with_data():
+    ls_plan = utils.plan_test(tymp_sessions(), ["Tymp_RE", "TPP_RE"],
+                              ["Tymp_LE", "TPP_LE"], "Tymp")
+
+    assert [line["index"] for line in ls_plan] == [0, 2]
+    assert not any(line["missing"] for line in ls_plan)
+
+
+def test_extraction_follows_the_plan(tmp_path):
+    df = tymp_sessions()
+
+    for ses in df["Session_ID"]:
+        (tmp_path / f"ses-{ses}").mkdir()
+
+    ls_plan = utils.plan_test(df, ["Tymp_RE", "TPP_RE"],
+                              ["Tymp_LE", "TPP_LE"], "Tymp")
+
+    # Only the last planned session is kept
+    manifest = {}
+    utils.extract_tymp(df, ls_plan[1:], ["Tymp_RE", "TPP_RE"],
+                       ["Tymp_LE", "TPP_LE"], ["order", "side", "type", "tpp"],
+                       str(tmp_path), "01", manifest=manifest)
+
+    ls_tsv = sorted(path.name for path in tmp_path.glob("ses-*/*.tsv"))
+
+    assert ls_tsv == ["sub-01_ses-03_task-Tymp_run-01_beh.tsv"]
+    assert manifest == {"ses-03": ["Tymp"]}
+
+    saved = pd.read_csv(tmp_path / "ses-03" / ls_tsv[0], sep="\t")
+
+    assert saved["side"].tolist() == ["R"]
+    assert saved["tpp"].tolist() == [5]
@@ -0,0 +1,33 @@
+import json
+
+from src import json_sidecar_generator as jsg
+
+"""
+Tests of the DPOAE sidecar's flag columns (split_flags option of the BIDS
+format's auditory data exporter).
+"""
+
+
+def test_flag_columns_only_with_split_flags(var_json):
+    ls_flag = [k + "_flag" for k in var_json["bids"]["flag_columns"]["dpoae"]]
+
+    dict_default = jsg.gen_df_dpoae(var_json)
+    dict_split = jsg.gen_df_dpoae(var_json, split_flags=True)
+
+    assert not any(k.endswith("_flag") for k in dict_default)
+    assert [k for k in dict_split if k.endswith("_flag")] == ls_flag
+    assert set(dict_split["dp_flag"]["Levels"]) == {"True", "False"}
+
+
+def test_sidecars_follow_the_option(tmp_path, var_json):
+    path = tmp_path / "BIDS_sidecars_originals" / "task-DPOAE_beh.json"
+
+    jsg.create_sidecars(str(tmp_path), var_json, split_flags=True)
+
+    assert "dp_flag" in json.loads(path.read_text(encoding="utf-8-sig"))
+
+    jsg.create_sidecars(str(tmp_path), var_json)
+
+    assert "dp_flag" not in json.loads(path.read_text(encoding="utf-8-sig"))
+    assert jsg.sidecars_up_to_date(str(tmp_path / "BIDS_sidecars_originals"),
+                                   var_json)